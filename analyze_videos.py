@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Offline Emotion Analysis - score recorded video without a display
+Splits the videos into chunks across a process pool and writes one row
+per face per frame (timestamp, bbox, track ID, probabilities) to CSV or
+Parquet
+
+    python analyze_videos.py lobby_*.mp4 --output results.csv
+    python analyze_videos.py recordings/day1.mp4 --output day1.parquet --workers 8
+"""
+
+import argparse
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from batch_analysis import analyze_videos, FORMATS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline emotion analysis of recorded video")
+    parser.add_argument('videos', nargs='+', help="Video files to analyze")
+    parser.add_argument('--output', '-o', default='emotion_results.csv',
+                        help="Results file; .parquet writes Parquet (default: emotion_results.csv)")
+    parser.add_argument('--format', choices=FORMATS, default=None, help="Override the format implied by --output")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: one per core)")
+    parser.add_argument('--chunk-frames', type=int, default=600, help="Frames per chunk of work")
+    parser.add_argument('--batch-size', type=int, default=64, help="Face crops per forward pass")
+    parser.add_argument('--backend', default='auto', help="Emotion backend: auto, keras, tflite, onnx or numpy")
+    parser.add_argument('--threads', type=int, default=1, help="Inference threads per worker")
+    args = parser.parse_args(argv)
+
+    print("=" * 60)
+    print("Offline Emotion Analysis")
+    print("=" * 60)
+
+    try:
+        stats = analyze_videos(args.videos, args.output, workers=args.workers, chunk_frames=args.chunk_frames,
+                               batch_size=args.batch_size, backend=args.backend, threads=args.threads,
+                               fmt=args.format)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"✓ {stats['frames']} frames, {stats['rows']} face results written to {args.output}")
+    print(f"✓ {stats['seconds']:.1f} s, {stats['fps']:.1f} frames/sec")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Batched vs. per-face emotion inference benchmark
+Compares calling predict_emotion once per face against a single
+predict_emotions call for 1, 4, 8 and 16 faces per frame
+
+Run from the repository root so models/emotion_model.h5 is found:
+    python benchmarks/bench_batch_inference.py
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+warnings.filterwarnings('ignore')
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from emotion_detector import AdvancedEmotionDetector
+
+FACE_COUNTS = [1, 4, 8, 16]
+ITERATIONS = 20
+
+
+def make_face_crops(count, seed=0):
+    """Create random BGR crops with typical webcam face sizes"""
+    rng = np.random.default_rng(seed)
+    crops = []
+    for _ in range(count):
+        size = int(rng.integers(80, 200))
+        crops.append(rng.integers(0, 256, (size, size, 3), dtype=np.uint8))
+    return crops
+
+
+def time_call(fn, iterations):
+    """Return mean seconds per call after one warm-up call"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) / iterations
+
+
+def main():
+    print("=" * 60)
+    print("BATCHED EMOTION INFERENCE BENCHMARK")
+    print("=" * 60)
+
+    # The same crops are fed every iteration: with the result cache on,
+    # the batched column would time cache hits instead of inference
+    detector = AdvancedEmotionDetector(backend='keras', result_cache=False)
+    if not detector.model_loaded:
+        print("❌ Emotion model not available")
+        return
+
+    # Silence per-prediction logging while timing
+    devnull = open(os.devnull, 'w')
+
+    print(f"\n{'Faces':>6} | {'Per-face ms':>12} | {'Batched ms':>11} | {'Faces/s loop':>13} | {'Faces/s batch':>13} | {'Speedup':>7}")
+    print("-" * 78)
+
+    for count in FACE_COUNTS:
+        crops = make_face_crops(count)
+
+        stdout = sys.stdout
+        sys.stdout = devnull
+        try:
+            loop_time = time_call(lambda: [detector.predict_emotion(c) for c in crops], ITERATIONS)
+            batch_time = time_call(lambda: detector.predict_emotions(crops), ITERATIONS)
+        finally:
+            sys.stdout = stdout
+
+        print(f"{count:>6} | {loop_time*1000:>12.2f} | {batch_time*1000:>11.2f} | "
+              f"{count/loop_time:>13.1f} | {count/batch_time:>13.1f} | {loop_time/batch_time:>6.2f}x")
+
+    devnull.close()
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
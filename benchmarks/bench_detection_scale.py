@@ -0,0 +1,143 @@
+#!/usr/bin/env python
+"""
+Detection scale benchmark: latency vs. recall
+Runs AdvancedFaceDetector over recorded clips at several detection
+scales. For each scale it reports the per-frame detection latency and the
+recall against full-resolution detection: the share of full-resolution
+faces that are found at that scale with IoU >= 0.5
+
+Run from the repository root:
+    python benchmarks/bench_detection_scale.py lobby.mp4
+    python benchmarks/bench_detection_scale.py clip1.mp4 clip2.mp4 --scales 1 0.75 0.5 0.35
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from face_detector_advanced import AdvancedFaceDetector, auto_detection_scale
+from frame_sources import VideoFileSource
+
+DEFAULT_SCALES = [1.0, 0.75, 0.5, 0.35, 0.25]
+
+
+def load_frames(paths, max_frames):
+    """Frames from every clip, up to max_frames per clip"""
+    frames = []
+    for path in paths:
+        source = VideoFileSource(path, pace='fast')
+        if not source.open():
+            raise SystemExit(f"❌ Cannot open video {path}")
+        count = 0
+        while count < max_frames:
+            grabbed = source.read()
+            if grabbed is None:
+                break
+            frames.append(grabbed[0])
+            count += 1
+        source.release()
+    return frames
+
+
+def iou(a, b):
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    ix = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    iy = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = ix * iy
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def run_scale(frames, scale):
+    """Per-frame detection latency (ms) and boxes at one scale"""
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    detector = None
+    try:
+        # Detect on every frame: tracking would hide the detector's cost and misses
+        detector = AdvancedFaceDetector(detection_interval=1, detection_scale=scale)
+        latencies, boxes = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            faces = detector.detect_faces(frame)
+            latencies.append((time.perf_counter() - start) * 1000)
+            boxes.append([face['bbox'] for face in faces])
+    finally:
+        if detector is not None:
+            detector.close()
+        sys.stdout.close()
+        sys.stdout = stdout
+    return detector, latencies, boxes
+
+
+def recall(reference, boxes, threshold=0.5):
+    """Share of reference boxes matched by a box with IoU >= threshold"""
+    total = matched = 0
+    for expected, found in zip(reference, boxes):
+        total += len(expected)
+        matched += sum(1 for box in expected if any(iou(box, other) >= threshold for other in found))
+    return matched / total if total else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face detection latency vs. recall across detection scales")
+    parser.add_argument('clips', nargs='+', help="Recorded video clips")
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES,
+                        help="Detection scales to compare; 1.0 is the reference")
+    parser.add_argument('--frames', type=int, default=300, help="Frames per clip")
+    parser.add_argument('--warmup', type=int, default=5, help="Frames excluded from the latency statistics")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("DETECTION SCALE BENCHMARK")
+    print("=" * 70)
+
+    frames = load_frames(args.clips, args.frames)
+    if not frames:
+        print("❌ No frames read")
+        return 1
+    height, width = frames[0].shape[:2]
+    print(f"✓ {len(frames)} frames ({width}x{height}) from {len(args.clips)} clip(s)")
+
+    try:
+        detector, reference_ms, reference = run_scale(frames, 1.0)
+    except Exception as e:
+        print(f"❌ Face detector unavailable: {e}")
+        return 1
+    method = detector.backend
+    auto_scale = auto_detection_scale(detector.min_face_size, method)
+    faces = sum(len(boxes) for boxes in reference)
+    print(f"✓ Detector {method}, {faces} faces at full resolution, auto scale {auto_scale:.2f}")
+
+    reference_p50 = float(np.percentile(reference_ms[args.warmup:], 50))
+    print(f"\n{'Scale':>7} | {'p50 ms':>8} | {'p95 ms':>8} | {'Speedup':>8} | {'Recall':>7} | {'Faces':>6}")
+    print("-" * 60)
+    for scale in sorted(set(args.scales) | {1.0, auto_scale}, reverse=True):
+        if scale == 1.0:
+            latencies, boxes = reference_ms, reference
+        else:
+            _, latencies, boxes = run_scale(frames, scale)
+        latencies = latencies[args.warmup:]
+        p50 = float(np.percentile(latencies, 50))
+        p95 = float(np.percentile(latencies, 95))
+        found = recall(reference, boxes)
+        label = f"{scale:.2f}" + ('*' if scale == auto_scale else ' ')
+        recall_text = 'n/a' if found is None else f"{found * 100:.1f}%"
+        print(f"{label:>7} | {p50:>8.2f} | {p95:>8.2f} | {reference_p50 / p50:>7.1f}x | {recall_text:>7} | "
+              f"{sum(len(b) for b in boxes):>6}")
+    print("* auto scale for min_face_size from config.ini")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
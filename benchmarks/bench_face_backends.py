@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+"""
+Face detector backend benchmark
+Times AdvancedFaceDetector detection per backend (YuNet, res10 SSD, MTCNN,
+Haar) on the stage benchmark's 640x480 frames with 0, 1, 4 and 8 faces,
+or on a recording. Tracking, region search and downscaling are off so
+every frame is a full-resolution, full-frame detection
+
+Run from the repository root:
+    python benchmarks/bench_face_backends.py
+    python benchmarks/bench_face_backends.py --video recording.mp4
+    python benchmarks/bench_face_backends.py --backends yunet ssd
+"""
+
+import argparse
+import os
+import sys
+import time
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from bench_pipeline_stages import FACE_COUNTS, synthetic_frames, video_frames, summarize
+from face_detector_advanced import AdvancedFaceDetector
+
+BACKENDS = ['yunet', 'ssd', 'mtcnn', 'haar']
+
+
+def load_detector(backend, scale):
+    """Detector for exactly this backend, or None when it cannot load"""
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        detector = AdvancedFaceDetector(backend=backend, detection_interval=1, full_scan_interval=0,
+                                        detection_scale=scale)
+    except Exception:
+        detector = None
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    # A backend that fails to load falls back to another one
+    return detector if detector is not None and detector.backend == backend else None
+
+
+def run_case(detector, frames, warmup):
+    latencies, found = [], []
+    for i, (frame, _) in enumerate(frames):
+        start = time.perf_counter()
+        faces = detector.detect_faces(frame)
+        if i >= warmup:
+            latencies.append((time.perf_counter() - start) * 1000)
+            found.append(len(faces))
+    return summarize(latencies), sum(found) / len(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Face detector latency per backend")
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=BACKENDS)
+    parser.add_argument('--video', default=None, help="Recorded footage (default: synthetic 0/1/4/8-face frames)")
+    parser.add_argument('--frames', type=int, default=60, help="Frames per case")
+    parser.add_argument('--warmup', type=int, default=5, help="Frames per case excluded from the statistics")
+    parser.add_argument('--scale', type=float, default=1.0, help="Detection scale (default: full resolution)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("FACE DETECTOR BACKEND BENCHMARK")
+    print("=" * 70)
+
+    if args.video:
+        cases = {'video': video_frames(args.video, args.frames + args.warmup)}
+    else:
+        cases = {str(n): synthetic_frames(n, args.frames + args.warmup) for n in FACE_COUNTS}
+    height, width = next(iter(cases.values()))[0][0].shape[:2]
+    print(f"✓ {args.frames} frames per case at {width}x{height}, detection scale {args.scale:.2f}")
+
+    print(f"\n{'Backend':>8} | {'Case':>6} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8} | {'Faces/frame':>11}")
+    print("-" * 66)
+    for backend in args.backends:
+        detector = load_detector(backend, args.scale)
+        if detector is None:
+            print(f"{backend:>8} | {'unavailable (model file or package missing)'}")
+            print("-" * 66)
+            continue
+        try:
+            for case, frames in cases.items():
+                summary, faces = run_case(detector, frames, args.warmup)
+                print(f"{backend:>8} | {case:>6} | {summary['p50']:>8.2f} | {summary['p95']:>8.2f} | "
+                      f"{summary['p99']:>8.2f} | {faces:>11.1f}")
+        finally:
+            detector.close()
+        print("-" * 66)
+
+    print("=" * 70)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
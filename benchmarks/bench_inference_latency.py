@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+"""
+Per-call emotion inference latency benchmark
+Compares keras model.predict (the previous path) against the traced
+inference function, with and without XLA JIT
+
+Run from the repository root so models/emotion_model.h5 is found:
+    python benchmarks/bench_inference_latency.py
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+warnings.filterwarnings('ignore')
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from emotion_detector import AdvancedEmotionDetector
+
+ITERATIONS = 200
+WARMUP = 10
+
+
+def measure(fn, batch):
+    """Return per-call latencies in milliseconds"""
+    for _ in range(WARMUP):
+        fn(batch)
+    latencies = []
+    for _ in range(ITERATIONS):
+        start = time.perf_counter()
+        fn(batch)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.array(latencies)
+
+
+def main():
+    print("=" * 60)
+    print("EMOTION INFERENCE LATENCY BENCHMARK")
+    print("=" * 60)
+
+    # Times the keras paths directly; no result cache in between
+    detector = AdvancedEmotionDetector(backend='keras', result_cache=False)
+    if not detector.model_loaded:
+        print("❌ Emotion model not available")
+        return
+
+    xla_detector = AdvancedEmotionDetector(backend='keras', jit_compile=True, result_cache=False)
+
+    input_shape = tuple(detector.model.input_shape[1:])
+    batch = np.random.default_rng(0).random((1,) + input_shape, dtype=np.float32)
+
+    paths = [
+        ("model.predict", lambda x: detector.model.predict(x, verbose=0)),
+        ("traced", lambda x: detector.infer_fn(x).numpy()),
+    ]
+    if xla_detector.infer_fn is not None:
+        paths.append(("traced + XLA", lambda x: xla_detector.infer_fn(x).numpy()))
+
+    print(f"\nSingle-sample calls, {ITERATIONS} iterations, input {batch.shape}\n")
+    print(f"{'Path':>14} | {'mean ms':>8} | {'p50 ms':>8} | {'p95 ms':>8}")
+    print("-" * 48)
+
+    baseline = None
+    for name, fn in paths:
+        try:
+            latencies = measure(fn, batch)
+        except Exception as e:
+            print(f"{name:>14} | failed: {e}")
+            continue
+
+        mean = latencies.mean()
+        baseline = baseline or mean
+        print(f"{name:>14} | {mean:>8.2f} | {np.percentile(latencies, 50):>8.2f} | "
+              f"{np.percentile(latencies, 95):>8.2f}   ({baseline/mean:.1f}x)")
+
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Pure-NumPy emotion engine benchmark
+Checks that the NumPy forward pass matches Keras within the documented
+tolerance and compares load time and batched latency of both paths
+
+Run from the repository root so models/emotion_model.h5 is found:
+    python benchmarks/bench_numpy_backend.py
+"""
+
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+warnings.filterwarnings('ignore')
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from numpy_cnn import NumpyEmotionModel
+
+MODEL_PATH = os.path.join('models', 'emotion_model.h5')
+TOLERANCE = 1e-5
+BATCH_SIZES = [1, 4, 8, 16]
+ITERATIONS = 20
+
+
+def mean_ms(fn, batch):
+    fn(batch)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(batch)
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    print("=" * 70)
+    print("NUMPY EMOTION ENGINE BENCHMARK")
+    print("=" * 70)
+
+    start = time.perf_counter()
+    numpy_model = NumpyEmotionModel(MODEL_PATH)
+    numpy_load = time.perf_counter() - start
+
+    start = time.perf_counter()
+    import tensorflow as tf
+    from tensorflow import keras
+    keras_model = keras.models.load_model(MODEL_PATH, compile=False)
+    keras_load = time.perf_counter() - start
+
+    input_shape = (None,) + tuple(keras_model.input_shape[1:])
+
+    @tf.function(input_signature=[tf.TensorSpec(input_shape, tf.float32)])
+    def keras_infer(batch):
+        return keras_model(batch, training=False)
+
+    print(f"\nLoad time: numpy {numpy_load*1000:.0f} ms (h5py only), "
+          f"keras {keras_load*1000:.0f} ms (including TensorFlow import)")
+
+    rng = np.random.default_rng(0)
+    print(f"\n{'Batch':>6} | {'Keras ms':>9} | {'NumPy ms':>9} | {'Max abs diff':>12} | {'Top-1 agree':>11} | Within {TOLERANCE:g}")
+    print("-" * 76)
+
+    all_ok = True
+    for batch_size in BATCH_SIZES:
+        batch = rng.random((batch_size,) + input_shape[1:], dtype=np.float32)
+
+        reference = keras_infer(batch).numpy()
+        result = numpy_model.predict(batch)
+        max_diff = float(np.abs(result - reference).max())
+        agreement = np.mean(np.argmax(result, axis=1) == np.argmax(reference, axis=1)) * 100
+        ok = max_diff <= TOLERANCE
+        all_ok = all_ok and ok
+
+        keras_ms = mean_ms(lambda b: keras_infer(b).numpy(), batch)
+        numpy_ms = mean_ms(numpy_model.predict, batch)
+        print(f"{batch_size:>6} | {keras_ms:>9.2f} | {numpy_ms:>9.2f} | {max_diff:>12.2e} | "
+              f"{agreement:>10.1f}% | {'✅' if ok else '❌'}")
+
+    print("=" * 70)
+    return 0 if all_ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
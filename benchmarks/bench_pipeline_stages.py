@@ -0,0 +1,318 @@
+#!/usr/bin/env python
+"""
+Per-stage pipeline latency benchmark
+Replays synthetic frames with 0, 1, 4 and 8 faces (or a recording)
+through the real AdvancedFaceDetector detection, _apply_tracking and
+draw_faces, and AdvancedEmotionDetector._preprocess_face and inference.
+Reports p50/p95/p99 per stage and overall FPS, writes the results to
+JSON and can compare them against a baseline recorded on this machine
+
+Run from the repository root:
+    python benchmarks/bench_pipeline_stages.py
+    python benchmarks/bench_pipeline_stages.py --video recording.mp4
+    python benchmarks/bench_pipeline_stages.py --output results.json
+    python benchmarks/bench_pipeline_stages.py --save-baseline baseline.json
+    python benchmarks/bench_pipeline_stages.py --compare baseline.json    # exit code 1 on regression
+
+Baselines are machine specific, so none is committed: record one with
+--save-baseline on the machine that runs --compare, with a working face
+detector backend (a baseline without the detect, track and draw stages
+cannot catch their regressions, so the benchmark refuses to write one).
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import cv2
+import numpy as np
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from emotion_detector import AdvancedEmotionDetector
+from face_detector_advanced import AdvancedFaceDetector
+from frame_sources import SyntheticFaceSource, VideoFileSource
+
+FACE_COUNTS = [0, 1, 4, 8]
+STAGES = ('detect', 'track', 'preprocess', 'infer', 'draw')
+PERCENTILES = (50, 95, 99)
+
+
+def synthetic_frames(count, num_frames, seed=0):
+    """(frame, ground-truth face dicts) pairs with count drawn faces"""
+    source = SyntheticFaceSource(count, num_frames=num_frames, pace='fast', seed=seed)
+    source.open()
+    frames = []
+    while True:
+        grabbed = source.read()
+        if grabbed is None:
+            break
+        faces = [{'bbox': box, 'confidence': 0.9, 'keypoints': None, 'method': 'opencv', 'quality': 0.8}
+                 for box in source.boxes]
+        frames.append((grabbed[0], faces))
+    return frames
+
+
+def video_frames(path, num_frames):
+    """(frame, None) pairs from a recording; faces come from the detector"""
+    source = VideoFileSource(path, pace='fast')
+    if not source.open():
+        raise SystemExit(f"❌ Cannot open video {path}")
+    frames = []
+    while len(frames) < num_frames:
+        grabbed = source.read()
+        if grabbed is None:
+            break
+        frames.append((grabbed[0], None))
+    source.release()
+    return frames
+
+
+def summarize(samples_ms):
+    """Percentiles and mean of a list of milliseconds"""
+    samples = np.asarray(samples_ms, dtype=np.float64)
+    summary = {f'p{p}': round(float(np.percentile(samples, p)), 3) for p in PERCENTILES}
+    summary['mean'] = round(float(samples.mean()), 3)
+    return summary
+
+
+def run_case(frames, face_detector, emotion_detector, warmup):
+    """Time every stage on every frame; returns the result dict for one case"""
+    timings = {stage: [] for stage in STAGES}
+    totals = []
+    detected = []
+    truth = None
+    track_ms = 0.0
+
+    if face_detector is not None:
+        apply_tracking = face_detector._apply_tracking
+
+        def timed_tracking(faces):
+            # Synthetic frames track the ground-truth faces, so tracking and
+            # drawing see the intended face count even when detection misses
+            nonlocal track_ms
+            detected.append(len(faces))
+            start = time.perf_counter()
+            tracked = apply_tracking([dict(f) for f in truth] if truth is not None else faces)
+            track_ms = (time.perf_counter() - start) * 1000
+            return tracked
+
+        face_detector._apply_tracking = timed_tracking
+
+    try:
+        for i, (frame, truth) in enumerate(frames):
+            frame = frame.copy()
+            frame_start = time.perf_counter()
+            sample = {}
+
+            if face_detector is not None:
+                track_ms = 0.0
+                start = time.perf_counter()
+                faces = face_detector.detect_faces(frame)
+                sample['detect'] = (time.perf_counter() - start) * 1000 - track_ms
+                sample['track'] = track_ms
+                # detect_faces returns early without tracking on a detector error
+                if truth and not faces:
+                    start = time.perf_counter()
+                    faces = timed_tracking([])
+                    sample['track'] = (time.perf_counter() - start) * 1000
+            else:
+                faces = [dict(f, track_id=n) for n, f in enumerate(truth or [])]
+
+            start = time.perf_counter()
+            processed = []
+            for face in faces:
+                x, y, w, h = face['bbox']
+                crop = frame[max(0, y):y+h, max(0, x):x+w]
+                if crop.size:
+                    face_input = emotion_detector._preprocess_face(crop)
+                    if face_input is not None:
+                        processed.append(face_input)
+            sample['preprocess'] = (time.perf_counter() - start) * 1000
+
+            start = time.perf_counter()
+            if processed:
+                emotion_detector._run_model(np.stack(processed)[..., np.newaxis])
+            sample['infer'] = (time.perf_counter() - start) * 1000
+
+            if face_detector is not None:
+                start = time.perf_counter()
+                face_detector.draw_faces(frame, faces)
+                sample['draw'] = (time.perf_counter() - start) * 1000
+
+            total = (time.perf_counter() - frame_start) * 1000
+            if i >= warmup:
+                for stage, ms in sample.items():
+                    timings[stage].append(ms)
+                totals.append(total)
+    finally:
+        if face_detector is not None:
+            face_detector._apply_tracking = apply_tracking
+
+    total = summarize(totals)
+    return {
+        'frames': len(totals),
+        'fps': round(1000.0 / total['mean'], 2) if total['mean'] else None,
+        'detected_faces': round(float(np.mean(detected)), 2) if detected else None,
+        'total': total,
+        'stages': {stage: summarize(samples) for stage, samples in timings.items() if samples},
+    }
+
+
+def compare(results, baseline, tolerance, min_ms):
+    """Print current vs baseline p95 per stage; return the regressions found"""
+    regressions = []
+    print(f"\n{'Case':>6} | {'Stage':>10} | {'Base p95':>9} | {'Now p95':>9} | {'Change':>8} |")
+    print("-" * 56)
+    for case, current in results['results'].items():
+        base = baseline['results'].get(case)
+        if base is None:
+            print(f"{case:>6} | {'(not in baseline)':>10}")
+            continue
+        rows = [(stage, base['stages'][stage]['p95'], summary['p95'])
+                for stage, summary in current['stages'].items() if stage in base['stages']]
+        rows.append(('total', base['total']['p95'], current['total']['p95']))
+        for stage, before, now in rows:
+            change = (now - before) / before if before else 0.0
+            regressed = now > before * (1 + tolerance) and now - before > min_ms
+            flag = '❌ REGRESSION' if regressed else ''
+            print(f"{case:>6} | {stage:>10} | {before:>9.2f} | {now:>9.2f} | {change*100:>+7.1f}% | {flag}")
+            if regressed:
+                regressions.append((case, stage, before, now))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage pipeline latency benchmark")
+    parser.add_argument('--video', default=None, help="Recorded footage (default: synthetic 0/1/4/8-face frames)")
+    parser.add_argument('--frames', type=int, default=120, help="Frames per case")
+    parser.add_argument('--warmup', type=int, default=10, help="Frames per case excluded from the statistics")
+    parser.add_argument('--backend', default='auto', help="Emotion backend")
+    parser.add_argument('--output', default=None, help="Write results to this JSON file")
+    parser.add_argument('--compare', default=None, metavar='BASELINE',
+                        help="Compare against a baseline JSON recorded with --save-baseline")
+    parser.add_argument('--save-baseline', default=None, metavar='BASELINE',
+                        help="Write results as a baseline JSON (needs a working face detector)")
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help="Allowed p95 slowdown before a stage counts as regressed (0.25 = 25%%)")
+    parser.add_argument('--min-ms', type=float, default=0.5,
+                        help="Ignore p95 slowdowns smaller than this many milliseconds")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("PIPELINE STAGE LATENCY BENCHMARK")
+    print("=" * 70)
+
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    try:
+        emotion_detector = AdvancedEmotionDetector(backend=args.backend)
+        try:
+            face_detector = AdvancedFaceDetector()
+            detector_error = None
+        except Exception as e:
+            face_detector, detector_error = None, e
+    finally:
+        sys.stdout = stdout
+
+    try:
+        return run_benchmark(args, emotion_detector, face_detector, detector_error)
+    finally:
+        if face_detector is not None:
+            face_detector.close()
+
+
+def run_benchmark(args, emotion_detector, face_detector, detector_error):
+    """Time every case, print the table, write and compare the results"""
+    if not emotion_detector.model_loaded:
+        print("❌ Emotion model not available")
+        return 1
+    if face_detector is None:
+        if args.save_baseline:
+            print(f"❌ Face detector unavailable ({detector_error}); not writing a baseline without the "
+                  f"detect, track and draw stages")
+            return 1
+        print(f"⚠️  Face detector unavailable ({detector_error}); timing emotion stages on ground-truth faces only")
+        if args.video:
+            print("❌ A recording needs the face detector")
+            return 1
+    detector_method = 'none' if face_detector is None else face_detector.backend
+
+    if args.video:
+        cases = {'video': video_frames(args.video, args.frames + args.warmup)}
+    else:
+        cases = {str(n): synthetic_frames(n, args.frames + args.warmup) for n in FACE_COUNTS}
+
+    results = {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'source': args.video or 'synthetic',
+            'frames': args.frames,
+            'emotion_backend': emotion_detector.backend,
+            'face_detector': detector_method,
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'processor': platform.processor() or platform.machine(),
+        },
+        'results': {},
+    }
+
+    stdout = sys.stdout
+    devnull = open(os.devnull, 'w')
+    for case, frames in cases.items():
+        sys.stdout = devnull
+        try:
+            results['results'][case] = run_case(frames, face_detector, emotion_detector, args.warmup)
+        finally:
+            sys.stdout = stdout
+    devnull.close()
+
+    print(f"✓ {args.frames} frames per case | backend {emotion_detector.backend} | detector {detector_method}")
+    print(f"\n{'Case':>6} | {'Stage':>10} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+    print("-" * 52)
+    for case, result in results['results'].items():
+        for stage, summary in list(result['stages'].items()) + [('total', result['total'])]:
+            print(f"{case:>6} | {stage:>10} | {summary['p50']:>8.2f} | {summary['p95']:>8.2f} | {summary['p99']:>8.2f}")
+        detected = '' if result['detected_faces'] is None else f" | detected {result['detected_faces']:.1f} faces/frame"
+        print(f"{case:>6} | {'FPS':>10} | {result['fps']:>8.1f}{detected}")
+        print("-" * 52)
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"✓ Results written to {path}")
+
+    status = 0
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f"\n❌ No baseline at {args.compare}; record one with --save-baseline {args.compare}")
+            print("=" * 70)
+            return 1
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('face_detector', 'none') == 'none':
+            print(f"\n❌ {args.compare} was recorded without a face detector; record it again with --save-baseline {args.compare}")
+            print("=" * 70)
+            return 1
+        regressions = compare(results, baseline, args.tolerance, args.min_ms)
+        if regressions:
+            print(f"\n❌ {len(regressions)} stage(s) regressed beyond {args.tolerance*100:.0f}% of {args.compare}")
+            status = 1
+        else:
+            print(f"\n✅ No regressions against {args.compare}")
+
+    print("=" * 70)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
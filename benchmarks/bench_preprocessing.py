@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+"""
+Face preprocessing benchmark
+Compares the original allocate-per-step preprocessing with the buffered
+FacePreprocessor: bytes allocated per face (tracemalloc peak, which sees
+NumPy and OpenCV output arrays), latency per face, and the maximum
+difference between the two outputs
+
+Run from the repository root:
+    python benchmarks/bench_preprocessing.py
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from face_preprocessing import FacePreprocessor, PreprocessingPlan
+
+FACE_COUNTS = [1, 4, 8]
+CROP_SIZE = (160, 140)
+ITERATIONS = 200
+
+
+def legacy_preprocess(face_image):
+    """The per-face pipeline FacePreprocessor replaces"""
+    gray = cv2.cvtColor(face_image, cv2.COLOR_BGR2GRAY)
+    face_resized = cv2.resize(gray, (64, 64))
+    face_resized = cv2.equalizeHist(face_resized)
+    face_resized = cv2.GaussianBlur(face_resized, (3, 3), 0)
+    face_normalized = face_resized.astype('float32') / 255.0
+    mean = np.mean(face_normalized)
+    std = np.std(face_normalized)
+    if std > 0:
+        face_normalized = (face_normalized - mean) / std
+        face_normalized = np.clip(face_normalized, -3, 3)
+        face_normalized = (face_normalized + 3) / 6
+    return face_normalized
+
+
+def legacy_batch(faces):
+    return np.stack([legacy_preprocess(face) for face in faces])[..., np.newaxis].astype(np.float32, copy=False)
+
+
+def allocated_bytes(fn, faces):
+    """(peak bytes, bytes still held) traced during one steady-state call"""
+    fn(faces)
+    tracemalloc.start()
+    result = fn(faces)
+    held, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return peak, held
+
+
+def latency_ms(fn, faces):
+    fn(faces)
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(faces)
+    return (time.perf_counter() - start) / ITERATIONS * 1000
+
+
+def main():
+    print("=" * 70)
+    print("FACE PREPROCESSING BENCHMARK")
+    print("=" * 70)
+
+    rng = np.random.default_rng(0)
+    preprocessor = FacePreprocessor(PreprocessingPlan(64, 64))
+    preprocessor_uint8 = FacePreprocessor(PreprocessingPlan(64, 64, normalization='graph'))
+
+    def buffered(faces):
+        return preprocessor.preprocess_batch(faces)[0]
+
+    def buffered_uint8(faces):
+        return preprocessor_uint8.preprocess_batch(faces)[0]
+
+    print(f"\n{'Faces':>5} | {'Pipeline':>9} | {'Peak KB/face':>12} | {'Held KB':>8} | {'ms/face':>8} | {'Max diff':>9}")
+    print("-" * 70)
+
+    for count in FACE_COUNTS:
+        faces = [rng.integers(0, 256, CROP_SIZE + (3,), dtype=np.uint8) for _ in range(count)]
+        reference = legacy_batch(faces)
+
+        for name, fn in (('legacy', legacy_batch), ('buffered', buffered), ('uint8', buffered_uint8)):
+            peak, held = allocated_bytes(fn, faces)
+            ms = latency_ms(fn, faces)
+            if name == 'uint8':
+                diff = '-'
+            else:
+                diff = f"{np.abs(fn(faces) - reference).max():.1e}"
+            print(f"{count:>5} | {name:>9} | {peak/1024/count:>12.1f} | {held/1024:>8.1f} | {ms/count:>8.3f} | {diff:>9}")
+
+    print("=" * 70)
+    print("uint8 leaves normalization to the model graph: AdvancedEmotionDetector(uint8_input=True)")
+
+
+if __name__ == "__main__":
+    main()
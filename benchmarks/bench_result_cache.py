@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Emotion result cache benchmark
+Runs the emotion detector over recorded footage twice, with and without
+the per-track result cache, and reports how many forward passes the
+cache saved, its hit rate, time per frame and how often the two runs
+agreed on the emotion label
+
+Run from the repository root:
+    python benchmarks/bench_result_cache.py --video recording.mp4
+    python benchmarks/bench_result_cache.py          # synthetic seated-person clip
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from emotion_detector import AdvancedEmotionDetector
+from face_detector_advanced import AdvancedFaceDetector
+
+
+def video_crops(path, max_frames):
+    """Per-frame (crops, track_ids) from a recording, using the live face detector"""
+    face_detector = AdvancedFaceDetector()
+    cap = cv2.VideoCapture(path)
+    frames = []
+    try:
+        while len(frames) < max_frames:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            crops, track_ids = [], []
+            for face in face_detector.detect_faces(frame):
+                x, y, w, h = face['bbox']
+                crop = frame[max(0, y):y+h, max(0, x):x+w]
+                if crop.size > 0:
+                    crops.append(crop)
+                    track_ids.append(face['track_id'])
+            frames.append((crops, track_ids))
+    finally:
+        cap.release()
+        face_detector.close()
+    return frames
+
+
+def synthetic_crops(max_frames, seed=0):
+    """Two seated people: sensor noise every frame, a small shift now and then,
+    and a new pose/expression every 90 frames"""
+    rng = np.random.default_rng(seed)
+    bases = [rng.integers(0, 256, (140, 120, 3), dtype=np.uint8) for _ in range(2)]
+    bases = [cv2.GaussianBlur(b, (15, 15), 0) for b in bases]
+
+    frames = []
+    for i in range(max_frames):
+        if i % 90 == 0 and i:
+            bases = [cv2.GaussianBlur(rng.integers(0, 256, (140, 120, 3), dtype=np.uint8), (15, 15), 0)
+                     for _ in bases]
+        crops = []
+        for base in bases:
+            shift = 2 if i % 30 == 15 else 0
+            crop = np.roll(base, shift, axis=1).astype(np.int16)
+            crop += rng.integers(-3, 4, crop.shape, dtype=np.int16)
+            crops.append(np.clip(crop, 0, 255).astype(np.uint8))
+        frames.append((crops, [0, 1]))
+    return frames
+
+
+def run(detector, frames):
+    """(labels per frame, forward passes, seconds)"""
+    passes = 0
+    run_model = detector._run_model
+
+    def counting_run_model(batch):
+        nonlocal passes
+        passes += len(batch)
+        return run_model(batch)
+
+    detector._run_model = counting_run_model
+    labels = []
+    start = time.perf_counter()
+    for crops, track_ids in frames:
+        labels.append([emotion for emotion, _ in detector.predict_emotions(crops, track_ids)])
+    elapsed = time.perf_counter() - start
+    detector._run_model = run_model
+    return labels, passes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure inference saved by the emotion result cache")
+    parser.add_argument('--video', default=None, help="Recorded footage (default: synthetic clip)")
+    parser.add_argument('--frames', type=int, default=300, help="Maximum frames to process")
+    parser.add_argument('--backend', default='auto', help="Emotion backend")
+    parser.add_argument('--threshold', type=float, default=6.0, help="Cache signature threshold")
+    parser.add_argument('--max-age', type=int, default=15, help="Cache max age in frames")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("EMOTION RESULT CACHE BENCHMARK")
+    print("=" * 70)
+
+    frames = video_crops(args.video, args.frames) if args.video else synthetic_crops(args.frames)
+    faces = sum(len(crops) for crops, _ in frames)
+    print(f"✓ {len(frames)} frames, {faces} face crops ({args.video or 'synthetic'})")
+
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, 'w')
+    uncached = AdvancedEmotionDetector(backend=args.backend, result_cache=False)
+    cached = AdvancedEmotionDetector(backend=args.backend, cache_threshold=args.threshold,
+                                     cache_max_age=args.max_age)
+    sys.stdout = stdout
+
+    base_labels, base_passes, base_time = run(uncached, frames)
+    cache_labels, cache_passes, cache_time = run(cached, frames)
+
+    agree = sum(a == b for fa, fb in zip(base_labels, cache_labels) for a, b in zip(fa, fb))
+    stats = cached.result_cache.stats()
+
+    print(f"\n{'Run':>10} | {'Forward passes':>14} | {'ms/frame':>8}")
+    print("-" * 40)
+    print(f"{'no cache':>10} | {base_passes:>14} | {base_time / len(frames) * 1000:>8.2f}")
+    print(f"{'cache':>10} | {cache_passes:>14} | {cache_time / len(frames) * 1000:>8.2f}")
+    print(f"\nInference saved: {(1 - cache_passes / max(base_passes, 1)) * 100:.1f}%")
+    print(f"Hit rate: {stats['hit_rate'] * 100:.1f}% ({stats['hits']} hits, {stats['misses']} misses, "
+          f"{stats['evictions']} evictions)")
+    print(f"Label agreement with uncached run: {agree / max(faces, 1) * 100:.1f}%")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+Emotion detector startup benchmark
+Measures cold-start time and peak RSS of a fresh process that imports
+emotion_detector, builds AdvancedEmotionDetector and runs one prediction,
+once per backend, and reports whether TensorFlow was imported
+
+Run from the repository root after exporting the ONNX model:
+    python convert_emotion_model.py --format onnx
+    python benchmarks/bench_startup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+BACKENDS = ['keras', 'onnx', 'tflite', 'numpy']
+
+# Executed in a fresh interpreter for each backend
+CHILD_SCRIPT = r'''
+import json, os, resource, sys, time
+start = time.perf_counter()
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+sys.path.insert(0, 'src')
+import numpy as np
+from emotion_detector import AdvancedEmotionDetector
+import_done = time.perf_counter()
+stdout = sys.stdout
+sys.stdout = open(os.devnull, 'w')
+detector = AdvancedEmotionDetector(backend=sys.argv[1])
+ready = time.perf_counter()
+detector.predict_emotion(np.zeros((120, 120, 3), dtype=np.uint8))
+first = time.perf_counter()
+sys.stdout = stdout
+print(json.dumps({
+    'loaded': detector.model_loaded,
+    'import_s': import_done - start,
+    'init_s': ready - import_done,
+    'first_prediction_s': first - ready,
+    'total_s': first - start,
+    'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'tensorflow_imported': 'tensorflow' in sys.modules,
+}))
+'''
+
+
+def main():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+    print("=" * 70)
+    print("EMOTION DETECTOR STARTUP BENCHMARK")
+    print("=" * 70)
+    print(f"\n{'Backend':>8} | {'Import s':>8} | {'Init s':>7} | {'1st pred s':>10} | {'Total s':>7} | {'Peak RSS MB':>11} | TF")
+    print("-" * 73)
+
+    for backend in BACKENDS:
+        result = subprocess.run([sys.executable, '-c', CHILD_SCRIPT, backend],
+                                cwd=root, capture_output=True, text=True)
+        lines = result.stdout.strip().splitlines()
+        if result.returncode != 0 or not lines:
+            print(f"{backend:>8} | failed: {result.stderr.strip().splitlines()[-1:]}")
+            continue
+
+        stats = json.loads(lines[-1])
+        if not stats['loaded']:
+            print(f"{backend:>8} | model not available")
+            continue
+
+        print(f"{backend:>8} | {stats['import_s']:>8.2f} | {stats['init_s']:>7.2f} | "
+              f"{stats['first_prediction_s']:>10.3f} | {stats['total_s']:>7.2f} | "
+              f"{stats['peak_rss_mb']:>11.1f} | {'yes' if stats['tensorflow_imported'] else 'no'}")
+
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+"""
+Emotion Model Converter
+Converts models/emotion_model.h5 into float16 and int8 TFLite models, or
+exports it to ONNX for TensorFlow-free inference, and reports size,
+latency and top-1 agreement against the Keras model
+
+Usage:
+    python convert_emotion_model.py --calibration-dir face_crops/
+    python convert_emotion_model.py --format onnx
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+import warnings
+
+import cv2
+import numpy as np
+
+# Suppress TensorFlow warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+warnings.filterwarnings('ignore')
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from emotion_detector import AdvancedEmotionDetector
+from emotion_backends import TFLiteEmotionModel, ONNXEmotionModel
+
+IMAGE_EXTENSIONS = ('*.png', '*.jpg', '*.jpeg', '*.bmp')
+
+
+def load_face_crops(directory, detector, limit=None):
+    """Load saved face crops and preprocess them like the live pipeline"""
+    paths = []
+    for pattern in IMAGE_EXTENSIONS:
+        paths.extend(glob.glob(os.path.join(directory, pattern)))
+    paths = sorted(paths)[:limit]
+
+    faces = []
+    for path in paths:
+        image = cv2.imread(path)
+        if image is None:
+            continue
+        processed = detector._preprocess_face(image)
+        if processed is not None:
+            faces.append(processed)
+
+    if not faces:
+        return None
+    return np.stack(faces)[..., np.newaxis].astype(np.float32)
+
+
+def convert(model, output_path, quantization, calibration=None):
+    """Convert a Keras model to TFLite and write it to output_path"""
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    elif quantization == 'int8':
+        def representative_dataset():
+            for face in calibration:
+                yield [face[np.newaxis]]
+
+        # Full integer quantization, including input and output tensors
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
+
+    tflite_model = converter.convert()
+    with open(output_path, 'wb') as f:
+        f.write(tflite_model)
+    return output_path
+
+
+def export_onnx(model, output_path, opset=13):
+    """Export a Keras model to ONNX, keeping the (N, H, W, 1) input layout"""
+    import tensorflow as tf
+    import tf2onnx
+
+    input_shape = (None,) + tuple(model.input_shape[1:])
+    input_signature = [tf.TensorSpec(input_shape, tf.float32, name='input')]
+
+    @tf.function(input_signature=input_signature)
+    def infer(batch):
+        return model(batch, training=False)
+
+    tf2onnx.convert.from_function(infer, input_signature=input_signature,
+                                  opset=opset, output_path=output_path)
+    return output_path
+
+
+def mean_latency_ms(predict, faces, iterations):
+    """Mean single-face latency in milliseconds"""
+    sample = faces[:1]
+    predict(sample)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        predict(sample)
+    return (time.perf_counter() - start) / iterations * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert the emotion model to TFLite or ONNX")
+    parser.add_argument('--format', choices=['tflite', 'onnx'], default='tflite',
+                        help="tflite writes float16 + int8 models, onnx writes one float32 model")
+    parser.add_argument('--model', default=os.path.join('models', 'emotion_model.h5'),
+                        help="Keras model to convert")
+    parser.add_argument('--calibration-dir', default=None,
+                        help="Directory of saved face crops used for int8 calibration (required for tflite)")
+    parser.add_argument('--eval-dir', default=None,
+                        help="Directory of face crops for the agreement check (default: calibration dir)")
+    parser.add_argument('--calibration-samples', type=int, default=200,
+                        help="Maximum number of calibration crops")
+    parser.add_argument('--output-dir', default='models', help="Where to write the converted files")
+    parser.add_argument('--threads', type=int, default=None, help="Inference threads for the report")
+    parser.add_argument('--iterations', type=int, default=100, help="Latency iterations per model")
+    args = parser.parse_args()
+
+    if args.format == 'tflite' and not args.calibration_dir:
+        parser.error("--calibration-dir is required for int8 TFLite conversion")
+
+    print("=" * 70)
+    print(f"EMOTION MODEL CONVERSION ({args.format.upper()})")
+    print("=" * 70)
+
+    detector = AdvancedEmotionDetector(backend='keras', model_path=args.model)
+    if not detector.model_loaded:
+        print(f"❌ Could not load {args.model}")
+        return 1
+
+    calibration = None
+    if args.calibration_dir:
+        calibration = load_face_crops(args.calibration_dir, detector, args.calibration_samples)
+        if calibration is None:
+            print(f"❌ No usable face crops found in {args.calibration_dir}")
+            return 1
+
+    evaluation = calibration
+    if args.eval_dir:
+        evaluation = load_face_crops(args.eval_dir, detector)
+        if evaluation is None:
+            print(f"❌ No usable face crops found in {args.eval_dir}")
+            return 1
+    if evaluation is None:
+        # No saved crops: compare on random inputs, agreement is still meaningful as a sanity check
+        input_shape = tuple(detector.model.input_shape[1:])
+        evaluation = np.random.default_rng(0).random((64,) + input_shape, dtype=np.float32)
+        print("⚠️  No face crops given - comparing on random inputs")
+    print(f"✓ {len(evaluation)} evaluation inputs")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    base_name = os.path.splitext(os.path.basename(args.model))[0]
+
+    outputs = {}
+    if args.format == 'tflite':
+        for quantization in ('float16', 'int8'):
+            output_path = os.path.join(args.output_dir, f"{base_name}_{quantization}.tflite")
+            print(f"🔄 Converting to {quantization}...")
+            outputs[quantization] = convert(detector.model, output_path, quantization, calibration)
+            print(f"✅ Wrote {output_path}")
+    else:
+        output_path = os.path.join(args.output_dir, f"{base_name}.onnx")
+        print("🔄 Exporting to ONNX...")
+        outputs['onnx'] = export_onnx(detector.model, output_path)
+        print(f"✅ Wrote {output_path}")
+
+    # Reference predictions from the Keras model
+    reference = detector._run_model(evaluation)
+    reference_top1 = np.argmax(reference, axis=1)
+
+    print(f"\n{'Model':>16} | {'Size KB':>8} | {'Latency ms':>10} | {'Top-1 agreement':>15} | {'Max abs diff':>12}")
+    print("-" * 75)
+    keras_latency = mean_latency_ms(detector._run_model, evaluation, args.iterations)
+    print(f"{'keras':>16} | {os.path.getsize(args.model)/1024:>8.1f} | {keras_latency:>10.2f} | {'100.0%':>15} | {0.0:>12.2e}")
+
+    for name, path in outputs.items():
+        if args.format == 'tflite':
+            models = {name: TFLiteEmotionModel(path, num_threads=args.threads)}
+        else:
+            models = {}
+            for engine in ('onnxruntime', 'opencv'):
+                try:
+                    models[f"onnx/{engine}"] = ONNXEmotionModel(path, num_threads=args.threads, engine=engine)
+                except ImportError:
+                    print(f"{'onnx/' + engine:>16} | not installed")
+
+        for label, model in models.items():
+            predictions = np.concatenate([model.predict(face[np.newaxis]) for face in evaluation])
+            agreement = np.mean(np.argmax(predictions, axis=1) == reference_top1) * 100
+            max_diff = np.abs(predictions - reference).max()
+            latency = mean_latency_ms(model.predict, evaluation, args.iterations)
+            print(f"{label:>16} | {os.path.getsize(path)/1024:>8.1f} | {latency:>10.2f} | "
+                  f"{agreement:>14.1f}% | {max_diff:>12.2e}")
+
+    print("=" * 70)
+    if args.format == 'tflite':
+        print("Use with: AdvancedEmotionDetector(backend='tflite', model_path=..., num_threads=N)")
+    else:
+        print("Use with: AdvancedEmotionDetector(backend='onnx') - picked automatically when the file exists")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+Face Detector Model Provisioning
+Downloads the model files for the YuNet and res10 SSD face detector
+backends into models/. Run this once at install time - the detector itself
+never downloads anything at startup.
+
+Usage:
+    python provision_face_detectors.py             # both backends
+    python provision_face_detectors.py --backend yunet
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from face_detector_advanced import FACE_MODEL_PATHS
+
+# Download URL and expected 'algorithm:hex' digest of every model file, by
+# backend. The digests are the upstream ones: the Git LFS object id of the
+# YuNet model in opencv_zoo and the SHA-1 OpenCV lists for the SSD weights
+# in samples/dnn/face_detector/weights.meta4. The SSD graph text ships in
+# the OpenCV source tree without a published digest, so it is taken from a
+# release tag and checked by loading the backend. The SSD is fetched as the
+# TensorFlow graph, which loads on OpenCV 4 and 5 (OpenCV 5 dropped Caffe)
+MODEL_URLS = {
+    'yunet': {
+        FACE_MODEL_PATHS['yunet']: (
+            "https://github.com/opencv/opencv_zoo/raw/main/models/face_detection_yunet/face_detection_yunet_2023mar.onnx",
+            "sha256:8f2383e4dd3cfbb4553ea8718107fc0423210dc964f9f4280604804ed2552fa4"),
+    },
+    'ssd': {
+        FACE_MODEL_PATHS['ssd'][0][0]: (
+            "https://github.com/opencv/opencv_3rdparty/raw/dnn_samples_face_detector_20180220_uint8/opencv_face_detector_uint8.pb",
+            "sha1:4f2fdf6f231d759d7bbdb94353c5a68690f3d2ae"),
+        FACE_MODEL_PATHS['ssd'][0][1]: (
+            "https://raw.githubusercontent.com/opencv/opencv/4.8.0/samples/dnn/face_detector/opencv_face_detector.pbtxt",
+            None),
+    },
+}
+
+
+def file_digest(path, algorithm):
+    """Hex digest of the file at path"""
+    digest = hashlib.new(algorithm)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify(path, expected):
+    """True if the file at path matches the expected 'algorithm:hex' digest
+    (always True for files without a pinned digest)"""
+    if expected is None:
+        return True
+    algorithm, hexdigest = expected.split(':', 1)
+    return file_digest(path, algorithm) == hexdigest
+
+
+def download(url, output_path, expected=None):
+    """Download url to output_path and check it against the expected digest;
+    returns True on success. A file that does not match is deleted"""
+    import requests
+
+    try:
+        response = requests.get(url, stream=True, timeout=30)
+        if response.status_code != 200:
+            print(f"❌ {url}: HTTP {response.status_code}")
+            return False
+
+        os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+        with open(output_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=8192):
+                f.write(chunk)
+
+        if not verify(output_path, expected):
+            print(f"❌ {output_path}: digest does not match {expected}; file deleted")
+            os.remove(output_path)
+            return False
+        print(f"✓ {output_path} ({os.path.getsize(output_path) / 1024:.0f} KB, "
+              f"sha256 {file_digest(output_path, 'sha256')[:16]}...)")
+        return True
+
+    except Exception as e:
+        print(f"❌ {url}: {e}")
+        if os.path.exists(output_path):
+            os.remove(output_path)
+        return False
+
+
+def check_backend(backend):
+    """Load the backend once to make sure the files work with this OpenCV"""
+    from face_detector_advanced import AdvancedFaceDetector
+
+    try:
+        detector = AdvancedFaceDetector(backend=backend, detection_interval=1)
+    except Exception as e:
+        print(f"{backend.upper()} initialization failed: {e}")
+        return False
+    detector.close()
+    return detector.backend == backend
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download the YuNet and res10 SSD face detector models")
+    parser.add_argument('--backend', choices=sorted(MODEL_URLS), action='append',
+                        help="Backend to provision (repeatable; default: all)")
+    parser.add_argument('--force', action='store_true', help="Download even if the files exist")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Face Detector Model Provisioning")
+    print("=" * 60)
+
+    status = 0
+    for backend in args.backend or sorted(MODEL_URLS):
+        print(f"\n{backend}:")
+        for path, (url, expected) in MODEL_URLS[backend].items():
+            if os.path.exists(path) and not args.force:
+                if verify(path, expected):
+                    print(f"✓ {path} already present")
+                    continue
+                print(f"⚠️  {path} does not match {expected}; downloading again")
+            if not download(url, path, expected):
+                status = 1
+        if status == 0 and not check_backend(backend):
+            print(f"❌ {backend} model files did not load")
+            status = 1
+
+    print("\n" + ("✅ Face detector models ready" if status == 0 else "⚠️  Some models are missing"))
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+#!/usr/bin/env python
+"""
+Emotion Model Provisioning
+Downloads the pre-trained emotion model, or builds a fallback model when no
+download is possible. Run this once at install time - the detector itself
+never downloads or trains at startup.
+
+Writes a versioned artifact plus a JSON manifest (source, version, sha256,
+input shape) next to it.
+
+Usage:
+    python provision_model.py                  # download, else build the CNN fallback
+    python provision_model.py --source cnn     # build the CNN fallback only
+"""
+
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import sys
+import warnings
+
+import numpy as np
+
+# Suppress TensorFlow warnings
+os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+warnings.filterwarnings('ignore')
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from emotion_detector import DEFAULT_MODEL_PATHS, FALLBACK_MODEL_PATH, FALLBACK_MODEL_VERSION
+
+# Sources for pre-trained emotion models, tried in order
+MODEL_URLS = [
+    "https://github.com/oarriaga/face_classification/raw/master/trained_models/emotion_models/fer2013_mini_XCEPTION.102-0.66.hdf5",
+    "https://github.com/petercunha/Emotion/raw/master/models/emotion_model.hdf5"
+]
+
+
+def download_pretrained_model(output_path):
+    """Download a pre-trained emotion model, returns the loaded model or None"""
+    import requests
+    from tensorflow import keras
+
+    for i, model_url in enumerate(MODEL_URLS):
+        try:
+            print(f"Trying to download emotion model from source {i+1}...")
+            response = requests.get(model_url, stream=True, timeout=30)
+
+            if response.status_code != 200:
+                print(f"Failed to download from source {i+1}: HTTP {response.status_code}")
+                continue
+
+            os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+            with open(output_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
+
+            # Make sure the download is a loadable model
+            try:
+                model = keras.models.load_model(output_path, compile=False)
+                print(f"Successfully downloaded pre-trained emotion model from source {i+1}!")
+                return model
+            except Exception as load_error:
+                print(f"Downloaded model from source {i+1} but failed to load: {load_error}")
+                os.remove(output_path)
+
+        except Exception as e:
+            print(f"Error with source {i+1}: {e}")
+
+    print("All download sources failed")
+    return None
+
+
+def create_emotion_model():
+    """Create a CNN model for emotion detection"""
+    from tensorflow import keras
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Conv2D, MaxPooling2D, Dense, Dropout, Flatten
+
+    # Create a more sophisticated model based on mini-XCEPTION architecture
+    # ('same' padding: four blocks of valid 3x3 convs shrink 48x48 below zero)
+    model = Sequential([
+        # First block
+        Conv2D(8, (3, 3), activation='relu', input_shape=(48, 48, 1), kernel_initializer='he_normal', padding='same'),
+        Conv2D(8, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same'),
+        MaxPooling2D(2, 2),
+        Dropout(0.25),
+
+        # Second block
+        Conv2D(16, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same'),
+        Conv2D(16, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same'),
+        MaxPooling2D(2, 2),
+        Dropout(0.25),
+
+        # Third block
+        Conv2D(32, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same'),
+        Conv2D(32, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same'),
+        MaxPooling2D(2, 2),
+        Dropout(0.25),
+
+        # Fourth block
+        Conv2D(64, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same'),
+        Conv2D(64, (3, 3), activation='relu', kernel_initializer='he_normal', padding='same'),
+        MaxPooling2D(2, 2),
+        Dropout(0.25),
+
+        # Dense layers
+        Flatten(),
+        Dense(64, activation='relu', kernel_initializer='he_normal'),
+        Dropout(0.5),
+        Dense(32, activation='relu', kernel_initializer='he_normal'),
+        Dropout(0.5),
+        Dense(7, activation='softmax')  # 7 emotions
+    ])
+
+    model.compile(
+        optimizer=keras.optimizers.Adam(learning_rate=0.0001),
+        loss='categorical_crossentropy',
+        metrics=['accuracy']
+    )
+
+    # Use basic feature-based initialization instead of random patterns
+    initialize_feature_based_weights(model)
+
+    print("Created sophisticated CNN emotion model")
+    return model
+
+
+def initialize_feature_based_weights(model, samples_per_emotion=20, epochs=5, seed=0):
+    """Train the model briefly on synthetic facial feature patterns"""
+    from tensorflow import keras
+
+    print("Initializing model with basic feature patterns...")
+    rng = np.random.default_rng(seed)
+
+    dummy_x = []
+    dummy_y = []
+    for emotion_idx in range(7):
+        for _ in range(samples_per_emotion):
+            # Create a base neutral face pattern
+            pattern = np.ones((48, 48, 1)) * 0.5
+
+            # Add some basic facial structure
+            pattern[15:20, 12:18] = 0.3  # Left eye
+            pattern[15:20, 30:36] = 0.3  # Right eye
+            pattern[25:30, 22:26] = 0.4  # Nose
+            pattern[35:40, 18:30] = 0.4  # Mouth
+
+            # Modify patterns slightly based on emotion
+            if emotion_idx == 0:  # angry
+                pattern[12:17, :] *= 0.7  # Darker forehead/eyebrows
+                pattern[35:40, 18:30] *= 0.8  # Slightly compressed mouth
+            elif emotion_idx == 1:  # disgust
+                pattern[25:35, 20:28] *= 0.6  # Nose area changes
+                pattern[35:40, 20:28] *= 0.7  # Mouth area
+            elif emotion_idx == 2:  # fear
+                pattern[15:20, :] *= 1.2  # Wider eyes
+                pattern[35:40, 18:30] *= 0.9
+            elif emotion_idx == 3:  # happy
+                pattern[35:40, 18:30] *= 1.1  # Brighter mouth (smile)
+                pattern[33:37, 16:32] *= 1.05  # Slight cheek lift
+            elif emotion_idx == 4:  # sad
+                pattern[35:40, 18:30] *= 0.8  # Darker mouth
+                pattern[20:25, 15:33] *= 0.9  # Slight eye droop
+            elif emotion_idx == 5:  # surprise
+                pattern[15:20, :] *= 1.3  # Very bright eyes
+                pattern[35:40, 20:28] *= 1.2  # Open mouth
+            # emotion_idx == 6 is neutral (no changes)
+
+            # Add some noise
+            pattern = np.clip(pattern + rng.normal(0, 0.05, pattern.shape), 0, 1)
+
+            dummy_x.append(pattern)
+            dummy_y.append(emotion_idx)
+
+    dummy_x = np.array(dummy_x, dtype=np.float32)
+    dummy_y = keras.utils.to_categorical(dummy_y, 7)
+
+    model.fit(dummy_x, dummy_y, epochs=epochs, batch_size=8, verbose=0)
+    print("Initialized model with basic facial feature patterns")
+
+
+def create_simple_fallback():
+    """Create a simple (untrained) fallback model"""
+    from tensorflow.keras.models import Sequential
+    from tensorflow.keras.layers import Dense, Flatten
+
+    model = Sequential([
+        Flatten(input_shape=(48, 48, 1)),
+        Dense(128, activation='relu'),
+        Dense(64, activation='relu'),
+        Dense(7, activation='softmax')
+    ])
+    print("Created simple fallback emotion model")
+    return model
+
+
+def sha256_of(path):
+    """Hex sha256 digest of a file"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_manifest(model, model_path, source, version):
+    """Write <model>.json describing where the artifact came from"""
+    manifest = {
+        'file': os.path.basename(model_path),
+        'version': version,
+        'source': source,
+        'sha256': sha256_of(model_path),
+        'input_shape': list(model.input_shape[1:]),
+        'created': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+    }
+    manifest_path = os.path.splitext(model_path)[0] + '.json'
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Download or build the emotion model (run once, offline from startup)")
+    parser.add_argument('--source', choices=['auto', 'download', 'cnn', 'simple'], default='auto',
+                        help="auto tries download, then the CNN fallback, then the simple fallback")
+    parser.add_argument('--force', action='store_true', help="Overwrite an existing artifact")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("EMOTION MODEL PROVISIONING")
+    print("=" * 70)
+
+    pretrained_path = DEFAULT_MODEL_PATHS['keras']
+    if args.source in ('auto', 'download') and os.path.exists(pretrained_path) and not args.force:
+        print(f"✅ {pretrained_path} already present - nothing to do (use --force to re-download)")
+        return 0
+    if args.source in ('cnn', 'simple') and os.path.exists(FALLBACK_MODEL_PATH) and not args.force:
+        print(f"✅ {FALLBACK_MODEL_PATH} already present - nothing to do (use --force to rebuild)")
+        return 0
+
+    steps = {
+        'auto': ['download', 'cnn', 'simple'],
+        'download': ['download'],
+        'cnn': ['cnn'],
+        'simple': ['simple'],
+    }[args.source]
+
+    for source in steps:
+        try:
+            if source == 'download':
+                output_path, version = pretrained_path, 'pretrained'
+                model = download_pretrained_model(output_path)
+                if model is None:
+                    continue
+            else:
+                output_path, version = FALLBACK_MODEL_PATH, FALLBACK_MODEL_VERSION
+                model = create_emotion_model() if source == 'cnn' else create_simple_fallback()
+                os.makedirs(os.path.dirname(output_path), exist_ok=True)
+                model.save(output_path, include_optimizer=False)
+
+            manifest_path = write_manifest(model, output_path, source, version)
+            print(f"✅ Wrote {output_path}")
+            print(f"✅ Wrote {manifest_path}")
+            return 0
+        except Exception as e:
+            print(f"❌ {source} failed: {e}")
+
+    print("❌ Could not provision an emotion model")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,15 +4,26 @@ Simple Facial Recognition System - Lightweight Version
 Uses OpenCV for basic face detection without MTCNN
 """
 
+import argparse
 import cv2
 import numpy as np
 import sys
 import os
+import time
 
 # Add src to path
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
-def main():
+from frame_sources import open_source, add_source_arguments
+from stage_timing import timings, draw_overlay
+from app_config import display_settings
+from metrics_server import add_metrics_argument, start_metrics_server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Face detection only, no emotion model")
+    args = add_metrics_argument(add_source_arguments(parser)).parse_args(argv)
+    start_metrics_server(args.metrics_port)
+    
     print("=" * 60)
     print("Simple Facial Recognition System")
     print("=" * 60)
@@ -24,10 +35,11 @@ def main():
     )
     
     # Try to open webcam
-    cap = cv2.VideoCapture(0)
+    # Live camera (grabbed on its own thread, settings from config.ini) or a replay source
+    source = open_source(args.source, pace=args.pace, loop=args.loop)
     
-    if not cap.isOpened():
-        print("Error: Could not open camera.")
+    if source is None:
+        print(f"Error: Could not open frame source {args.source!r}.")
         print("System will use a test image instead.")
         # Create a simple test image
         img = np.ones((480, 640, 3), dtype=np.uint8) * 200
@@ -49,41 +61,45 @@ def main():
         cv2.destroyAllWindows()
         return
     
-    # Configure camera
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    
-    print("✓ Camera initialized successfully")
+    print(f"✓ Frame source {args.source!r} initialized")
     print("✓ OpenCV Haar Cascade face detector loaded")
     print("\nStarting live detection...")
     print("Press 'q' to quit\n")
     
     frame_count = 0
+    # FPS and stage-timing overlay switches from config.ini
+    display = display_settings()
     
     while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Failed to grab frame")
+        # Newest frame only; frames grabbed while we were busy are skipped
+        grabbed = source.read()
+        if grabbed is None:
+            if source.isOpened():
+                continue
+            print("End of stream" if not source.live else "Failed to grab frame")
             break
+        frame = grabbed[0]
         
         frame_count += 1
-        frame = cv2.flip(frame, 1)  # Mirror effect
+        if source.live:
+            frame = cv2.flip(frame, 1)  # Mirror effect
         
         # Convert to grayscale for detection
         gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
         gray = cv2.equalizeHist(gray)  # Improve contrast
         
         # Detect faces
-        faces = face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.05,
-            minNeighbors=5,
-            minSize=(40, 40),
-            maxSize=(500, 500)
-        )
+        with timings.stage('detect'):
+            faces = face_cascade.detectMultiScale(
+                gray,
+                scaleFactor=1.05,
+                minNeighbors=5,
+                minSize=(40, 40),
+                maxSize=(500, 500)
+            )
         
         # Draw rectangles around faces
+        draw_start = time.perf_counter()
         for (x, y, w, h) in faces:
             cv2.rectangle(frame, (x, y), (x+w, y+h), (0, 255, 0), 2)
             cv2.putText(frame, f"Face", (x, y-10), 
@@ -93,6 +109,10 @@ def main():
         cv2.putText(frame, f"Faces: {len(faces)} | Frame: {frame_count}", 
                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
+        timings.record('draw', (time.perf_counter() - draw_start) * 1000)
+        timings.frame()
+        draw_overlay(frame, show_fps=display['show_fps'], show_info_panel=display['show_info_panel'])
+        
         # Show frame
         cv2.imshow('Facial Recognition System', frame)
         
@@ -100,8 +120,9 @@ def main():
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
     
-    cap.release()
+    source.release()
     cv2.destroyAllWindows()
+    timings.print_summary()
     print("\nSystem shut down gracefully.")
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ Uses OpenCV for face detection and TensorFlow for emotion classification
 Model loads in background while video plays
 """
 
+import argparse
 import cv2
 import numpy as np
 import sys
@@ -18,10 +19,28 @@ from queue import Queue
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
 warnings.filterwarnings('ignore')
 
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from face_preprocessing import preprocessor_for_model
+from refresh_scheduler import EmotionRefreshScheduler
+from track_association import FaceTrackAssociator
+from frame_pipeline import FramePipeline
+from frame_sources import open_source, add_source_arguments
+from stage_timing import timings, draw_overlay
+from app_config import display_settings
+from metrics_server import add_metrics_argument, start_metrics_server
+
+# Emotion inference time allowed per frame, shared by all faces
+EMOTION_BUDGET_MS = 20
+
+EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+
 class EmotionModelLoader:
     """Loads emotion model in background thread"""
     def __init__(self):
         self.model = None
+        self.preprocessor = None
         self.loaded = False
         self.loading = False
         self.error = None
@@ -43,8 +62,10 @@ class EmotionModelLoader:
             
             model_path = os.path.join('models', 'emotion_model.h5')
             if os.path.exists(model_path):
+                # Inference only - no optimizer or loss needed
                 self.model = keras.models.load_model(model_path, compile=False)
-                self.model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+                # Checked once here rather than failing on every face
+                self.preprocessor = preprocessor_for_model(self.model)
                 self.loaded = True
                 print("✅ Emotion model loaded successfully!\n")
             else:
@@ -60,48 +81,6 @@ class EmotionModelLoader:
         """Check if model is ready to use"""
         return self.loaded and self.model is not None
 
-def preprocess_face(face_img):
-    """Preprocess face image for emotion detection"""
-    try:
-        # Resize to 48x48 (standard for emotion models)
-        face_resized = cv2.resize(face_img, (48, 48))
-        
-        # Convert to grayscale if needed
-        if len(face_resized.shape) == 3:
-            face_resized = cv2.cvtColor(face_resized, cv2.COLOR_BGR2GRAY)
-        
-        # Normalize
-        face_resized = face_resized.astype('float32') / 255.0
-        
-        # Add batch dimension and channel dimension
-        face_resized = np.expand_dims(face_resized, axis=0)
-        face_resized = np.expand_dims(face_resized, axis=-1)
-        
-        return face_resized
-    except Exception as e:
-        return None
-
-def predict_emotion(model, face_img):
-    """Predict emotion for a face image"""
-    if model is None:
-        return None, None
-    
-    try:
-        processed = preprocess_face(face_img)
-        if processed is None:
-            return None, None
-        
-        prediction = model.predict(processed, verbose=0)
-        emotion_idx = np.argmax(prediction[0])
-        confidence = prediction[0][emotion_idx]
-        
-        emotions = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
-        emotion = emotions[emotion_idx]
-        
-        return emotion, confidence
-    except Exception as e:
-        return None, None
-
 def get_emotion_color(emotion):
     """Get color for emotion label"""
     colors = {
@@ -115,7 +94,11 @@ def get_emotion_color(emotion):
     }
     return colors.get(emotion, (255, 255, 255))
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Face and emotion detection with background model loading")
+    args = add_metrics_argument(add_source_arguments(parser)).parse_args(argv)
+    start_metrics_server(args.metrics_port)
+    
     print("=" * 70)
     print("Facial Recognition with Emotion Detection System")
     print("=" * 70)
@@ -131,11 +114,11 @@ def main():
     model_loader = EmotionModelLoader()
     model_loader.load_async()
     
-    # Try to open webcam
-    cap = cv2.VideoCapture(0)
+    # Live camera (grabbed on its own thread, settings from config.ini) or a replay source
+    source = open_source(args.source, pace=args.pace, loop=args.loop)
     
-    if not cap.isOpened():
-        print("✗ Error: Could not open camera")
+    if source is None:
+        print(f"✗ Error: Could not open frame source {args.source!r}")
         print("System will use a test image instead.")
         
         # Create a test image
@@ -152,51 +135,107 @@ def main():
         cv2.destroyAllWindows()
         return
     
-    # Configure camera
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    print("✓ Camera initialized successfully")
+    print(f"✓ Frame source {args.source!r} initialized")
     
     print("\nStarting live detection...")
     print("Press 'q' to quit\n")
     
-    frame_count = 0
-    emotion_frame_skip = 3
-    emotion_cooldown = 0
+    # Decides which faces get emotion inference each frame, within the budget
+    refresh_scheduler = EmotionRefreshScheduler(budget_ms=EMOTION_BUDGET_MS)
+    # Haar boxes come in no stable order; tracking gives each face a persistent id
+    face_tracks = FaceTrackAssociator()
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            print("Failed to grab frame")
-            break
+    def capture():
+        # Wait for the next frame; a live camera only hands out the newest one
+        while source.isOpened():
+            grabbed = source.read()
+            if grabbed is not None:
+                frame, timestamp, _ = grabbed
+                # Mirror the live view only; replayed footage stays as recorded
+                return (cv2.flip(frame, 1) if source.live else frame), timestamp
+        print("Failed to grab frame")
+        return None
+    
+    def detect(packet):
+        # Equalized grayscale, computed once for the frame
+        gray = packet.context.equalized
+        
+        # Detect faces
+        with timings.stage('detect'):
+            packet.faces = face_cascade.detectMultiScale(
+                gray,
+                scaleFactor=1.05,
+                minNeighbors=5,
+                minSize=(40, 40),
+                maxSize=(500, 500)
+            )
         
-        frame_count += 1
-        frame = cv2.flip(frame, 1)
+        with timings.stage('track'):
+            tracked = face_tracks.update([{'bbox': tuple(int(v) for v in box)} for box in packet.faces], packet.seq)
+        packet.track_ids = [face['track_id'] for face in tracked]
+    
+    def infer(packet):
+        faces = packet.faces
+        packet.predictions = [(None, None)] * len(faces)
         
-        # Convert to grayscale for detection
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray = cv2.equalizeHist(gray)
+        # Predict emotions only once the model is ready
+        if not model_loader.is_ready():
+            return
         
-        # Detect faces
-        faces = face_cascade.detectMultiScale(
-            gray,
-            scaleFactor=1.05,
-            minNeighbors=5,
-            minSize=(40, 40),
-            maxSize=(500, 500)
-        )
-        
-        # Draw rectangles around faces and detect emotions
-        for (x, y, w, h) in faces:
-            face_roi = frame[y:y+h, x:x+w]
-            emotion = None
-            confidence = None
-            
-            # Predict emotion if model is ready
-            if model_loader.is_ready() and frame_count % emotion_frame_skip == 0:
-                emotion, confidence = predict_emotion(model_loader.model, face_roi)
-            
+        # Scheduling is keyed on the track ids, so a skipped face keeps its own last emotion
+        selected = refresh_scheduler.select(packet.track_ids, [w * h for (x, y, w, h) in faces])
+        timings.count('inference_skipped', len(faces) - len(selected))
+        timings.count('inference_run', len(selected))
+        
+        # Faces not picked this frame keep their last emotion
+        packet.predictions = [refresh_scheduler.last_result(track_id) or (None, None)
+                              for track_id in packet.track_ids]
+        picked = [face_idx for face_idx, track_id in enumerate(packet.track_ids) if track_id in selected]
+        if not picked:
+            return
+        
+        # One preprocessing pass and one forward pass for all picked faces
+        start = time.perf_counter()
+        try:
+            with timings.stage('preprocess'):
+                processed, slots = model_loader.preprocessor.preprocess_batch(
+                    [packet.context.crop(faces[face_idx]) for face_idx in picked])
+            prediction = None
+            if slots:
+                # Direct call avoids model.predict's per-call data adapter setup
+                with timings.stage('infer'):
+                    prediction = model_loader.model(processed, training=False).numpy()
+        except Exception as e:
+            print(f"Error predicting emotion: {e}")
+            return
+        finally:
+            refresh_scheduler.record_cost(len(selected), (time.perf_counter() - start) * 1000)
+        if prediction is None:
+            return
+        
+        for slot, row in zip(slots, prediction):
+            face_idx = picked[slot]
+            emotion_idx = int(np.argmax(row))
+            emotion, confidence = EMOTIONS[emotion_idx], float(row[emotion_idx])
+            refresh_scheduler.update(packet.track_ids[face_idx], emotion, confidence)
+            packet.predictions[face_idx] = (emotion, confidence)
+    
+    # FPS and stage-timing overlay switches from config.ini
+    display = display_settings()
+    
+    # Capture, detection and inference run on their own threads; this loop
+    # only draws and displays the newest result
+    pipeline = FramePipeline(capture, detect, infer).start()
+    
+    while not pipeline.finished:
+        packet = pipeline.get_result()
+        if packet is None:
+            continue
+        frame = packet.frame
+        draw_start = time.perf_counter()
+        
+        # Draw rectangles around faces with their emotions
+        for (x, y, w, h), (emotion, confidence) in zip(packet.faces, packet.predictions):
             # Draw bounding box
             color = (0, 255, 0)
             if emotion:
@@ -214,7 +253,7 @@ def main():
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
         
         # Display info
-        cv2.putText(frame, f"Faces: {len(faces)} | Frame: {frame_count}", 
+        cv2.putText(frame, f"Faces: {len(packet.faces)} | Frame: {packet.seq} | Latency: {packet.age_ms():.0f} ms", 
                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
         # Show model loading status
@@ -228,6 +267,11 @@ def main():
             cv2.putText(frame, "⚠️  Emotion Detection: Error", (10, 60), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 1)
         
+        timings.record('draw', (time.perf_counter() - draw_start) * 1000)
+        timings.frame()
+        draw_overlay(frame, queue_depths=pipeline.queue_depths(),
+                     show_fps=display['show_fps'], show_info_panel=display['show_info_panel'])
+        
         # Show frame
         cv2.imshow('Facial Recognition with Emotion Detection', frame)
         
@@ -235,7 +279,13 @@ def main():
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
     
-    cap.release()
+    # Releasing the source ends the capture stage, so the pipeline drains promptly
+    source.release()
+    pipeline.stop()
+    pipeline.print_summary()
+    timings.print_summary()
+    source_stats = source.stats()
+    print(f"Source: {source_stats['grabbed']} frames, {source_stats['dropped']} never processed")
     cv2.destroyAllWindows()
     print("\nSystem shut down gracefully.")
 
@@ -0,0 +1,99 @@
+import configparser
+import os
+
+DEFAULT_CONFIG_PATH = 'config.ini'
+
+# Values used when config.ini or one of its keys is missing
+DEFAULTS = {
+    'Detection Parameters': {
+        'backend': 'auto',
+        'scale_factor': '1.05',
+        'min_neighbors': '5',
+        'min_face_size': '40',
+        'max_face_size': '350',
+        'detection_interval': '5',
+        'tracking_threshold': '60',
+        'smoothing_factor': '0.8',
+        'tracker': 'flow',
+        'full_scan_interval': '15',
+        'roi_padding': '0.5',
+        'detection_scale': 'auto',
+        'refine_backend': 'none',
+    },
+    'Camera Settings': {
+        'frame_width': '640',
+        'frame_height': '480',
+        'fps': '30',
+        'brightness': '0.5',
+        'contrast': '0.5',
+    },
+    'Display Settings': {
+        'show_fps': 'true',
+        'show_confidence': 'true',
+        'show_info_panel': 'true',
+    },
+}
+
+
+def load_config(path=DEFAULT_CONFIG_PATH):
+    """Parse config.ini on top of the built-in defaults
+
+    A relative path is looked up in the working directory first, then in
+    the repository root, so entry points under src/ find the same file.
+    A missing file is not an error; the defaults are used.
+    """
+    config = configparser.ConfigParser()
+    config.read_dict(DEFAULTS)
+
+    if not os.path.isabs(path) and not os.path.exists(path):
+        repo_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        path = os.path.join(repo_root, path)
+    config.read(path)
+    return config
+
+
+def _scale(value):
+    """'auto' or a float"""
+    value = value.strip().lower()
+    return value if value == 'auto' else float(value)
+
+
+def detection_settings(config=None):
+    """[Detection Parameters] as a typed dict"""
+    config = config or load_config()
+    section = config['Detection Parameters']
+    return {
+        'backend': section.get('backend').strip().lower(),
+        'scale_factor': section.getfloat('scale_factor'),
+        'min_neighbors': section.getint('min_neighbors'),
+        'min_face_size': section.getint('min_face_size'),
+        'max_face_size': section.getint('max_face_size'),
+        'detection_interval': max(1, section.getint('detection_interval')),
+        'tracking_threshold': section.getfloat('tracking_threshold'),
+        'smoothing_factor': section.getfloat('smoothing_factor'),
+        'tracker': section.get('tracker').strip().lower(),
+        'full_scan_interval': section.getint('full_scan_interval'),
+        'roi_padding': section.getfloat('roi_padding'),
+        'detection_scale': _scale(section.get('detection_scale')),
+        'refine_backend': section.get('refine_backend').strip().lower(),
+    }
+
+
+def camera_settings(config=None):
+    """[Camera Settings] as a typed dict"""
+    config = config or load_config()
+    section = config['Camera Settings']
+    return {
+        'frame_width': section.getint('frame_width'),
+        'frame_height': section.getint('frame_height'),
+        'fps': section.getfloat('fps'),
+        'brightness': section.getfloat('brightness'),
+        'contrast': section.getfloat('contrast'),
+    }
+
+
+def display_settings(config=None):
+    """[Display Settings] as a dict of booleans"""
+    config = config or load_config()
+    section = config['Display Settings']
+    return {key: section.getboolean(key) for key in ('show_fps', 'show_confidence', 'show_info_panel')}
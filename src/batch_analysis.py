@@ -0,0 +1,231 @@
+"""
+Offline emotion analysis of recorded video
+
+Videos are split into frame-range chunks that a process pool works
+through in parallel. Each worker loads the face detector and emotion
+model once (pool initializer), runs detection and tracking over its
+chunk and batches the face crops of several frames into one forward
+pass. Results are one row per face per frame with the full probability
+vector, written to CSV or Parquet as the chunks complete.
+
+Track IDs restart at 0 in every chunk: (video, chunk, track_id)
+identifies one track.
+"""
+
+import contextlib
+import csv
+import functools
+import io
+import multiprocessing
+import os
+import time
+
+import cv2
+import numpy as np
+
+from frame_context import FrameContext
+
+EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+COLUMNS = (['video', 'chunk', 'frame', 'timestamp_s', 'face', 'track_id',
+            'x', 'y', 'w', 'h', 'detection_confidence', 'emotion', 'confidence']
+           + [f'prob_{emotion}' for emotion in EMOTIONS])
+FORMATS = ('csv', 'parquet')
+
+# Set in each pool worker by _init_worker
+_worker = None
+
+
+def plan_chunks(paths, chunk_frames):
+    """Split every video into (path, chunk, start, end) frame ranges
+
+    end is None for the last chunk, which reads to the end of the file
+    (container frame counts are not always exact).
+    """
+    chunks = []
+    for path in paths:
+        cap = cv2.VideoCapture(path)
+        if not cap.isOpened():
+            print(f"⚠️  Skipping {path}: cannot open video")
+            continue
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+
+        starts = list(range(0, max(frame_count, 1), chunk_frames))
+        for chunk, start in enumerate(starts):
+            end = starts[chunk + 1] if chunk + 1 < len(starts) else None
+            chunks.append((path, chunk, start, end))
+    return chunks
+
+
+def _init_worker(backend, threads):
+    """Load the models once per worker process"""
+    global _worker
+    # One process per core: keep each process's own thread pools small
+    for var in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ[var] = str(threads)
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
+    cv2.setNumThreads(threads)
+
+    from emotion_detector import AdvancedEmotionDetector
+    from face_detector_advanced import AdvancedFaceDetector
+
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            face_detector = AdvancedFaceDetector()
+            emotion_detector = AdvancedEmotionDetector(backend=backend, num_threads=threads,
+                                                       result_cache=False)
+        if not emotion_detector.model_loaded:
+            raise RuntimeError(f"emotion model {emotion_detector.model_path} not loaded")
+        _worker = {'faces': face_detector, 'emotions': emotion_detector}
+    except Exception as e:
+        # Raised from analyze_chunk instead: an initializer error would
+        # make the pool restart the worker forever
+        _worker = {'error': f"{type(e).__name__}: {e}"}
+
+
+def _classify(emotion_detector, pending, rows):
+    """One forward pass for the crops of several frames; appends finished rows"""
+    batch, slots = emotion_detector.preprocessor.preprocess_batch([crop for _, crop in pending])
+    if not slots:
+        return
+    probabilities = emotion_detector._run_model(batch)
+    for slot, row in zip(slots, probabilities):
+        index = int(np.argmax(row))
+        rows.append(pending[slot][0] + [EMOTIONS[index], round(float(row[index]), 6)]
+                    + [round(float(p), 6) for p in row])
+
+
+def analyze_chunk(task, batch_size=64):
+    """Detect, track and classify every face in one chunk
+
+    Returns:
+        (rows, frames): result rows in COLUMNS order and frames read
+    """
+    if _worker is None or 'error' in _worker:
+        raise RuntimeError(f"Worker could not load the models: {_worker and _worker['error']}")
+    path, chunk, start, end = task
+    face_detector = _worker['faces']
+    emotion_detector = _worker['emotions']
+
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    if start:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+
+    rows = []
+    pending = []
+    frame_index = start
+    with contextlib.redirect_stdout(io.StringIO()):
+        # Tracking starts fresh at every chunk boundary
+        face_detector.reset_tracking(restart_ids=True)
+
+        while end is None or frame_index < end:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            timestamp = frame_index / fps if fps > 0 else cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+
+            # Detection and the crops share one grayscale conversion
+            context = FrameContext(frame)
+            for face_number, face in enumerate(face_detector.detect_faces(context)):
+                x, y, w, h = (int(v) for v in face['bbox'])
+                crop = context.crop((x, y, w, h))
+                if crop.size == 0:
+                    continue
+                pending.append(([os.path.basename(path), chunk, frame_index, round(timestamp, 3), face_number,
+                                 face.get('track_id'), x, y, w, h, round(float(face['confidence']), 4)], crop))
+            if len(pending) >= batch_size:
+                _classify(emotion_detector, pending, rows)
+                pending = []
+            frame_index += 1
+
+        if pending:
+            _classify(emotion_detector, pending, rows)
+    cap.release()
+    return rows, frame_index - start
+
+
+class CSVResultWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(COLUMNS)
+
+    def write(self, rows):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """Appends one row group per chunk; needs pyarrow"""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.pa = pa
+        types = {'video': pa.string(), 'emotion': pa.string(), 'chunk': pa.int32(), 'frame': pa.int64(),
+                 'face': pa.int32(), 'track_id': pa.int64(), 'x': pa.int32(), 'y': pa.int32(),
+                 'w': pa.int32(), 'h': pa.int32()}
+        self.schema = pa.schema([(name, types.get(name, pa.float32())) for name in COLUMNS])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, rows):
+        if rows:
+            columns = list(zip(*rows))
+            self.writer.write_table(self.pa.table(
+                {name: column for name, column in zip(COLUMNS, columns)}, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def open_writer(path, fmt=None):
+    """CSV or Parquet writer, chosen by fmt or the file extension"""
+    fmt = fmt or ('parquet' if path.endswith('.parquet') else 'csv')
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown output format '{fmt}', expected one of {FORMATS}")
+    if fmt == 'parquet':
+        try:
+            return ParquetResultWriter(path)
+        except ImportError:
+            raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow); use a .csv output instead")
+    return CSVResultWriter(path)
+
+
+def analyze_videos(paths, output, workers=None, chunk_frames=600, batch_size=64,
+                   backend='auto', threads=1, fmt=None):
+    """Analyze videos on a process pool and write every face result to output
+
+    Returns:
+        dict with frames, rows, seconds and fps
+    """
+    workers = workers or os.cpu_count() or 1
+    chunks = plan_chunks(paths, chunk_frames)
+    if not chunks:
+        raise RuntimeError("No readable videos to analyze")
+    workers = min(workers, len(chunks))
+    print(f"✓ {len(chunks)} chunk(s) from {len(paths)} video(s) on {workers} worker(s)")
+
+    writer = open_writer(output, fmt)
+    frames = rows_written = 0
+    start = time.perf_counter()
+    # spawn: workers start without the parent's threads or TensorFlow state
+    context = multiprocessing.get_context('spawn')
+    try:
+        with context.Pool(workers, initializer=_init_worker, initargs=(backend, threads)) as pool:
+            # imap keeps chunk order so the output file is sorted by video and frame
+            work = functools.partial(analyze_chunk, batch_size=batch_size)
+            for done, (rows, chunk_frames_read) in enumerate(pool.imap(work, chunks), 1):
+                writer.write(rows)
+                frames += chunk_frames_read
+                rows_written += len(rows)
+                print(f"  chunk {done}/{len(chunks)}: {frames} frames, {rows_written} face results", end='\r')
+    finally:
+        writer.close()
+    seconds = time.perf_counter() - start
+    print()
+    return {'frames': frames, 'rows': rows_written, 'seconds': seconds,
+            'fps': frames / seconds if seconds else 0.0}
@@ -0,0 +1,172 @@
+import threading
+import time
+from collections import deque
+
+import cv2
+
+from app_config import camera_settings
+from stage_timing import timings
+
+
+class CameraSource:
+    """Camera grabbed on a dedicated thread, handing out only the newest frame
+
+    cv2.VideoCapture queues frames inside the driver, so a consumer slower
+    than the camera reads frames that are several frames old. Here a
+    background thread grabs continuously into a small ring buffer and
+    read() returns the most recent frame with its capture timestamp
+    (time.perf_counter) and sequence number. Frames the consumer never
+    saw are counted as dropped.
+
+    Settings come from the [Camera Settings] section of config.ini. MJPG
+    and a driver buffer of one frame are requested where supported.
+    Brightness and contrast (0.0-1.0) are set on the device when the
+    driver uses that range; otherwise they are applied in software to the
+    frames handed out, and only when they differ from the neutral 0.5.
+    """
+
+    live = True
+
+    def __init__(self, index=0, settings=None, ring_size=2):
+        """
+        Args:
+            index: cv2.VideoCapture device index
+            settings: dict like app_config.camera_settings() (default: config.ini)
+            ring_size: frames kept by the grabber thread
+        """
+        self.index = index
+        self.settings = settings or camera_settings()
+        self.cap = None
+
+        self._ring = deque(maxlen=ring_size)  # (seq, timestamp, frame)
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._software_adjust = None  # (alpha, beta) for convertScaleAbs, or None
+
+        self.seq = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failures = 0
+        self._last_read_seq = 0
+
+    def open(self):
+        """Open the device, apply settings and start grabbing; False on failure"""
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            return False
+
+        self._configure()
+
+        self._running = True
+        self._thread = threading.Thread(target=self._grab_loop, name='camera', daemon=True)
+        self._thread.start()
+        return True
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened() and self._running
+
+    def _configure(self):
+        settings = self.settings
+        cap = self.cap
+
+        # MJPG lets USB cameras deliver full resolution at full frame rate
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
+        # Keep the driver queue as short as possible; not every backend supports it
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, settings['frame_width'])
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, settings['frame_height'])
+        cap.set(cv2.CAP_PROP_FPS, settings['fps'])
+
+        brightness, contrast = settings['brightness'], settings['contrast']
+        if self._normalized(cv2.CAP_PROP_BRIGHTNESS) and self._normalized(cv2.CAP_PROP_CONTRAST):
+            cap.set(cv2.CAP_PROP_BRIGHTNESS, brightness)
+            cap.set(cv2.CAP_PROP_CONTRAST, contrast)
+        elif brightness != 0.5 or contrast != 0.5:
+            # Contrast 0.5 -> gain 1, brightness 0.5 -> no offset
+            self._software_adjust = (contrast * 2.0, (brightness - 0.5) * 255.0)
+
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS)
+        print(f"✓ Camera {self.index}: {width}x{height} @ {fps:.0f} fps"
+              f"{' (software brightness/contrast)' if self._software_adjust else ''}")
+
+    def _normalized(self, prop):
+        """True if the driver reports the property on the 0.0-1.0 scale (0 means unsupported)"""
+        value = self.cap.get(prop)
+        return 0.0 < value <= 1.0
+
+    def _grab_loop(self):
+        while self._running:
+            # Stamp the frame when it is grabbed, before the slower decode
+            if not self.cap.grab():
+                self.failures += 1
+                if self.failures >= 30:
+                    print("❌ Camera stopped delivering frames")
+                    break
+                time.sleep(0.01)
+                continue
+            timestamp = time.perf_counter()
+            ret, frame = self.cap.retrieve()
+            if not ret:
+                self.failures += 1
+                continue
+            self.failures = 0
+
+            with self._cond:
+                self.seq += 1
+                self._ring.append((self.seq, timestamp, frame))
+                self._cond.notify_all()
+
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+
+    def read(self, timeout=1.0):
+        """Newest frame not yet handed out, waiting up to timeout seconds
+
+        Returns:
+            (frame, timestamp, seq), or None on timeout or once the camera stopped
+        """
+        with self._cond:
+            deadline = time.perf_counter() + timeout
+            while self._running and (not self._ring or self._ring[-1][0] <= self._last_read_seq):
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            if not self._ring or self._ring[-1][0] <= self._last_read_seq:
+                return None
+
+            seq, timestamp, frame = self._ring[-1]
+            if seq - self._last_read_seq > 1:
+                self.dropped += seq - self._last_read_seq - 1
+                timings.count('frames_dropped', seq - self._last_read_seq - 1, where='camera')
+            self._last_read_seq = seq
+            self.delivered += 1
+
+        if self._software_adjust is not None:
+            alpha, beta = self._software_adjust
+            frame = cv2.convertScaleAbs(frame, alpha=alpha, beta=beta)
+        return frame, timestamp, seq
+
+    def release(self):
+        """Stop the grabber thread and close the device"""
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self.cap is not None:
+            self.cap.release()
+
+    def stats(self):
+        """Grabbed, delivered and dropped frame counts"""
+        return {
+            'grabbed': self.seq,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'drop_rate': self.dropped / self.seq if self.seq else 0.0,
+        }
@@ -0,0 +1,145 @@
+"""
+Alternative inference backends for the emotion model
+Each backend exposes `input_shape` (Keras style, batch dimension None)
+and `predict(batch)` returning float32 probabilities of shape (N, 7)
+"""
+
+import cv2
+import numpy as np
+
+
+class TFLiteEmotionModel:
+    """Runs a converted .tflite emotion model with the TFLite interpreter"""
+
+    def __init__(self, model_path, num_threads=None):
+        """
+        Args:
+            model_path: path to a .tflite file (float32, float16 or int8)
+            num_threads: interpreter thread count (None = TFLite default)
+        """
+        try:
+            # Prefer the small standalone runtime when it is installed
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        self.model_path = model_path
+        self.num_threads = num_threads
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        self.input_index = input_details['index']
+        self.output_index = output_details['index']
+        self.input_dtype = input_details['dtype']
+        self.output_dtype = output_details['dtype']
+        self.input_scale, self.input_zero_point = input_details['quantization']
+        self.output_scale, self.output_zero_point = output_details['quantization']
+
+        self.input_shape = (None,) + tuple(int(d) for d in input_details['shape'][1:])
+        self.num_classes = int(output_details['shape'][-1])
+
+        # Preallocated buffers, reallocated only when the batch size changes
+        self.batch_size = 0
+        self.input_buffer = None
+        self.output_buffer = None
+        self._resize(int(input_details['shape'][0]))
+
+    def _resize(self, batch_size):
+        """Resize interpreter tensors and buffers for a new batch size"""
+        if batch_size != self.batch_size:
+            self.interpreter.resize_tensor_input(self.input_index, (batch_size,) + self.input_shape[1:])
+            self.interpreter.allocate_tensors()
+            self.batch_size = batch_size
+            self.input_buffer = np.empty((batch_size,) + self.input_shape[1:], dtype=self.input_dtype)
+            self.output_buffer = np.empty((batch_size, self.num_classes), dtype=np.float32)
+
+    def predict(self, batch):
+        """Run the interpreter on a float32 batch of preprocessed faces"""
+        self._resize(len(batch))
+
+        # Quantize straight into the preallocated input buffer
+        if self.input_scale:
+            info = np.iinfo(self.input_dtype)
+            np.clip(np.round(batch / self.input_scale) + self.input_zero_point,
+                    info.min, info.max, out=self.input_buffer, casting='unsafe')
+        else:
+            self.input_buffer[...] = batch
+
+        self.interpreter.set_tensor(self.input_index, self.input_buffer)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_index)
+
+        self.output_buffer[...] = output
+        if self.output_scale:
+            self.output_buffer -= self.output_zero_point
+            self.output_buffer *= self.output_scale
+
+        return self.output_buffer.copy()
+
+
+class ONNXEmotionModel:
+    """Runs an exported .onnx emotion model without TensorFlow
+
+    Uses onnxruntime when it is installed and falls back to cv2.dnn,
+    which ships with opencv-python.
+    """
+
+    # Input shape of the bundled mini_XCEPTION model, used when the ONNX
+    # graph cannot be inspected (cv2.dnn without the onnx package)
+    DEFAULT_INPUT_SHAPE = (None, 64, 64, 1)
+
+    def __init__(self, model_path, num_threads=None, engine='auto'):
+        """
+        Args:
+            model_path: path to an .onnx file with an (N, H, W, 1) input
+            num_threads: intra-op thread count (None = runtime default)
+            engine: 'onnxruntime', 'opencv' or 'auto'
+        """
+        self.model_path = model_path
+        self.session = None
+        self.net = None
+
+        if engine in ('auto', 'onnxruntime'):
+            try:
+                import onnxruntime as ort
+                options = ort.SessionOptions()
+                if num_threads:
+                    options.intra_op_num_threads = num_threads
+                self.session = ort.InferenceSession(model_path, options, providers=['CPUExecutionProvider'])
+            except ImportError:
+                if engine == 'onnxruntime':
+                    raise
+
+        if self.session is not None:
+            self.engine = 'onnxruntime'
+            model_input = self.session.get_inputs()[0]
+            self.input_name = model_input.name
+            self.input_shape = (None,) + tuple(int(d) for d in model_input.shape[1:])
+        else:
+            self.engine = 'opencv'
+            if num_threads:
+                cv2.setNumThreads(num_threads)
+            self.net = cv2.dnn.readNetFromONNX(model_path)
+            self.input_shape = self._read_input_shape(model_path)
+
+    def _read_input_shape(self, model_path):
+        """Read the graph input shape with the onnx package, if available"""
+        try:
+            import onnx
+            model = onnx.load(model_path)
+            dims = model.graph.input[0].type.tensor_type.shape.dim
+            return (None,) + tuple(int(d.dim_value) for d in dims[1:])
+        except Exception:
+            return self.DEFAULT_INPUT_SHAPE
+
+    def predict(self, batch):
+        """Run the network on a float32 batch of preprocessed faces"""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        if self.session is not None:
+            return self.session.run(None, {self.input_name: batch})[0]
+
+        self.net.setInput(batch)
+        return self.net.forward()
@@ -0,0 +1,90 @@
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class EmotionResultCache:
+    """Per-track cache of emotion probabilities keyed on a cheap crop signature
+
+    The signature is a 16x16 grayscale downsample of the face crop. While
+    a track's new crop differs from the last inferred one by less than
+    threshold (mean absolute difference in grey levels) and the cached
+    result is younger than max_age frames, the cached probabilities are
+    reused instead of running the CNN. The cache holds at most
+    max_entries tracks, evicting the least recently used.
+    """
+
+    def __init__(self, threshold=6.0, max_age=15, max_entries=64, signature_size=16):
+        """
+        Args:
+            threshold: mean absolute grey-level difference that forces re-inference
+            max_age: frames a cached result may be reused
+            max_entries: tracks kept before the least recently used is dropped
+            signature_size: side of the downsampled signature image
+        """
+        self.threshold = threshold
+        self.max_age = max_age
+        self.max_entries = max_entries
+        self.signature_size = signature_size
+        self.frame = 0
+
+        self._entries = OrderedDict()  # track id -> (signature, probabilities, frame)
+        self._small = np.empty((signature_size, signature_size, 3), dtype=np.uint8)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def tick(self):
+        """Advance the frame clock; call once per frame"""
+        self.frame += 1
+
+    def signature(self, face_image):
+        """16x16 grayscale downsample of a crop"""
+        size = (self.signature_size, self.signature_size)
+        if face_image.ndim == 2:
+            return cv2.resize(face_image, size, interpolation=cv2.INTER_AREA)
+
+        # Downsample first, then convert only the small image
+        small = self._small if face_image.shape[2] == 3 else None
+        small = cv2.resize(face_image, size, dst=small, interpolation=cv2.INTER_AREA)
+        code = cv2.COLOR_BGRA2GRAY if small.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(small, code)
+
+    def lookup(self, track_id, signature):
+        """Cached probabilities for the track, or None if it must be re-inferred"""
+        entry = self._entries.get(track_id)
+        if entry is not None:
+            cached_signature, probabilities, frame = entry
+            fresh = self.frame - frame <= self.max_age
+            if fresh and cv2.norm(signature, cached_signature, cv2.NORM_L1) <= self.threshold * signature.size:
+                self._entries.move_to_end(track_id)
+                self.hits += 1
+                return probabilities
+
+        self.misses += 1
+        return None
+
+    def store(self, track_id, signature, probabilities):
+        """Remember the result of a fresh inference"""
+        self._entries[track_id] = (signature, np.array(probabilities, dtype=np.float32), self.frame)
+        self._entries.move_to_end(track_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def stats(self):
+        """Hit-rate counters for tuning"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': len(self._entries),
+            'evictions': self.evictions,
+        }
+
+    def reset(self):
+        """Drop every cached result"""
+        self._entries.clear()
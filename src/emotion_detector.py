@@ -1,320 +1,371 @@
 import cv2
 import numpy as np
 import os
-import tensorflow as tf
-from tensorflow import keras
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import Conv2D, MaxPooling2D, Dense, Dropout, Flatten
-import requests
-import tempfile
+import time
+
+from face_preprocessing import normalize_batch_tf, preprocessor_for_model
+from emotion_smoothing import EmotionSmoother
+from emotion_cache import EmotionResultCache
+from refresh_scheduler import EmotionRefreshScheduler
+from stage_timing import timings
+
+# TensorFlow and Keras are imported lazily inside the keras backend so
+# the tflite, onnx and numpy backends start without loading them
+
+# Default model file for each inference backend
+DEFAULT_MODEL_PATHS = {
+    'keras': os.path.join('models', 'emotion_model.h5'),
+    'tflite': os.path.join('models', 'emotion_model_int8.tflite'),
+    'onnx': os.path.join('models', 'emotion_model.onnx'),
+    'numpy': os.path.join('models', 'emotion_model.h5'),
+}
+
+# Versioned fallback model written by provision_model.py when no
+# pre-trained model is available
+FALLBACK_MODEL_VERSION = 1
+FALLBACK_MODEL_PATH = os.path.join('models', f'emotion_model_fallback_v{FALLBACK_MODEL_VERSION}.h5')
+
+# Backend for a model file's extension, used by backend='auto'
+BACKEND_EXTENSIONS = {
+    '.onnx': 'onnx',
+    '.tflite': 'tflite',
+    '.h5': 'keras',
+    '.keras': 'keras',
+}
+
+
+def auto_backend(model_path=None):
+    """Backend for model_path from its extension; without a path, onnx
+    when the exported default model exists, otherwise keras"""
+    if model_path is None:
+        return 'onnx' if os.path.exists(DEFAULT_MODEL_PATHS['onnx']) else 'keras'
+    extension = os.path.splitext(model_path)[1].lower()
+    return BACKEND_EXTENSIONS.get(extension, 'keras')
+
 
 class AdvancedEmotionDetector:
-    def __init__(self):
+    def __init__(self, backend='auto', model_path=None, num_threads=None, jit_compile=False,
+                 uint8_input=False, smoothing='ema', smoothing_window=5, smoothing_alpha=0.4,
+                 track_max_age=30, result_cache=True, cache_threshold=6.0, cache_max_age=15,
+                 refresh_budget_ms=None):
+        """
+        Args:
+            backend: 'keras', 'tflite', 'onnx', 'numpy' (pure NumPy, reads
+                the .h5 directly), or 'auto' (from model_path's extension;
+                without a model_path, onnx when the exported model exists,
+                otherwise keras)
+            model_path: model file to load (defaults to DEFAULT_MODEL_PATHS[backend])
+            num_threads: inference thread count for the tflite and onnx backends
+            jit_compile: compile the keras inference function with XLA
+            uint8_input: feed raw uint8 pixels and run the contrast
+                normalization inside the traced graph (keras backend only)
+            smoothing: per-track probability smoothing, 'ema' or 'mean'
+                (windowed mean over smoothing_window frames)
+            smoothing_window: frames kept per track
+            smoothing_alpha: EMA weight of the newest prediction
+            track_max_age: frames without a prediction before a track's
+                smoothing state is dropped
+            result_cache: reuse a track's last probabilities while its crop
+                is unchanged (see EmotionResultCache)
+            cache_threshold: mean absolute grey-level change of the 16x16
+                crop signature that forces re-inference
+            cache_max_age: frames a cached result may be reused
+            refresh_budget_ms: per-frame inference budget; when set, an
+                EmotionRefreshScheduler picks which faces are refreshed each
+                frame and the rest keep their last result (None refreshes
+                every face every frame)
+        """
+        if backend == 'auto':
+            backend = auto_backend(model_path)
+        if backend not in DEFAULT_MODEL_PATHS:
+            raise ValueError(f"Unknown emotion backend '{backend}', expected one of {list(DEFAULT_MODEL_PATHS)}")
+
         self.emotions = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+        self.backend = backend
+        self.model_path = model_path or DEFAULT_MODEL_PATHS[backend]
+        self.explicit_model_path = model_path is not None
+        self.num_threads = num_threads
         self.model = None
         self.model_loaded = False
-        self.prediction_history = []
-        self.frame_count = 0
-        print("Initializing Advanced Emotion Detector...")
-        self._load_or_create_model()
+        self.infer_fn = None
+        self.jit_compile = jit_compile
+        self.uint8_input = uint8_input and backend == 'keras'
+        if uint8_input and not self.uint8_input:
+            print("uint8_input is only supported by the keras backend, normalizing on the host")
+        self.smoother = EmotionSmoother(len(self.emotions), method=smoothing, window=smoothing_window,
+                                        alpha=smoothing_alpha, max_age=track_max_age)
+        self.result_cache = None
+        if result_cache:
+            self.result_cache = EmotionResultCache(threshold=cache_threshold, max_age=cache_max_age)
+        self.scheduler = None
+        if refresh_budget_ms is not None:
+            self.scheduler = EmotionRefreshScheduler(budget_ms=refresh_budget_ms, max_age=track_max_age)
+        print(f"Initializing Advanced Emotion Detector ({backend} backend)...")
+        if backend == 'tflite':
+            self._load_tflite_model()
+        elif backend == 'onnx':
+            self._load_onnx_model()
+        elif backend == 'numpy':
+            self._load_numpy_model()
+        else:
+            self._load_keras_model()
+            if self.model_loaded:
+                self._build_inference_fn()
+
+        self.plan = None
+        self.preprocessor = None
+        if self.model_loaded:
+            self._build_preprocessing_plan()
+
+    def _build_preprocessing_plan(self):
+        """Build the preprocessing plan from the model input and check it once
 
-    def _load_or_create_model(self):
-        """Load pre-trained model or download one"""
+        Raises ValueError at startup instead of failing on every face when
+        the model and the preprocessing disagree.
+        """
+        normalization = 'graph' if self.uint8_input else 'contrast'
+        # Reusable batch buffer for all face crops of a frame, probed once
+        self.preprocessor = preprocessor_for_model(self.model, self._run_model, len(self.emotions),
+                                                   normalization=normalization)
+        self.plan = self.preprocessor.plan
+        print(f"Emotion preprocessing: {self.plan}")
+
+    def _load_tflite_model(self):
+        """Load a converted TFLite model (see convert_emotion_model.py)"""
         try:
-            # Try to load the existing model first
-            model_path = os.path.join('models', 'emotion_model.h5')
-            if os.path.exists(model_path):
-                try:
-                    self.model = keras.models.load_model(model_path, compile=False)
-                    self.model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-                    print("Loaded existing emotion model from models/emotion_model.h5")
-                    self.model_loaded = True
-                    return
-                except Exception as e:
-                    print(f"Failed to load existing model: {e}")
-
-            # Try to download a pre-trained model
-            print("Downloading pre-trained emotion model...")
-            if self._download_pretrained_model():
-                return
-            
-            # If download fails, create a new model with better weights
-            print("Creating new emotion detection model with better initialization...")
-            self._create_emotion_model()
-            
+            from emotion_backends import TFLiteEmotionModel
+            self.model = TFLiteEmotionModel(self.model_path, num_threads=self.num_threads)
+            print(f"Loaded TFLite emotion model from {self.model_path}")
+            self.model_loaded = True
         except Exception as e:
-            print(f"Error initializing model: {e}")
-            self._create_simple_fallback()
+            print(f"Failed to load TFLite model {self.model_path}: {e}")
+            self.model_loaded = False
 
-    def _download_pretrained_model(self):
-        """Download a pre-trained emotion model"""
+    def _load_onnx_model(self):
+        """Load an exported ONNX model (see convert_emotion_model.py --format onnx)"""
         try:
-            # Try multiple sources for pre-trained emotion models
-            model_urls = [
-                "https://github.com/oarriaga/face_classification/raw/master/trained_models/emotion_models/fer2013_mini_XCEPTION.102-0.66.hdf5",
-                "https://github.com/petercunha/Emotion/raw/master/models/emotion_model.hdf5"
-            ]
-            
-            model_path = os.path.join('models', 'emotion_model.h5')
-            
-            for i, model_url in enumerate(model_urls):
-                try:
-                    print(f"Trying to download emotion model from source {i+1}...")
-                    response = requests.get(model_url, stream=True, timeout=30)
-                    
-                    if response.status_code == 200:
-                        os.makedirs('models', exist_ok=True)
-                        with open(model_path, 'wb') as f:
-                            for chunk in response.iter_content(chunk_size=8192):
-                                f.write(chunk)
-                        
-                        # Try to load the downloaded model
-                        try:
-                            self.model = keras.models.load_model(model_path, compile=False)
-                            self.model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-                            print(f"Successfully downloaded and loaded pre-trained emotion model from source {i+1}!")
-                            self.model_loaded = True
-                            return True
-                        except Exception as load_error:
-                            print(f"Downloaded model from source {i+1} but failed to load: {load_error}")
-                            continue
-                    else:
-                        print(f"Failed to download from source {i+1}: HTTP {response.status_code}")
-                        
-                except Exception as e:
-                    print(f"Error with source {i+1}: {e}")
-                    continue
-            
-            print("All download sources failed, will create custom model...")
-            return False
-                
+            from emotion_backends import ONNXEmotionModel
+            self.model = ONNXEmotionModel(self.model_path, num_threads=self.num_threads)
+            print(f"Loaded ONNX emotion model from {self.model_path} ({self.model.engine})")
+            self.model_loaded = True
         except Exception as e:
-            print(f"Error downloading model: {e}")
-            return False
+            print(f"Failed to load ONNX model {self.model_path}: {e}")
+            self.model_loaded = False
+
+    def _load_numpy_model(self):
+        """Load the .h5 model into the pure-NumPy inference engine"""
+        model_path = self._resolve_model_path()
+        if model_path is None:
+            self.model_loaded = False
+            return
 
-    def _create_emotion_model(self):
-        """Create a CNN model for emotion detection"""
         try:
-            # Create a more sophisticated model based on mini-XCEPTION architecture
-            self.model = Sequential([
-                # First block
-                Conv2D(8, (3, 3), activation='relu', input_shape=(48, 48, 1), kernel_initializer='he_normal'),
-                Conv2D(8, (3, 3), activation='relu', kernel_initializer='he_normal'),
-                MaxPooling2D(2, 2),
-                Dropout(0.25),
-                
-                # Second block  
-                Conv2D(16, (3, 3), activation='relu', kernel_initializer='he_normal'),
-                Conv2D(16, (3, 3), activation='relu', kernel_initializer='he_normal'),
-                MaxPooling2D(2, 2),
-                Dropout(0.25),
-                
-                # Third block
-                Conv2D(32, (3, 3), activation='relu', kernel_initializer='he_normal'),
-                Conv2D(32, (3, 3), activation='relu', kernel_initializer='he_normal'),
-                MaxPooling2D(2, 2),
-                Dropout(0.25),
-                
-                # Fourth block
-                Conv2D(64, (3, 3), activation='relu', kernel_initializer='he_normal'),
-                Conv2D(64, (3, 3), activation='relu', kernel_initializer='he_normal'),
-                MaxPooling2D(2, 2),
-                Dropout(0.25),
-                
-                # Dense layers
-                Flatten(),
-                Dense(64, activation='relu', kernel_initializer='he_normal'),
-                Dropout(0.5),
-                Dense(32, activation='relu', kernel_initializer='he_normal'),
-                Dropout(0.5),
-                Dense(7, activation='softmax')  # 7 emotions
-            ])
-            
-            self.model.compile(
-                optimizer=keras.optimizers.Adam(learning_rate=0.0001),
-                loss='categorical_crossentropy',
-                metrics=['accuracy']
-            )
-            
-            # Use basic feature-based initialization instead of random patterns
-            self._initialize_feature_based_weights()
-            
-            print("Created sophisticated CNN emotion model")
+            from numpy_cnn import NumpyEmotionModel
+            self.model = NumpyEmotionModel(model_path)
+            self.model_path = model_path
+            print(f"Loaded emotion model into NumPy engine from {model_path}")
             self.model_loaded = True
-            
         except Exception as e:
-            print(f"Failed to create CNN model: {e}")
-            self._create_simple_fallback()
+            print(f"Failed to load {model_path} into NumPy engine: {e}")
+            self.model_loaded = False
+
+    def _resolve_model_path(self):
+        """Return the provisioned .h5 model to load, or None if there is none
+
+        The detector never downloads or trains a model at startup; missing
+        models are produced offline by provision_model.py.
+        """
+        if os.path.exists(self.model_path):
+            return self.model_path
+
+        # Fall back to the versioned artifact written by provision_model.py
+        if not self.explicit_model_path and os.path.exists(FALLBACK_MODEL_PATH):
+            print(f"{self.model_path} not found, using provisioned fallback {FALLBACK_MODEL_PATH}")
+            return FALLBACK_MODEL_PATH
+
+        print(f"No emotion model found at {self.model_path}")
+        print("Run 'python provision_model.py' once to download or build one")
+        return None
+
+    def _load_keras_model(self):
+        """Load the provisioned Keras model for inference"""
+        model_path = self._resolve_model_path()
+        if model_path is None:
+            self.model_loaded = False
+            return
 
-    def _initialize_feature_based_weights(self):
-        """Initialize the model with more realistic facial feature patterns"""
         try:
-            print("Initializing model with basic feature patterns...")
-            
-            # Create simple patterns that focus on key facial regions
-            samples_per_emotion = 20
-            dummy_x = []
-            dummy_y = []
-            
-            for emotion_idx in range(7):
-                for _ in range(samples_per_emotion):
-                    # Create a base neutral face pattern
-                    pattern = np.ones((48, 48, 1)) * 0.5
-                    
-                    # Add some basic facial structure
-                    # Eyes (around row 15-20)
-                    pattern[15:20, 12:18] = 0.3  # Left eye
-                    pattern[15:20, 30:36] = 0.3  # Right eye
-                    
-                    # Nose (around row 25-30)
-                    pattern[25:30, 22:26] = 0.4
-                    
-                    # Mouth base (around row 35-40)
-                    pattern[35:40, 18:30] = 0.4
-                    
-                    # Modify patterns slightly based on emotion
-                    if emotion_idx == 0:  # angry
-                        pattern[12:17, :] *= 0.7  # Darker forehead/eyebrows
-                        pattern[35:40, 18:30] *= 0.8  # Slightly compressed mouth
-                    elif emotion_idx == 1:  # disgust  
-                        pattern[25:35, 20:28] *= 0.6  # Nose area changes
-                        pattern[35:40, 20:28] *= 0.7  # Mouth area
-                    elif emotion_idx == 2:  # fear
-                        pattern[15:20, :] *= 1.2  # Wider eyes
-                        pattern[35:40, 18:30] *= 0.9
-                    elif emotion_idx == 3:  # happy
-                        pattern[35:40, 18:30] *= 1.1  # Brighter mouth (smile)
-                        pattern[33:37, 16:32] *= 1.05  # Slight cheek lift
-                    elif emotion_idx == 4:  # sad
-                        pattern[35:40, 18:30] *= 0.8  # Darker mouth
-                        pattern[20:25, 15:33] *= 0.9  # Slight eye droop
-                    elif emotion_idx == 5:  # surprise
-                        pattern[15:20, :] *= 1.3  # Very bright eyes
-                        pattern[35:40, 20:28] *= 1.2  # Open mouth
-                    # emotion_idx == 6 is neutral (no changes)
-                    
-                    # Add some noise
-                    noise = np.random.normal(0, 0.05, pattern.shape)
-                    pattern = np.clip(pattern + noise, 0, 1)
-                    
-                    dummy_x.append(pattern)
-                    dummy_y.append(emotion_idx)
-            
-            dummy_x = np.array(dummy_x)
-            dummy_y = keras.utils.to_categorical(dummy_y, 7)
-            
-            # Train with these basic patterns
-            self.model.fit(dummy_x, dummy_y, epochs=5, batch_size=8, verbose=0)
-            print("Initialized model with basic facial feature patterns")
-            
+            from tensorflow import keras
+
+            # Inference only - no optimizer or loss needed
+            self.model = keras.models.load_model(model_path, compile=False)
+            self.model_path = model_path
+            print(f"Loaded existing emotion model from {model_path}")
+            self.model_loaded = True
         except Exception as e:
-            print(f"Warning: Could not initialize feature-based weights: {e}")
+            print(f"Failed to load emotion model {model_path}: {e}")
+            self.model_loaded = False
 
-    def _create_simple_fallback(self):
-        """Create a simple fallback model"""
+    def _build_inference_fn(self):
+        """Trace the model into a graph function with a fixed input signature
+
+        keras.Model.predict builds a data adapter and callback loop on every
+        call; a traced function only pays that cost once.
+        """
         try:
-            self.model = Sequential([
-                Flatten(input_shape=(48, 48, 1)),
-                Dense(128, activation='relu'),
-                Dense(64, activation='relu'),
-                Dense(7, activation='softmax')
-            ])
-            
-            self.model.compile(
-                optimizer='adam',
-                loss='categorical_crossentropy',
-                metrics=['accuracy']
+            import tensorflow as tf
+
+            input_shape = (None,) + tuple(self.model.input_shape[1:])
+            model = self.model
+
+            input_dtype = tf.uint8 if self.uint8_input else tf.float32
+            uint8_input = self.uint8_input
+
+            @tf.function(
+                input_signature=[tf.TensorSpec(shape=input_shape, dtype=input_dtype)],
+                jit_compile=self.jit_compile
             )
-            
-            print("Created simple fallback emotion model")
-            self.model_loaded = True
-            
+            def infer(batch):
+                if uint8_input:
+                    batch = normalize_batch_tf(batch)
+                return model(batch, training=False)
+
+            self.infer_fn = infer
+            mode = "XLA" if self.jit_compile else "graph"
+            dtype = "uint8, normalized in-graph" if self.uint8_input else "float32"
+            print(f"Emotion inference function traced ({mode} mode, input {input_shape} {dtype})")
+
         except Exception as e:
-            print(f"Failed to create any model: {e}")
-            self.model_loaded = False
+            print(f"Could not trace inference function, using model.predict: {e}")
+            self.infer_fn = None
+            self.uint8_input = False
+
+    def _run_model(self, face_input):
+        """Run a forward pass on a (N, H, W, 1) batch from the preprocessor"""
+        if self.infer_fn is not None:
+            return self.infer_fn(face_input).numpy()
+        if self.backend in ('tflite', 'onnx', 'numpy'):
+            return self.model.predict(face_input)
+        return self.model.predict(face_input, batch_size=len(face_input), verbose=0)
 
     def predict_emotion(self, face_image):
-        if not self.model_loaded or self.model is None:
-            return "Unknown", 0.0
-            
-        if face_image is None or face_image.size == 0:
-            print("Empty or invalid face image for emotion prediction.")
-            return "Unknown", 0.0
-            
+        """Predict the emotion of a single face crop"""
+        return self.predict_emotions([face_image])[0]
+
+    def predict_emotions(self, face_images, track_ids=None):
+        """Predict emotions for every face crop of a frame in one forward pass
+
+        Call once per frame: the per-track smoothing and the result cache
+        use it as their clock. Tracks whose crop is unchanged since their
+        last inference reuse the cached probabilities instead of running
+        the model.
+
+        Args:
+            face_images: list of BGR or grayscale face crops
+            track_ids: optional unique id per crop (e.g. the face
+                detector's 'track_id') so smoothing follows each person;
+                without it a face is identified by its position in the list
+                and the refresh scheduler is bypassed
+
+        With a refresh budget, faces the scheduler did not pick keep their
+        last result; a new face that was not picked stays "Unknown" until
+        its turn, so new faces count against the budget too.
+
+        Returns:
+            list of (emotion, confidence) tuples, one per input crop
+        """
+        if not self.model_loaded or self.preprocessor is None:
+            return [("Unknown", 0.0)] * len(face_images)
+
+        self.smoother.tick()
+        if self.result_cache is not None:
+            self.result_cache.tick()
+        if not face_images:
+            return []
+
+        results = [("Unknown", 0.0)] * len(face_images)
+        # Positions are no identity across frames: scheduling needs real ids
+        scheduler = self.scheduler if track_ids is not None else None
+        if track_ids is None:
+            track_ids = range(len(face_images))
+
+        # Let the scheduler pick which faces are refreshed this frame
+        selected = None
+        if scheduler is not None:
+            areas = [0 if f is None else f.shape[0] * f.shape[1] for f in face_images]
+            selected = scheduler.select([track_ids[slot] for slot in range(len(face_images))], areas)
+
+        # Reuse cached probabilities for tracks whose crop hasn't changed
+        probabilities = {}
+        signatures = {}
+        infer_slots = []
+        for slot, face_image in enumerate(face_images):
+            if selected is not None and track_ids[slot] not in selected:
+                last = scheduler.last_result(track_ids[slot])
+                if last is not None:
+                    results[slot] = last
+                continue
+            if self.result_cache is not None and face_image is not None and face_image.size > 0:
+                signatures[slot] = self.result_cache.signature(face_image)
+                cached = self.result_cache.lookup(track_ids[slot], signatures[slot])
+                if cached is not None:
+                    probabilities[slot] = cached
+                    continue
+            infer_slots.append(slot)
+        timings.count('inference_skipped', len(face_images) - len(infer_slots))
+
         try:
-            # Preprocess the face image
-            processed_face = self._preprocess_face(face_image)
-            if processed_face is None:
-                return "Unknown", 0.0
-                
-            # Make prediction
-            face_input = processed_face.reshape(1, 64, 64, 1)
-            predictions = self.model.predict(face_input, verbose=0)
-            emotion_prob = predictions[0]
-            
-            # Get the most likely emotion
-            emotion_idx = np.argmax(emotion_prob)
-            emotion = self.emotions[emotion_idx]
-            confidence = float(emotion_prob[emotion_idx])
-            
-            # Apply smoothing to reduce jitter
-            self.prediction_history.append((emotion, confidence))
-            if len(self.prediction_history) > 5:
-                self.prediction_history.pop(0)
-            
-            # Use majority vote for more stable predictions
-            if len(self.prediction_history) >= 3:
-                recent_emotions = [pred[0] for pred in self.prediction_history[-3:]]
-                emotion_counts = {}
-                for e in recent_emotions:
-                    emotion_counts[e] = emotion_counts.get(e, 0) + 1
-                
-                # If there's a clear majority, use it
-                max_count = max(emotion_counts.values())
-                if max_count >= 2:
-                    emotion = max(emotion_counts, key=emotion_counts.get)
-                    # Average confidence for the majority emotion
-                    matching_confidences = [pred[1] for pred in self.prediction_history[-3:] if pred[0] == emotion]
-                    confidence = np.mean(matching_confidences) if matching_confidences else confidence
-            
-            print(f"Predicted emotion: {emotion} (confidence: {confidence:.2f})")
-            return emotion, confidence
-            
+            if infer_slots:
+                # Preprocess the remaining crops straight into the reusable batch buffer
+                with timings.stage('preprocess'):
+                    face_input, batch_rows = self.preprocessor.preprocess_batch(
+                        [face_images[slot] for slot in infer_slots])
+                if batch_rows:
+                    # Single forward pass for all faces: (N, H, W, 1) from the plan
+                    start = time.perf_counter()
+                    predictions = self._run_model(face_input)
+                    elapsed_ms = (time.perf_counter() - start) * 1000
+                    timings.record('infer', elapsed_ms)
+                    timings.count('inference_run', len(batch_rows))
+                    if scheduler is not None:
+                        scheduler.record_cost(len(batch_rows), elapsed_ms)
+                    for row, prediction in zip(batch_rows, predictions):
+                        slot = infer_slots[row]
+                        probabilities[slot] = prediction
+                        if slot in signatures:
+                            self.result_cache.store(track_ids[slot], signatures[slot], prediction)
+
+            if not probabilities:
+                return results
+
+            slots = sorted(probabilities)
+            smoothed = self.smoother.update([track_ids[slot] for slot in slots],
+                                            np.stack([probabilities[slot] for slot in slots]))
+
+            # Most likely emotion of each face after smoothing
+            emotion_indices = np.argmax(smoothed, axis=1)
+            for slot, row, emotion_idx in zip(slots, smoothed, emotion_indices):
+                results[slot] = (self.emotions[emotion_idx], float(row[emotion_idx]))
+                if scheduler is not None:
+                    scheduler.update(track_ids[slot], *results[slot])
+
+            return results
+
         except Exception as e:
             print(f"Emotion prediction error: {e}")
-            return "neutral", 0.5
+            # Faces keep their last result; cache hits their cached probabilities
+            for slot in set(infer_slots) | set(probabilities):
+                last = scheduler.last_result(track_ids[slot]) if scheduler is not None else None
+                if last is None and slot in probabilities and slot not in infer_slots:
+                    emotion_idx = int(np.argmax(probabilities[slot]))
+                    last = (self.emotions[emotion_idx], float(probabilities[slot][emotion_idx]))
+                results[slot] = last or ("neutral", 0.5)
+            return results
 
     def _preprocess_face(self, face_image):
-        """Preprocess face image for emotion detection"""
+        """Preprocess a single face image for emotion detection"""
         try:
-            # Convert to grayscale if needed
-            if len(face_image.shape) == 3:
-                gray = cv2.cvtColor(face_image, cv2.COLOR_BGR2GRAY)
-            else:
-                gray = face_image
-                
-            # Resize to model input size (64x64 to match model architecture)
-            face_resized = cv2.resize(gray, (64, 64))
-            
-            # Apply histogram equalization for better contrast
-            face_resized = cv2.equalizeHist(face_resized)
-            
-            # Apply Gaussian blur to reduce noise
-            face_resized = cv2.GaussianBlur(face_resized, (3, 3), 0)
-            
-            # Normalize pixel values to [0, 1]
-            face_normalized = face_resized.astype('float32') / 255.0
-            
-            # Apply local contrast normalization
-            mean = np.mean(face_normalized)
-            std = np.std(face_normalized)
-            if std > 0:
-                face_normalized = (face_normalized - mean) / std
-                face_normalized = np.clip(face_normalized, -3, 3)  # Clip outliers
-                face_normalized = (face_normalized + 3) / 6  # Normalize to [0, 1]
-            
-            return face_normalized
-            
+            return self.preprocessor.preprocess(face_image)
         except Exception as e:
             print(f"Face preprocessing error: {e}")
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,128 @@
+import numpy as np
+
+SMOOTHING_METHODS = ('ema', 'mean')
+
+
+class EmotionSmoother:
+    """Per-track smoothing of emotion probability vectors
+
+    Every track owns one row of a preallocated pool: a (window, classes)
+    ring buffer of recent probability vectors, a running sum for the
+    windowed mean and an EMA state. Updates for all faces of a frame are
+    a handful of vectorized NumPy ops, with no per-call list churn.
+    Tracks not updated for max_age frames are evicted and their row is
+    reused.
+    """
+
+    def __init__(self, num_classes, method='ema', window=5, alpha=0.4, max_age=30, capacity=8):
+        """
+        Args:
+            num_classes: length of the probability vectors
+            method: 'ema' (exponential moving average) or 'mean' (windowed mean)
+            window: ring buffer length per track (frames)
+            alpha: EMA weight of the newest prediction
+            max_age: frames without an update before a track is evicted
+            capacity: initial number of track rows (grows as needed)
+        """
+        if method not in SMOOTHING_METHODS:
+            raise ValueError(f"Unknown smoothing method '{method}', expected one of {SMOOTHING_METHODS}")
+
+        self.num_classes = num_classes
+        self.method = method
+        self.window = window
+        self.alpha = alpha
+        self.max_age = max_age
+        self.frame = 0
+
+        self._rows = {}      # track id -> pool row
+        self._free = []      # rows released by evicted tracks
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        """(Re)allocate the row pool, keeping existing rows"""
+        old = getattr(self, '_ring', None)
+        size = 0 if old is None else len(old)
+
+        ring = np.zeros((capacity, self.window, self.num_classes), dtype=np.float32)
+        sums = np.zeros((capacity, self.num_classes), dtype=np.float32)
+        ema = np.zeros((capacity, self.num_classes), dtype=np.float32)
+        pos = np.zeros(capacity, dtype=np.int64)
+        count = np.zeros(capacity, dtype=np.int64)
+        last_seen = np.zeros(capacity, dtype=np.int64)
+
+        if old is not None:
+            ring[:size] = self._ring
+            sums[:size] = self._sums
+            ema[:size] = self._ema
+            pos[:size] = self._pos
+            count[:size] = self._count
+            last_seen[:size] = self._last_seen
+
+        self._ring, self._sums, self._ema = ring, sums, ema
+        self._pos, self._count, self._last_seen = pos, count, last_seen
+        self._free.extend(range(capacity - 1, size - 1, -1))
+
+    def _row(self, track_id):
+        """Pool row of a track, claiming a fresh one for new tracks"""
+        row = self._rows.get(track_id)
+        if row is None:
+            if not self._free:
+                self._allocate(len(self._ring) * 2)
+            row = self._free.pop()
+            self._pos[row] = 0
+            self._count[row] = 0
+            self._sums[row] = 0
+            self._rows[track_id] = row
+        return row
+
+    def tick(self):
+        """Advance the frame clock and evict stale tracks; call once per frame"""
+        self.frame += 1
+        stale = [t for t, row in self._rows.items() if self.frame - self._last_seen[row] > self.max_age]
+        for track_id in stale:
+            self._free.append(self._rows.pop(track_id))
+
+    def update(self, track_ids, probabilities):
+        """Add the current frame's predictions and return the smoothed vectors
+
+        Args:
+            track_ids: one unique, hashable id per row of probabilities
+            probabilities: (N, num_classes) array of model outputs
+
+        Returns:
+            (N, num_classes) float32 array of smoothed probabilities
+        """
+        rows = np.fromiter((self._row(t) for t in track_ids), dtype=np.int64, count=len(track_ids))
+        probabilities = np.asarray(probabilities, dtype=np.float32)
+
+        pos = self._pos[rows]
+        first = self._count[rows] == 0
+        full = self._count[rows] >= self.window
+
+        # Windowed mean: running sum minus the sample falling out of the ring
+        self._sums[rows] += probabilities - self._ring[rows, pos] * full[:, np.newaxis]
+        self._ring[rows, pos] = probabilities
+        pos = (pos + 1) % self.window
+        self._pos[rows] = pos
+        self._count[rows] = np.minimum(self._count[rows] + 1, self.window)
+
+        # Re-sum the ring once per lap so float error cannot accumulate
+        wrapped = rows[pos == 0]
+        if len(wrapped):
+            self._sums[wrapped] = self._ring[wrapped].sum(axis=1)
+
+        self._ema[rows] = np.where(first[:, np.newaxis], probabilities,
+                                   self.alpha * probabilities + (1 - self.alpha) * self._ema[rows])
+        self._last_seen[rows] = self.frame
+
+        if self.method == 'mean':
+            return self._sums[rows] / self._count[rows, np.newaxis].astype(np.float32)
+        return self._ema[rows].copy()
+
+    def reset(self):
+        """Forget every track"""
+        self._free.extend(self._rows.values())
+        self._rows.clear()
+
+    def __len__(self):
+        return len(self._rows)
@@ -1,118 +1,529 @@
 import cv2
 import numpy as np
-from mtcnn import MTCNN
 import logging
+import os
+import threading
+import time
+
+from stage_timing import timings
+from app_config import detection_settings
+from frame_context import FrameContext
+from face_tracking import FaceBoxTracker
+from track_association import FaceTrackAssociator
 
 # Suppress MTCNN warnings
 logging.getLogger('mtcnn').setLevel(logging.ERROR)
 
+# Face detector backends; 'auto' takes the first of yunet, ssd, mtcnn and
+# haar that loads
+FACE_BACKENDS = ('auto', 'yunet', 'ssd', 'mtcnn', 'haar')
+
+# Model files for the cv2.dnn backends, written by provision_face_detectors.py.
+# The SSD is the res10 300x300 network, as a TensorFlow graph (OpenCV 4 and 5)
+# or the original Caffe model (OpenCV 4 only)
+FACE_MODEL_PATHS = {
+    'yunet': os.path.join('models', 'face_detection_yunet_2023mar.onnx'),
+    'ssd': [
+        (os.path.join('models', 'opencv_face_detector_uint8.pb'), os.path.join('models', 'opencv_face_detector.pbtxt')),
+        (os.path.join('models', 'res10_300x300_ssd_iter_140000.caffemodel'), os.path.join('models', 'deploy.prototxt')),
+    ],
+}
+
+# Minimum detection confidence per backend (adjust_sensitivity moves it)
+CONFIDENCE_THRESHOLDS = {'yunet': 0.8, 'ssd': 0.6, 'mtcnn': 0.9, 'haar': 0.0}
+
+# YuNet's five landmarks, named as MTCNN names them (image left/right)
+YUNET_KEYPOINTS = ('left_eye', 'right_eye', 'nose', 'mouth_left', 'mouth_right')
+
+# Smallest face (pixels) each detector finds reliably: MTCNN's 20 px
+# minimum, YuNet's ~10 px and the 24 px Haar window, plus some margin.
+# The SSD resizes every input to 300x300 itself, so it always runs at 1.0
+DETECTOR_MIN_FACE = {'yunet': 20, 'mtcnn': 24, 'haar': 30}
+
+
+def auto_detection_scale(min_face_size, backend):
+    """Smallest scale (in 0.05 steps, 0.25-1.0) at which a min_face_size
+    face is still as large as the backend's smallest reliable face"""
+    if backend not in DETECTOR_MIN_FACE:
+        return 1.0
+    scale = np.ceil(DETECTOR_MIN_FACE[backend] / float(min_face_size) / 0.05) * 0.05
+    return float(min(1.0, max(0.25, round(scale, 2))))
+
+class _AsyncRefiner:
+    """Runs a second, slower detector on a background thread
+
+    submit() hands over a copy of the frame only while the worker is idle,
+    so it always works on the most recent frame it can take and the frame
+    loop never waits for it; take() returns the newest finished result.
+    """
+
+    def __init__(self, detector):
+        self.detector = detector
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._pending = None
+        self._result = None
+        self._busy = False
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name=f'refine-{detector.backend}', daemon=True)
+        self._thread.start()
+
+    def submit(self, frame_number, frame):
+        """Start refining frame unless the worker is busy; never blocks"""
+        with self._lock:
+            if self._busy or not self._running:
+                return False
+            self._busy = True
+            self._pending = (frame_number, frame.copy())
+        self._wake.set()
+        return True
+
+    def take(self):
+        """(frame_number, faces) of the newest finished frame, or None"""
+        with self._lock:
+            result, self._result = self._result, None
+        return result
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if not self._running:
+                return
+            frame_number, frame = self._pending
+            start = time.perf_counter()
+            try:
+                faces = self.detector._find_faces(FrameContext(frame))
+            except Exception as e:
+                print(f"{self.detector.backend.upper()} refinement error: {e}")
+                faces = None
+            timings.record('refine', (time.perf_counter() - start) * 1000)
+            with self._lock:
+                if faces is not None:
+                    self._result = (frame_number, faces)
+                self._busy = False
+
+    def stop(self, timeout=2.0):
+        """Stop the worker and wait for a refinement in progress to finish"""
+        self._running = False
+        self._wake.set()
+        self._thread.join(timeout=timeout)
+
+
 class AdvancedFaceDetector:
-    def __init__(self):
-        """Initialize advanced face detector using MTCNN (Multi-task CNN)"""
-        try:
-            # Initialize MTCNN detector
-            self.detector = MTCNN()
-            print("MTCNN Face Detector initialized successfully")
-            self.mtcnn_available = True
-        except Exception as e:
-            print(f"MTCNN initialization failed: {e}")
-            # Fallback to OpenCV Haar Cascades
-            self.face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
-            self.mtcnn_available = False
-            print("Fallback to OpenCV Haar Cascades")
+    def __init__(self, backend=None, detection_interval=None, tracker=None, full_scan_interval=None,
+                 detection_scale=None, refine_backend=None, settings=None):
+        """Initialize advanced face detector (YuNet, res10 SSD, MTCNN or Haar)
+
+        Args:
+            backend: one of FACE_BACKENDS (default: config.ini); a backend
+                that fails to load falls back to MTCNN, then Haar
+            detection_interval: run the full detector every N frames and
+                track the boxes in between (default: config.ini; 1 detects
+                on every frame)
+            tracker: box tracker between detections, 'flow', 'kcf' or
+                'mosse' (default: config.ini)
+            full_scan_interval: frames between full-frame scans; in between,
+                detection only searches padded regions around each track's
+                predicted position (default: config.ini; 0 always scans the
+                whole frame)
+            detection_scale: run the detector on a copy of the frame
+                resized by this factor, or 'auto' to derive it from
+                min_face_size (default: config.ini); boxes and keypoints
+                are mapped back to full resolution
+            refine_backend: hybrid mode; a slower, more accurate backend
+                (e.g. 'mtcnn') that runs on a background thread on the
+                newest frame it can take and fuses its boxes and keypoints
+                into the tracks ('none' disables; default: config.ini)
+            settings: [Detection Parameters] dict (default: read config.ini)
+        """
+        settings = settings or detection_settings()
+        backend = backend or settings['backend']
+        if backend not in FACE_BACKENDS:
+            raise ValueError(f"Unknown face detector backend '{backend}', expected one of {FACE_BACKENDS}")
+        
+        candidates = ['yunet', 'ssd', 'mtcnn', 'haar'] if backend == 'auto' else [backend, 'mtcnn', 'haar']
+        for candidate in dict.fromkeys(candidates):
+            try:
+                getattr(self, f'_load_{candidate}')()
+                self.backend = candidate
+                break
+            except Exception as e:
+                if backend != 'auto' or candidate not in FACE_MODEL_PATHS:
+                    print(f"{candidate.upper()} initialization failed: {e}")
+        else:
+            raise RuntimeError("No face detector backend could be loaded")
+        self.mtcnn_available = self.backend == 'mtcnn'
+        self._find_faces = getattr(self, f'_find_faces_{self.backend}')
+        print(f"Face detector backend: {self.backend}")
         
         # Tracking variables
-        self.previous_faces = []
         self.frame_count = 0
-        self.tracking_threshold = 50
-        self.confidence_threshold = 0.9  # MTCNN confidence threshold
+        # Persistent track IDs and constant-velocity prediction; config.ini
+        # tracking_threshold gates matches, smoothing_factor smooths boxes
+        self.tracks = FaceTrackAssociator(settings['tracking_threshold'], settings['smoothing_factor'])
+        self.confidence_threshold = CONFIDENCE_THRESHOLDS[self.backend]
+        
+        # Face size limits (full-resolution pixels) and Haar parameters
+        self.min_face_size = settings['min_face_size']
+        self.max_face_size = settings['max_face_size']
+        self.scale_factor = settings['scale_factor']
+        self.min_neighbors = settings['min_neighbors']
         
-        # Face quality assessment
-        self.min_face_size = 40
-        self.max_face_size = 500
+        # Detection runs on a downscaled copy; faces are never smaller than
+        # min_face_size, so small scales lose little recall
+        detection_scale = detection_scale or settings['detection_scale']
+        if detection_scale == 'auto':
+            detection_scale = auto_detection_scale(self.min_face_size, self.backend)
+        self.detection_scale = min(1.0, float(detection_scale)) if self.backend != 'ssd' else 1.0
+        print(f"Face detection at {self.detection_scale:.2f}x resolution")
+        
+        # Detect-then-track: boxes between full detections come from the
+        # tracker; a detection is forced early when tracking confidence drops
+        self.detection_interval = max(1, detection_interval or settings['detection_interval'])
+        self.min_tracking_confidence = 0.5
+        self.frames_since_detection = 0
+        self.box_tracker = None
+        if self.detection_interval > 1:
+            self.box_tracker = FaceBoxTracker(tracker or settings['tracker'])
+        
+        # Region-of-interest search: cost scales with the number of faces
+        self.full_scan_interval = settings['full_scan_interval'] if full_scan_interval is None else full_scan_interval
+        self.roi_padding = settings['roi_padding']
+        self.last_full_scan = 0
+        
+        # Hybrid mode: the frame loop never waits for the refining detector
+        refine_backend = refine_backend or settings['refine_backend']
+        self.refiner = None
+        self.refinements = {}     # track_id -> latest refinement (keypoints relative to the box)
+        self.refine_max_age = 15  # frames a refinement's keypoints are carried along
+        if refine_backend != 'none' and refine_backend != self.backend:
+            refining = AdvancedFaceDetector(backend=refine_backend, detection_interval=1, full_scan_interval=0,
+                                            refine_backend='none', settings=settings)
+            if refining.backend == refine_backend:
+                self.refiner = _AsyncRefiner(refining)
+                print(f"Hybrid mode: {self.backend} every frame, {refine_backend} refinement in the background")
+            else:
+                print(f"{refine_backend.upper()} not available, hybrid refinement disabled")
         
     def detect_faces(self, frame):
-        """Main face detection method using MTCNN or fallback to OpenCV"""
+        """Main face detection method, using the loaded backend
+        
+        frame may be a FrameContext, so the grayscale and crops computed
+        here are shared with the later stages of the frame.
+        In hybrid mode the newest refinement, if one finished, is fused
+        into the tracks and the frame is offered to the refiner.
+        """
+        context = FrameContext.of(frame)
         self.frame_count += 1
+        if self.refiner is None:
+            return self._detect_or_track(context)
         
-        if self.mtcnn_available:
-            return self._detect_with_mtcnn(frame)
-        else:
-            return self._detect_with_opencv(frame)
+        self.refiner.submit(self.frame_count, context.frame)
+        return self._apply_refinements(self._detect_or_track(context))
     
-    def _detect_with_mtcnn(self, frame):
-        """Advanced face detection using MTCNN"""
-        try:
-            # Convert BGR to RGB for MTCNN
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    def _detect_or_track(self, context):
+        """Faces of the frame from the detector or, between detections, the tracker
+
+        With a detection_interval above 1, only every Nth frame (or a frame
+        where tracking confidence dropped) runs the detector; the others
+        get the tracked boxes of the last detection. Between full-frame
+        scans the detector only searches around the known faces.
+        """
+        if self.box_tracker is not None and 0 < self.frames_since_detection < self.detection_interval:
+            with timings.stage('track'):
+                tracked_faces = self.box_tracker.update(self._tracker_image(context))
+            if self.box_tracker.confidence >= self.min_tracking_confidence:
+                self.frames_since_detection += 1
+                self.tracks.observe(tracked_faces, self.frame_count)
+                timings.count('face_frames', mode='tracked')
+                return [dict(face) for face in tracked_faces]
+        
+        # Search around the known faces only, with a periodic full scan
+        regions = self._search_regions(context)
+        if regions is None:
+            self.last_full_scan = self.frame_count
+        timings.count('face_frames', mode='detected' if regions is None else 'roi')
+        faces = self._detect(context, regions)
+        
+        if self.box_tracker is not None:
+            self.box_tracker.start(self._tracker_image(context), faces)
+            self.frames_since_detection = 1
+        return faces
+    
+    def _tracker_image(self, context):
+        """Optical flow runs on the shared grayscale; contrib trackers get BGR"""
+        return context.gray if self.box_tracker.method == 'flow' else context.frame
+    
+    def _apply_refinements(self, faces):
+        """Fuse the refiner's newest result into the tracks and carry the
+        refined keypoints along with each track's current box"""
+        result = self.refiner.take()
+        refined_now = {}
+        if result is not None:
+            frame_number, refined_faces = result
+            refined_now = self.tracks.refine(refined_faces, frame_number)
+            timings.count('refinements', len(refined_now), result='fused')
+            timings.count('refinements', len(refined_faces) - len(refined_now), result='unmatched')
+            for track_id, refined in refined_now.items():
+                x, y, w, h = refined['bbox']
+                keypoints = None
+                if refined.get('keypoints') and w and h:
+                    keypoints = {name: ((px - x) / w, (py - y) / h) for name, (px, py) in refined['keypoints'].items()}
+                self.refinements[track_id] = {'frame': self.frame_count, 'keypoints': keypoints,
+                                              'confidence': refined['confidence'], 'method': refined['method']}
             
-            # Detect faces with MTCNN
-            detections = self.detector.detect_faces(rgb_frame)
+            # Refined boxes replace the current ones, also for the box tracker
+            boxes = self.tracks.predicted_boxes(self.frame_count)
+            refined_boxes = {track_id: boxes[track_id] for track_id in refined_now if track_id in boxes}
+            if self.box_tracker is not None:
+                self.box_tracker.correct(refined_boxes)
+            for face in faces:
+                if face.get('track_id') in refined_boxes:
+                    face['bbox'] = refined_boxes[face['track_id']]
+        
+        self.refinements = {track_id: refinement for track_id, refinement in self.refinements.items()
+                            if self.frame_count - refinement['frame'] <= self.refine_max_age}
+        for face in faces:
+            refinement = self.refinements.get(face.get('track_id'))
+            if refinement is None:
+                continue
+            x, y, w, h = face['bbox']
+            if refinement['keypoints'] and not face.get('keypoints'):
+                face['keypoints'] = {name: (int(round(x + u * w)), int(round(y + v * h)))
+                                     for name, (u, v) in refinement['keypoints'].items()}
+            face['refined_by'] = refinement['method']
+            face['refined_confidence'] = refinement['confidence']
+        return faces
+    
+    def _load_yunet(self):
+        """OpenCV FaceDetectorYN (YuNet) from models/"""
+        path = FACE_MODEL_PATHS['yunet']
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"{path} not found; run 'python provision_face_detectors.py'")
+        # Low built-in threshold: confidence_threshold filters afterwards
+        self.detector = cv2.FaceDetectorYN.create(path, "", (320, 320), 0.5, 0.3, 5000)
+        self._yunet_size = None
+    
+    def _load_ssd(self):
+        """res10 300x300 SSD through cv2.dnn from models/"""
+        for model, config in FACE_MODEL_PATHS['ssd']:
+            if os.path.exists(model) and os.path.exists(config):
+                self.detector = cv2.dnn.readNet(model, config)
+                return
+        raise FileNotFoundError(f"No res10 SSD model in models/; run 'python provision_face_detectors.py'")
+    
+    def _load_mtcnn(self):
+        """MTCNN (imported here: it pulls in TensorFlow)"""
+        from mtcnn import MTCNN
+        self.detector = MTCNN()
+    
+    def _load_haar(self):
+        """OpenCV Haar cascade shipped with opencv-python"""
+        path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
+        self.face_cascade = cv2.CascadeClassifier(path)
+        if self.face_cascade.empty():
+            raise FileNotFoundError(f"Haar cascade {path} is missing or unreadable")
+    
+    def _detect(self, context, regions=None):
+        """Run the backend on the frame (or regions) and track the result"""
+        try:
+            faces = self._search(context, regions, self._find_faces)
+        except Exception as e:
+            print(f"{self.backend.upper()} detection error: {e}")
+            return []
+        
+        # Apply temporal tracking
+        return self._apply_tracking(faces)
+    
+    def _search(self, context, regions, find):
+        """Faces in the whole frame, or only inside regions (x0, y0, x1, y1)
+        with their boxes and keypoints shifted back to frame coordinates"""
+        with timings.stage('detect'):
+            if regions is None:
+                return find(context)
             
             faces = []
-            for detection in detections:
-                # Extract bounding box and confidence
-                x, y, width, height = detection['box']
-                confidence = detection['confidence']
-                
-                # Filter by confidence and size
-                if (confidence >= self.confidence_threshold and 
-                    self.min_face_size <= width <= self.max_face_size and 
-                    self.min_face_size <= height <= self.max_face_size):
-                    
-                    # Ensure coordinates are positive
-                    x = max(0, x)
-                    y = max(0, y)
-                    
-                    # Extract facial landmarks
-                    keypoints = detection['keypoints']
-                    
-                    face_data = {
-                        'bbox': (x, y, width, height),
-                        'confidence': confidence,
-                        'keypoints': keypoints,
-                        'method': 'mtcnn',
-                        'quality': self._calculate_face_quality_mtcnn(detection)
-                    }
-                    faces.append(face_data)
-            
-            # Apply temporal tracking
-            tracked_faces = self._apply_tracking(faces)
-            
-            return tracked_faces
+            for x0, y0, x1, y1 in regions:
+                for face in find(context.region(x0, y0, x1, y1)):
+                    x, y, w, h = face['bbox']
+                    face['bbox'] = (x + x0, y + y0, w, h)
+                    if face['keypoints']:
+                        face['keypoints'] = {name: (px + x0, py + y0) for name, (px, py) in face['keypoints'].items()}
+                    faces.append(face)
+            return faces
+    
+    def _find_faces_mtcnn(self, context):
+        """MTCNN faces in the context's frame, untracked, in its pixels"""
+        # MTCNN takes RGB
+        rgb_image = self._scaled(context, 'rgb')
+        scale = self.detection_scale
+        
+        # Detect faces with MTCNN
+        detections = self.detector.detect_faces(rgb_image)
+        
+        faces = []
+        for detection in detections:
+            # Extract bounding box and confidence, back in full-resolution pixels
+            x, y, width, height = (int(round(v / scale)) for v in detection['box'])
+            confidence = detection['confidence']
             
-        except Exception as e:
-            print(f"MTCNN detection error: {e}")
-            return []
+            # Filter by confidence and size
+            if (confidence >= self.confidence_threshold and 
+                self.min_face_size <= width <= self.max_face_size and 
+                self.min_face_size <= height <= self.max_face_size):
+                
+                # Ensure coordinates are positive
+                x = max(0, x)
+                y = max(0, y)
+                
+                # Extract facial landmarks
+                keypoints = {name: (int(round(px / scale)), int(round(py / scale)))
+                             for name, (px, py) in detection['keypoints'].items()}
+                
+                face_data = {
+                    'bbox': (x, y, width, height),
+                    'confidence': confidence,
+                    'keypoints': keypoints,
+                    'method': 'mtcnn',
+                    'quality': self._calculate_face_quality_mtcnn(dict(detection, keypoints=keypoints))
+                }
+                faces.append(face_data)
+        
+        return faces
     
-    def _detect_with_opencv(self, frame):
-        """Fallback detection using OpenCV"""
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    def _find_faces_yunet(self, context):
+        """YuNet faces in the context's frame, untracked, in its pixels"""
+        small = self._scaled(context, 'frame')
+        scale = self.detection_scale
+        size = (small.shape[1], small.shape[0])
+        if size != self._yunet_size:
+            self.detector.setInputSize(size)
+            self._yunet_size = size
+        _, detections = self.detector.detect(small)
         
-        # Apply histogram equalization
-        gray = cv2.equalizeHist(gray)
+        faces = []
+        for row in (detections if detections is not None else []):
+            confidence = float(row[14])
+            x, y, width, height = (int(round(v / scale)) for v in row[:4])
+            if (confidence < self.confidence_threshold or
+                    not self.min_face_size <= width <= self.max_face_size or
+                    not self.min_face_size <= height <= self.max_face_size):
+                continue
+            keypoints = {name: (int(round(px / scale)), int(round(py / scale)))
+                         for name, (px, py) in zip(YUNET_KEYPOINTS, row[4:14].reshape(5, 2))}
+            faces.append({
+                'bbox': (max(0, x), max(0, y), width, height),
+                'confidence': confidence,
+                'keypoints': keypoints,
+                'method': 'yunet',
+                'quality': self._calculate_face_quality_mtcnn({'confidence': confidence, 'keypoints': keypoints})
+            })
+        return faces
+    
+    def _find_faces_ssd(self, context):
+        """res10 SSD faces in the context's frame, untracked, in its pixels"""
+        height, width = context.shape[:2]
+        # The network resizes to 300x300 itself, so detection_scale does not apply
+        blob = cv2.dnn.blobFromImage(context.frame, 1.0, (300, 300), (104.0, 177.0, 123.0))
+        self.detector.setInput(blob)
+        detections = self.detector.forward()[0, 0]
+        
+        faces = []
+        for _, _, confidence, x0, y0, x1, y1 in detections[detections[:, 2] >= self.confidence_threshold]:
+            x0, x1 = (int(round(min(max(v, 0.0), 1.0) * width)) for v in (x0, x1))
+            y0, y1 = (int(round(min(max(v, 0.0), 1.0) * height)) for v in (y0, y1))
+            w, h = x1 - x0, y1 - y0
+            if not (self.min_face_size <= w <= self.max_face_size and self.min_face_size <= h <= self.max_face_size):
+                continue
+            faces.append({
+                'bbox': (x0, y0, w, h),
+                'confidence': float(confidence),
+                'keypoints': None,
+                'method': 'ssd',
+                'quality': self._calculate_face_quality_opencv(context.crop((x0, y0, w, h)))
+            })
+        return faces
+    
+    def _find_faces_haar(self, context):
+        """Haar cascade faces in the context's frame, untracked, in its pixels"""
+        # Equalized grayscale at detection scale, shared for the frame
+        gray = self._scaled(context, 'equalized')
         
         # Detect faces
+        scale = self.detection_scale
+        min_size = int(self.min_face_size * scale)
+        max_size = int(self.max_face_size * scale)
+        if min(gray.shape[:2]) < min_size:
+            return []
         faces = self.face_cascade.detectMultiScale(
             gray,
-            scaleFactor=1.05,
-            minNeighbors=5,
-            minSize=(self.min_face_size, self.min_face_size),
-            maxSize=(self.max_face_size, self.max_face_size)
+            scaleFactor=self.scale_factor,
+            minNeighbors=self.min_neighbors,
+            minSize=(min_size, min_size),
+            maxSize=(max_size, max_size)
         )
         
         face_data_list = []
-        for (x, y, w, h) in faces:
+        for box in faces:
+            # Back to full-resolution pixels; quality uses the full-resolution crop
+            x, y, w, h = (int(round(v / scale)) for v in box)
             face_data = {
                 'bbox': (x, y, w, h),
                 'confidence': 0.8,  # Default confidence for OpenCV
                 'keypoints': None,
                 'method': 'opencv',
-                'quality': self._calculate_face_quality_opencv(frame[y:y+h, x:x+w])
+                'quality': self._calculate_face_quality_opencv(context.crop((x, y, w, h)))
             }
             face_data_list.append(face_data)
         
-        return self._apply_tracking(face_data_list)
+        return face_data_list
+    
+    def _search_regions(self, context):
+        """Padded regions around each track's predicted box, or None for a
+        full-frame scan
+
+        A full scan runs every full_scan_interval frames so new arrivals
+        are found, and whenever there are no tracks to search around or
+        the regions would cover most of the frame anyway. The SSD always
+        scans the full frame: it resizes its input to a fixed 300x300, so
+        a small crop costs as much as the frame and gets blown up.
+        """
+        if (self.backend == 'ssd' or self.full_scan_interval <= 0 or not len(self.tracks) or
+                self.frame_count - self.last_full_scan >= self.full_scan_interval):
+            return None
+        
+        height, width = context.shape[:2]
+        regions = []
+        for x, y, w, h in self.tracks.predicted_boxes(self.frame_count).values():
+            cx, cy = x + w / 2, y + h / 2
+            half = max(w, h) * (0.5 + self.roi_padding)
+            regions.append([max(0, int(cx - half)), max(0, int(cy - half)),
+                            min(width, int(cx + half)), min(height, int(cy + half))])
+        
+        # Merge overlapping regions so no face is searched (and found) twice
+        merged = True
+        while merged:
+            merged = False
+            for i in range(len(regions)):
+                for j in range(i + 1, len(regions)):
+                    a, b = regions[i], regions[j]
+                    if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                        regions[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                        del regions[j]
+                        merged = True
+                        break
+                if merged:
+                    break
+        
+        area = sum((x1 - x0) * (y1 - y0) for x0, y0, x1, y1 in regions)
+        if area > 0.6 * width * height:
+            return None
+        return [tuple(region) for region in regions]
+    
+    def _scaled(self, context, kind):
+        """The context's kind image at detection_scale (full size at 1.0)"""
+        return context.image(kind, min(self.detection_scale, 1.0))
     
     def _calculate_face_quality_mtcnn(self, detection):
         """Calculate face quality based on MTCNN detection"""
@@ -134,12 +545,13 @@ class AdvancedFaceDetector:
         return min(1.0, quality)
     
     def _calculate_face_quality_opencv(self, face_region):
-        """Calculate face quality for OpenCV detection"""
+        """Calculate face quality for OpenCV detection from a grayscale
+        (usually a FrameContext crop) or BGR face region"""
         try:
             if face_region.size == 0:
                 return 0.5
             
-            gray_face = cv2.cvtColor(face_region, cv2.COLOR_BGR2GRAY)
+            gray_face = face_region if face_region.ndim == 2 else cv2.cvtColor(face_region, cv2.COLOR_BGR2GRAY)
             
             # Sharpness (Laplacian variance)
             laplacian_var = cv2.Laplacian(gray_face, cv2.CV_64F).var()
@@ -157,51 +569,10 @@ class AdvancedFaceDetector:
         except Exception:
             return 0.5
     
+    @timings.timed('track')
     def _apply_tracking(self, faces):
-        """Apply temporal tracking for stability"""
-        if not faces:
-            return []
-        
-        tracked_faces = []
-        
-        for face in faces:
-            x, y, w, h = face['bbox']
-            face_center = np.array([x + w/2, y + h/2])
-            
-            # Find closest previous face
-            best_match = None
-            min_distance = float('inf')
-            
-            for prev_face in self.previous_faces:
-                px, py, pw, ph = prev_face['bbox']
-                prev_center = np.array([px + pw/2, py + ph/2])
-                distance = np.linalg.norm(face_center - prev_center)
-                
-                if distance < min_distance and distance < self.tracking_threshold:
-                    min_distance = distance
-                    best_match = prev_face
-            
-            if best_match:
-                # Apply smoothing
-                px, py, pw, ph = best_match['bbox']
-                smooth_factor = 0.6  # Stronger smoothing for stability
-                
-                smoothed_x = int(smooth_factor * px + (1 - smooth_factor) * x)
-                smoothed_y = int(smooth_factor * py + (1 - smooth_factor) * y)
-                smoothed_w = int(smooth_factor * pw + (1 - smooth_factor) * w)
-                smoothed_h = int(smooth_factor * ph + (1 - smooth_factor) * h)
-                
-                tracked_face = face.copy()
-                tracked_face['bbox'] = (smoothed_x, smoothed_y, smoothed_w, smoothed_h)
-                tracked_face['confidence'] = min(1.0, face['confidence'] + 0.05)  # Small tracking bonus
-                tracked_faces.append(tracked_face)
-            else:
-                tracked_faces.append(face)
-        
-        # Update previous faces
-        self.previous_faces = tracked_faces.copy()
-        
-        return tracked_faces
+        """Give every face its persistent track_id and a smoothed box"""
+        return self.tracks.update(faces, self.frame_count)
     
     def draw_faces(self, image, faces):
         """Draw detected faces with detailed information"""
@@ -213,7 +584,7 @@ class AdvancedFaceDetector:
             keypoints = face.get('keypoints', None)
             
             # Color based on confidence and method
-            if method == 'mtcnn':
+            if method in ('mtcnn', 'yunet', 'ssd'):
                 if confidence > 0.95:
                     color = (0, 255, 0)  # Bright green for high MTCNN confidence
                     thickness = 3
@@ -260,8 +631,8 @@ class AdvancedFaceDetector:
             cv2.circle(image, (center_x, center_y), 10, color, 2)
             
             # Method indicator
-            if method == 'mtcnn':
-                cv2.putText(image, 'MTCNN', (center_x - 25, center_y + 25), 
+            if method in ('mtcnn', 'yunet', 'ssd'):
+                cv2.putText(image, method.upper(), (center_x - 25, center_y + 25), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
         
         return image
@@ -285,7 +656,7 @@ class AdvancedFaceDetector:
         cv2.line(image, (x + w, y + h), (x + w, y + h - size), color, thickness + 1)
     
     def _draw_landmarks(self, image, keypoints, color):
-        """Draw facial landmarks from MTCNN detection"""
+        """Draw facial landmarks from MTCNN or YuNet detection"""
         try:
             # Define landmark points
             landmarks = {
@@ -308,19 +679,29 @@ class AdvancedFaceDetector:
         except Exception:
             pass  # Skip landmarks if there's an error
     
-    def reset_tracking(self):
-        """Reset face tracking"""
-        self.previous_faces = []
+    def reset_tracking(self, restart_ids=False):
+        """Reset face tracking; track IDs keep counting up unless restart_ids"""
+        self.tracks.reset(restart_ids)
+        self.refinements = {}
+        self.frames_since_detection = 0
+        if self.box_tracker is not None:
+            self.box_tracker.reset()
         print("Face tracking reset")
     
+    def close(self):
+        """Stop the hybrid refinement thread, if any"""
+        if self.refiner is not None:
+            self.refiner.stop()
+    
     def adjust_sensitivity(self, increase=True):
         """Adjust detection sensitivity"""
-        if self.mtcnn_available:
+        if self.backend != 'haar':
+            name = self.backend.upper()
             if increase:
-                self.confidence_threshold = max(0.5, self.confidence_threshold - 0.05)
-                print(f"MTCNN sensitivity increased (threshold: {self.confidence_threshold:.2f})")
+                self.confidence_threshold = max(0.3 if self.backend == 'ssd' else 0.5, self.confidence_threshold - 0.05)
+                print(f"{name} sensitivity increased (threshold: {self.confidence_threshold:.2f})")
             else:
                 self.confidence_threshold = min(0.99, self.confidence_threshold + 0.05)
-                print(f"MTCNN sensitivity decreased (threshold: {self.confidence_threshold:.2f})")
+                print(f"{name} sensitivity decreased (threshold: {self.confidence_threshold:.2f})")
         else:
-            print("Sensitivity adjustment only available with MTCNN")
+            print("Sensitivity adjustment not available with the Haar cascade")
@@ -0,0 +1,220 @@
+import cv2
+import numpy as np
+
+# Normalizations a plan can apply:
+#   contrast - equalizeHist + blur + per-face contrast normalization (float32)
+#   scale    - pixels / 255 (float32)
+#   graph    - raw uint8 pixels, normalized inside the model graph
+NORMALIZATIONS = ('contrast', 'scale', 'graph')
+
+
+class PreprocessingPlan:
+    """Preprocessing the loaded model expects, built once from its input shape
+
+    Holds the target size, interpolation, channel layout and normalization
+    so every entry point feeds the model the same way.
+    """
+
+    def __init__(self, height, width, channels=1, interpolation=cv2.INTER_LINEAR,
+                 normalization='contrast'):
+        if normalization not in NORMALIZATIONS:
+            raise ValueError(f"Unknown normalization '{normalization}', expected one of {NORMALIZATIONS}")
+        if channels != 1:
+            raise ValueError(f"Emotion models take grayscale (H, W, 1) input, got {channels} channels")
+
+        self.height = height
+        self.width = width
+        self.channels = channels
+        self.interpolation = interpolation
+        self.normalization = normalization
+        self.dtype = np.uint8 if normalization == 'graph' else np.float32
+
+    @classmethod
+    def from_input_shape(cls, input_shape, **kwargs):
+        """Build the plan for a model with a Keras-style (None, H, W, C) input shape
+
+        Raises:
+            ValueError: if the shape is not a channels-last grayscale image
+        """
+        input_shape = tuple(input_shape)
+        if len(input_shape) != 4:
+            raise ValueError(f"Expected a (batch, height, width, channels) model input, got {input_shape}")
+
+        _, height, width, channels = input_shape
+        if input_shape[1] in (1, 3) and channels not in (1, 3):
+            raise ValueError(f"Model input {input_shape} looks channels-first; only channels-last models are supported")
+        if not height or not width:
+            raise ValueError(f"Model input {input_shape} has no fixed height/width")
+        return cls(int(height), int(width), int(channels), **kwargs)
+
+    @property
+    def input_shape(self):
+        """Keras-style batch shape the plan produces"""
+        return (None, self.height, self.width, self.channels)
+
+    def __repr__(self):
+        return (f"PreprocessingPlan({self.height}x{self.width}x{self.channels}, "
+                f"normalization={self.normalization}, interpolation={self.interpolation})")
+
+
+class FacePreprocessor:
+    """Batched face preprocessing into a reusable (N, H, W, 1) buffer
+
+    Runs the plan's steps (grayscale, resize, then for the 'contrast'
+    normalization histogram equalization, 3x3 Gaussian blur and per-face
+    contrast normalization) but writes every intermediate into
+    preallocated buffers with OpenCV dst= arguments and in-place NumPy
+    ops, so a steady-state frame allocates no image-sized arrays.
+
+    With the 'graph' normalization the batch is left as uint8 pixels and
+    the contrast normalization runs inside the model (see
+    normalize_batch_tf).
+    """
+
+    def __init__(self, plan):
+        """
+        Args:
+            plan: PreprocessingPlan for the loaded model
+        """
+        self.plan = plan
+        self.height, self.width = plan.height, plan.width
+        self.dtype = plan.dtype
+
+        # Scratch images, reused for every face
+        self._gray_arena = np.empty(0, dtype=np.uint8)
+        self._resized = np.empty((self.height, self.width), dtype=np.uint8)
+        self._blurred = np.empty((self.height, self.width), dtype=np.uint8)
+
+        # Batch buffer, grows to the largest face count seen
+        self._batch = np.empty((0, self.height, self.width, 1), dtype=self.dtype)
+
+    def _batch_buffer(self, count):
+        """Return the batch buffer, growing it when a frame has more faces"""
+        if len(self._batch) < count:
+            self._batch = np.empty((count, self.height, self.width, 1), dtype=self.dtype)
+        return self._batch
+
+    def _gray(self, face_image):
+        """Grayscale view of the crop, converted into the reusable arena"""
+        if face_image.ndim == 2:
+            return face_image
+        if face_image.ndim == 3 and face_image.shape[2] == 1:
+            return face_image[:, :, 0]
+
+        h, w = face_image.shape[:2]
+        if self._gray_arena.size < h * w:
+            self._gray_arena = np.empty(h * w, dtype=np.uint8)
+        gray = self._gray_arena[:h * w].reshape(h, w)
+        code = cv2.COLOR_BGRA2GRAY if face_image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        cv2.cvtColor(face_image, code, dst=gray)
+        return gray
+
+    def process_into(self, face_image, out):
+        """Preprocess one crop into out, an (H, W) slice of a batch buffer"""
+        gray = self._gray(face_image)
+        cv2.resize(gray, (self.width, self.height), dst=self._resized,
+                   interpolation=self.plan.interpolation)
+
+        if self.plan.normalization == 'scale':
+            out[...] = self._resized
+            out *= np.float32(1.0 / 255.0)
+            return out
+
+        cv2.equalizeHist(self._resized, dst=self._resized)
+        cv2.GaussianBlur(self._resized, (3, 3), 0, dst=self._blurred)
+
+        if self.plan.normalization == 'graph':
+            out[...] = self._blurred
+            return out
+
+        # Local contrast normalization on [0, 1] pixels:
+        #   ((clip((x - mean) / std, -3, 3) + 3) / 6
+        # mean/std come from the uint8 image so no float temporary is made
+        mean, std = cv2.meanStdDev(self._blurred)
+        mean = float(mean[0, 0]) / 255.0
+        std = float(std[0, 0]) / 255.0
+        out[...] = self._blurred
+        if std > 0:
+            out *= np.float32(1.0 / (255.0 * std))
+            out -= np.float32(mean / std)
+            np.clip(out, -3, 3, out=out)
+            out *= np.float32(1.0 / 6.0)
+            out += np.float32(0.5)
+        else:
+            out *= np.float32(1.0 / 255.0)
+        return out
+
+    def preprocess_batch(self, face_images):
+        """Preprocess every valid crop of a frame into the batch buffer
+
+        Returns:
+            (batch, slots): batch is an (N, H, W, 1) view of the internal
+            buffer, valid until the next call; slots holds the index of
+            the input crop each batch row came from
+        """
+        batch = self._batch_buffer(len(face_images))
+        slots = []
+        for i, face_image in enumerate(face_images):
+            if face_image is None or face_image.size == 0:
+                print("Empty or invalid face image for emotion prediction.")
+                continue
+            try:
+                self.process_into(face_image, batch[len(slots), :, :, 0])
+            except cv2.error as e:
+                print(f"Face preprocessing error: {e}")
+                continue
+            slots.append(i)
+        return batch[:len(slots)], slots
+
+    def preprocess(self, face_image):
+        """Preprocess a single crop, returning a new (H, W) array"""
+        out = np.empty((self.height, self.width), dtype=self.dtype)
+        return self.process_into(face_image, out)
+
+
+def preprocessor_for_model(model, run_model=None, num_outputs=7, normalization='contrast'):
+    """FacePreprocessor sized from a model's input shape, checked with one
+    forward pass on a blank crop
+
+    Args:
+        model: model with a Keras-style input_shape
+        run_model: callable taking a preprocessed batch and returning the
+            model output (default: model(batch, training=False))
+        num_outputs: probabilities the model must return per face
+        normalization: one of NORMALIZATIONS
+
+    Raises:
+        ValueError: if the model does not accept the plan's output or
+            returns the wrong shape, at load time instead of on every face
+    """
+    if run_model is None:
+        run_model = lambda batch: model(batch, training=False)
+    plan = PreprocessingPlan.from_input_shape(model.input_shape, normalization=normalization)
+    preprocessor = FacePreprocessor(plan)
+
+    probe, _ = preprocessor.preprocess_batch([np.zeros((plan.height, plan.width), dtype=np.uint8)])
+    try:
+        output = np.asarray(run_model(probe))
+    except Exception as e:
+        raise ValueError(f"Emotion model rejected {plan}: {e}") from e
+    if output.shape != (1, num_outputs):
+        raise ValueError(f"Emotion model returned shape {output.shape}, expected (1, {num_outputs})")
+    return preprocessor
+
+
+def normalize_batch_tf(batch):
+    """In-graph version of the contrast normalization for uint8 input
+
+    Args:
+        batch: (N, H, W, C) uint8 tensor from a 'graph' plan
+
+    Returns:
+        float32 tensor matching the 'contrast' plan
+    """
+    import tensorflow as tf
+
+    x = tf.cast(batch, tf.float32) / 255.0
+    mean, variance = tf.nn.moments(x, axes=[1, 2, 3], keepdims=True)
+    std = tf.sqrt(variance)
+    normalized = (tf.clip_by_value((x - mean) / tf.maximum(std, 1e-12), -3.0, 3.0) + 3.0) / 6.0
+    return tf.where(std > 0, normalized, x)
@@ -0,0 +1,186 @@
+import cv2
+import numpy as np
+
+# Trackers that can carry face boxes between full detections:
+#   flow  - sparse Lucas-Kanade optical flow on corners inside each box
+#           (core OpenCV, one call for all faces)
+#   kcf   - OpenCV KCF tracker per face (needs opencv-contrib-python)
+#   mosse - OpenCV MOSSE tracker per face (needs opencv-contrib-python)
+TRACKER_METHODS = ('flow', 'kcf', 'mosse')
+
+
+def _contrib_tracker_factory(method):
+    """KCF/MOSSE constructor from opencv-contrib, or None when not installed"""
+    names = {'kcf': 'TrackerKCF_create', 'mosse': 'TrackerMOSSE_create'}[method]
+    for module in (getattr(cv2, 'legacy', None), cv2):
+        factory = getattr(module, names, None) if module is not None else None
+        if factory is not None:
+            return factory
+    return None
+
+
+class FaceBoxTracker:
+    """Moves face boxes from the last detection to the current frame
+
+    start() is called with the faces of a full detection; update() then
+    returns the same face dicts with their 'bbox' moved to the current
+    frame, dropping faces that were lost. After each update, confidence
+    holds the weakest face's tracking confidence (1.0 with no faces), so
+    the caller can fall back to the detector when it drops.
+
+    Flow tracking seeds up to max_points corners in the central part of
+    each box, tracks them forward and back with pyramidal Lucas-Kanade
+    and keeps the points whose round trip lands within fb_threshold
+    pixels. A box moves by the median point displacement and scales by
+    the median change in point spacing; its confidence is the fraction
+    of its seeded points still tracked.
+    """
+
+    def __init__(self, method='flow', max_points=30, min_points=4, fb_threshold=1.0):
+        """
+        Args:
+            method: one of TRACKER_METHODS; kcf and mosse fall back to flow
+                when opencv-contrib is not installed
+            max_points: corners seeded per face (flow)
+            min_points: tracked corners below which a face is lost (flow)
+            fb_threshold: forward-backward error in pixels above which a
+                corner is rejected (flow)
+        """
+        if method not in TRACKER_METHODS:
+            raise ValueError(f"Unknown tracker '{method}', expected one of {TRACKER_METHODS}")
+        self.factory = None
+        if method != 'flow':
+            self.factory = _contrib_tracker_factory(method)
+            if self.factory is None:
+                print(f"{method.upper()} tracker needs opencv-contrib-python, using optical flow")
+                method = 'flow'
+        self.method = method
+        self.max_points = max_points
+        self.min_points = min_points
+        self.fb_threshold = fb_threshold
+        self.lk_params = dict(winSize=(15, 15), maxLevel=2,
+                              criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 10, 0.03))
+        self.reset()
+
+    def reset(self):
+        self.faces = []
+        self.confidence = 1.0
+        self.prev_gray = None
+        self.points = None       # (N, 1, 2) float32 corners of all faces
+        self.owners = None       # face index of each corner
+        self.seeded = []         # corners seeded per face
+        self.trackers = []
+
+    def start(self, frame, faces):
+        """Start tracking the faces of a full detection on frame"""
+        self.reset()
+        self.faces = [dict(face) for face in faces]
+        if not self.faces:
+            return
+        if self.factory is not None:
+            for face in self.faces:
+                tracker = self.factory()
+                tracker.init(frame, tuple(int(v) for v in face['bbox']))
+                self.trackers.append(tracker)
+            return
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        points, owners = [], []
+        for index, face in enumerate(self.faces):
+            x, y, w, h = face['bbox']
+            # Central part of the box: corners on the background would drag it
+            mask = np.zeros(gray.shape, dtype=np.uint8)
+            mask[max(0, y + h // 8):max(0, y + h - h // 8), max(0, x + w // 8):max(0, x + w - w // 8)] = 255
+            corners = cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, max(2, min(w, h) // 12), mask=mask)
+            count = 0 if corners is None else len(corners)
+            self.seeded.append(count)
+            if count:
+                points.append(corners.astype(np.float32))
+                owners.extend([index] * count)
+        self.prev_gray = gray
+        if points:
+            self.points = np.concatenate(points)
+            self.owners = np.asarray(owners)
+
+    def correct(self, boxes):
+        """Replace the boxes of tracked faces, {track_id: bbox}, e.g. with a
+        refined detection; the contrib trackers keep their own estimate"""
+        for face in self.faces:
+            if face.get('track_id') in boxes:
+                face['bbox'] = boxes[face['track_id']]
+
+    def update(self, frame):
+        """Face dicts with boxes moved to frame; lost faces are dropped"""
+        if not self.faces:
+            self.confidence = 1.0
+            return []
+        if self.factory is not None:
+            return self._update_contrib(frame)
+        return self._update_flow(frame)
+
+    def _update_contrib(self, frame):
+        faces, trackers = [], []
+        for face, tracker in zip(self.faces, self.trackers):
+            ok, bbox = tracker.update(frame)
+            if ok:
+                face = dict(face, bbox=tuple(int(round(v)) for v in bbox), tracking_confidence=1.0)
+                faces.append(face)
+                trackers.append(tracker)
+        self.confidence = 1.0 if len(faces) == len(self.faces) else 0.0
+        self.faces, self.trackers = faces, trackers
+        return [dict(face) for face in faces]
+
+    def _update_flow(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+        if self.points is None:
+            self.faces = []
+            self.confidence = 0.0
+            return []
+
+        forward, status, _ = cv2.calcOpticalFlowPyrLK(self.prev_gray, gray, self.points, None, **self.lk_params)
+        backward, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.prev_gray, forward, None, **self.lk_params)
+        fb_error = np.linalg.norm((backward - self.points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (fb_error < self.fb_threshold)
+
+        old = self.points.reshape(-1, 2)
+        new = forward.reshape(-1, 2)
+        height, width = gray.shape[:2]
+        faces, keep, seeded = [], np.zeros(len(good), dtype=bool), []
+        confidence = 1.0
+        for index, face in enumerate(self.faces):
+            mine = good & (self.owners == index)
+            count = int(mine.sum())
+            face_confidence = count / self.seeded[index] if self.seeded[index] else 0.0
+            confidence = min(confidence, face_confidence)
+            if count < self.min_points:
+                continue
+
+            before, after = old[mine], new[mine]
+            dx, dy = np.median(after - before, axis=0)
+            # Scale from the change in distance of each point to the centroid
+            spread_before = np.linalg.norm(before - before.mean(axis=0), axis=1)
+            spread_after = np.linalg.norm(after - after.mean(axis=0), axis=1)
+            valid = spread_before > 1.0
+            scale = float(np.median(spread_after[valid] / spread_before[valid])) if valid.any() else 1.0
+
+            x, y, w, h = face['bbox']
+            cx, cy = x + w / 2 + dx, y + h / 2 + dy
+            w, h = w * scale, h * scale
+            bbox = (int(round(cx - w / 2)), int(round(cy - h / 2)), int(round(w)), int(round(h)))
+            if bbox[0] + bbox[2] <= 0 or bbox[1] + bbox[3] <= 0 or bbox[0] >= width or bbox[1] >= height:
+                continue  # Left the frame
+
+            keep |= mine
+            seeded.append(self.seeded[index])
+            faces.append(dict(face, bbox=bbox, tracking_confidence=face_confidence))
+
+        # Owners renumbered to the surviving faces
+        survivors = [index for index in range(len(self.faces)) if (keep & (self.owners == index)).any()]
+        remap = {old_index: new_index for new_index, old_index in enumerate(survivors)}
+        self.owners = np.asarray([remap[o] for o in self.owners[keep]], dtype=int)
+        self.points = forward[keep] if keep.any() else None
+        self.seeded = seeded
+        self.faces = faces
+        self.prev_gray = gray
+        self.confidence = confidence
+        return [dict(face) for face in faces]
@@ -0,0 +1,98 @@
+import cv2
+
+# Images a FrameContext can derive from its frame:
+#   frame     - the BGR frame itself
+#   gray      - grayscale
+#   equalized - histogram-equalized grayscale
+#   rgb       - RGB (MTCNN input)
+IMAGE_KINDS = ('frame', 'gray', 'equalized', 'rgb')
+
+
+class FrameContext:
+    """Derived images of one frame, each computed at most once
+
+    Detection, box tracking, face quality scoring and emotion preprocessing
+    all need the frame in grayscale, equalized, downscaled or in RGB.
+    image(kind, scale) builds each (kind, scale) on first use and keeps it
+    for the frame, and crop() hands out views of the cached images, so the
+    stages share one full-frame conversion instead of each doing their own.
+
+    A region() of the frame (e.g. a search window around a known face)
+    takes its grayscale as a view of the frame's; what it derives from
+    that (downscaled, equalized) is cached on the region.
+    """
+
+    def __init__(self, frame, parent=None, offset=(0, 0)):
+        """
+        Args:
+            frame: BGR (or grayscale) frame
+            parent: FrameContext this one is a region of, if any
+            offset: (x, y) of the region in the parent frame
+        """
+        self.frame = frame
+        self._parent = parent
+        self._offset = offset
+        self._images = {}
+
+    @classmethod
+    def of(cls, frame):
+        """frame as a FrameContext, wrapping a bare image"""
+        return frame if isinstance(frame, cls) else cls(frame)
+
+    @property
+    def shape(self):
+        return self.frame.shape
+
+    @property
+    def gray(self):
+        return self.image('gray')
+
+    @property
+    def equalized(self):
+        return self.image('equalized')
+
+    @property
+    def rgb(self):
+        return self.image('rgb')
+
+    def image(self, kind='frame', scale=1.0):
+        """The frame as kind, resized by scale (<= 1.0), computed on first use"""
+        key = (kind, scale)
+        image = self._images.get(key)
+        if image is None:
+            image = self._images[key] = self._build(kind, scale)
+        return image
+
+    def _build(self, kind, scale):
+        if kind not in IMAGE_KINDS:
+            raise ValueError(f"Unknown image kind '{kind}', expected one of {IMAGE_KINDS}")
+        if kind == 'frame':
+            if scale >= 1.0:
+                return self.frame
+            return cv2.resize(self.frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        if kind == 'gray':
+            # Convert at full resolution once; smaller scales resize the gray image
+            if scale < 1.0:
+                return cv2.resize(self.gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+            if self._parent is not None:
+                x, y = self._offset
+                height, width = self.frame.shape[:2]
+                return self._parent.gray[y:y + height, x:x + width]
+            if self.frame.ndim == 2:
+                return self.frame
+            code = cv2.COLOR_BGRA2GRAY if self.frame.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+            return cv2.cvtColor(self.frame, code)
+        if kind == 'equalized':
+            return cv2.equalizeHist(self.image('gray', scale))
+        # Only MTCNN needs RGB: convert the already downscaled frame
+        return cv2.cvtColor(self.image('frame', scale), cv2.COLOR_BGR2RGB)
+
+    def region(self, x0, y0, x1, y1):
+        """Context for the part of the frame inside (x0, y0, x1, y1)"""
+        return FrameContext(self.frame[y0:y1, x0:x1], parent=self, offset=(x0, y0))
+
+    def crop(self, bbox, kind='gray'):
+        """View of the kind image inside bbox (x, y, w, h), clipped to the frame"""
+        x, y, w, h = (int(v) for v in bbox)
+        x0, y0 = max(0, x), max(0, y)
+        return self.image(kind)[y0:max(y0, y + h), x0:max(x0, x + w)]
@@ -0,0 +1,259 @@
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from frame_context import FrameContext
+from stage_timing import timings, FACE_COUNT_EDGES
+
+
+class LatestQueue:
+    """Bounded queue that drops the oldest item when full
+
+    Consumers always get the newest work; anything a slow stage could not
+    keep up with is discarded and counted instead of backing up.
+    """
+
+    def __init__(self, maxsize=1, name=None):
+        self._items = deque()
+        self.name = name
+        self._maxsize = maxsize
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) >= self._maxsize:
+                self._items.popleft()
+                self.dropped += 1
+                timings.count('frames_dropped', where=f'before_{self.name}')
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Next item, or None on timeout or once the queue is closed and empty"""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            return self._items.popleft() if self._items else None
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        return len(self._items)
+
+
+class FramePacket:
+    """One captured frame and everything the stages attach to it
+
+    context caches the frame's grayscale and other derived images, so
+    detection and inference share them instead of converting again.
+    """
+
+    __slots__ = ('seq', 'frame', 'context', 'timestamps', 'faces', 'boxes', 'crops', 'track_ids', 'predictions')
+
+    def __init__(self, seq, frame, captured_at=None):
+        self.seq = seq
+        self.frame = frame
+        self.context = FrameContext(frame)
+        self.timestamps = {'capture': time.perf_counter() if captured_at is None else captured_at}
+        self.faces = []
+        self.boxes = []
+        self.crops = []
+        self.track_ids = []
+        self.predictions = []
+
+    def age_ms(self):
+        """Milliseconds since the frame was captured"""
+        return (time.perf_counter() - self.timestamps['capture']) * 1000
+
+
+class FramePipeline:
+    """Capture, detection and inference each on their own worker thread
+
+    Stages are connected by drop-oldest queues, so a slow MTCNN frame or
+    inference batch never stalls capture, and inference always runs on
+    the newest detected frame. Results are read with get_result() from
+    the main thread, which does the drawing and cv2.imshow (OpenCV
+    windows must stay on the main thread).
+
+    Stage callables:
+        capture() -> frame, or (frame, captured_at) with a time.perf_counter
+            timestamp from the grabber, or None at end of stream
+        detect(packet) -> fills packet.faces / boxes / crops / track_ids
+        infer(packet) -> fills packet.predictions
+    """
+
+    STAGES = ('capture', 'detect', 'infer')
+
+    def __init__(self, capture, detect, infer, queue_size=1, max_latency_ms=500):
+        """
+        Args:
+            capture, detect, infer: stage callables (see class docstring)
+            queue_size: slots between stages; older packets are dropped
+            max_latency_ms: packets older than this are dropped before
+                detection or inference instead of being processed late
+        """
+        self.capture = capture
+        self.detect = detect
+        self.infer = infer
+        self.max_latency_ms = max_latency_ms
+
+        self.detect_queue = LatestQueue(queue_size, 'detect')
+        self.infer_queue = LatestQueue(queue_size, 'infer')
+        self.result_queue = LatestQueue(queue_size, 'display')
+
+        self.running = False
+        self._threads = []
+        self._seq = 0
+
+        # Statistics
+        self.counts = {stage: 0 for stage in self.STAGES}
+        self.stale = 0
+        self.errors = 0
+        self.latencies_ms = deque(maxlen=1000)
+
+    def start(self):
+        """Start the worker threads"""
+        self.running = True
+        self._threads = [
+            threading.Thread(target=self._capture_loop, name='capture', daemon=True),
+            threading.Thread(target=self._stage_loop, args=('detect', self.detect, self.detect_queue, self.infer_queue),
+                             name='detect', daemon=True),
+            threading.Thread(target=self._stage_loop, args=('infer', self.infer, self.infer_queue, self.result_queue),
+                             name='infer', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        """Stop the workers and wait for them to finish"""
+        self.running = False
+        for queue in (self.detect_queue, self.infer_queue, self.result_queue):
+            queue.close()
+        for thread in self._threads:
+            thread.join(timeout=2.0)
+
+    def _capture_loop(self):
+        # A failing capture ends the stream: closing the queue lets the
+        # downstream stages drain and finish instead of waiting forever
+        try:
+            while self.running:
+                frame = self.capture()
+                if frame is None:
+                    # End of stream
+                    self.running = False
+                    break
+                captured_at = None
+                if isinstance(frame, tuple):
+                    frame, captured_at = frame
+                self._seq += 1
+                self.counts['capture'] += 1
+                timings.count('frames_captured')
+                self.detect_queue.put(FramePacket(self._seq, frame, captured_at))
+        except Exception as e:
+            self.errors += 1
+            self.running = False
+            print(f"Pipeline capture error: {e}")
+        finally:
+            self.detect_queue.close()
+
+    def _stage_loop(self, name, work, inbox, outbox):
+        # Runs until the upstream stage closes its queue and it is drained
+        while True:
+            packet = inbox.get(timeout=0.1)
+            if packet is None:
+                if inbox.closed:
+                    break
+                continue
+            if packet.age_ms() > self.max_latency_ms:
+                self.stale += 1
+                timings.count('frames_dropped', where='stale')
+                continue
+            try:
+                work(packet)
+            except Exception as e:
+                self.errors += 1
+                print(f"Pipeline {name} error: {e}")
+                continue
+            packet.timestamps[name] = time.perf_counter()
+            self.counts[name] += 1
+            self._count_results(name, packet)
+            outbox.put(packet)
+        outbox.close()
+
+    @staticmethod
+    def _count_results(name, packet):
+        """Faces-per-frame and emotion counters for the metrics endpoint"""
+        if name == 'detect':
+            timings.observe('faces_per_frame', len(packet.faces), FACE_COUNT_EDGES)
+        elif name == 'infer':
+            for emotion, _ in packet.predictions:
+                if emotion:
+                    timings.count('emotions', emotion=emotion)
+
+    @property
+    def finished(self):
+        """True once every stage has stopped and all results were read"""
+        return self.result_queue.closed and len(self.result_queue) == 0
+
+    def get_result(self, timeout=0.1):
+        """Newest fully processed packet, or None if none arrived in time"""
+        packet = self.result_queue.get(timeout)
+        if packet is not None:
+            packet.timestamps['result'] = time.perf_counter()
+            self.latencies_ms.append(packet.age_ms())
+        return packet
+
+    def queue_depths(self):
+        """Packets waiting in front of each stage"""
+        return {
+            'detect': len(self.detect_queue),
+            'infer': len(self.infer_queue),
+            'display': len(self.result_queue),
+        }
+
+    def stats(self):
+        """Stage counts, drops and capture-to-result latency percentiles"""
+        latencies = np.array(self.latencies_ms) if self.latencies_ms else np.zeros(1)
+        return {
+            'captured': self.counts['capture'],
+            'detected': self.counts['detect'],
+            'inferred': self.counts['infer'],
+            'dropped': {
+                'before_detect': self.detect_queue.dropped,
+                'before_infer': self.infer_queue.dropped,
+                'before_display': self.result_queue.dropped,
+                'stale': self.stale,
+            },
+            'errors': self.errors,
+            'latency_ms': {
+                'p50': float(np.percentile(latencies, 50)),
+                'p95': float(np.percentile(latencies, 95)),
+                'max': float(latencies.max()),
+            },
+        }
+
+    def print_summary(self):
+        """Print the end-of-run pipeline report"""
+        stats = self.stats()
+        dropped = stats['dropped']
+        latency = stats['latency_ms']
+        print("\n" + "="*60)
+        print("📊 PIPELINE SUMMARY")
+        print("="*60)
+        print(f"Frames captured: {stats['captured']} | detected: {stats['detected']} | inferred: {stats['inferred']}")
+        print(f"Dropped: {dropped['before_detect']} before detect, {dropped['before_infer']} before infer, "
+              f"{dropped['before_display']} before display, {dropped['stale']} stale")
+        print(f"Capture-to-result latency: p50 {latency['p50']:.1f} ms | "
+              f"p95 {latency['p95']:.1f} ms | max {latency['max']:.1f} ms")
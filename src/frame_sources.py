@@ -0,0 +1,338 @@
+"""
+Frame sources the entry points and benchmarks read from
+Every source exposes open() -> bool, isOpened(), read(timeout) returning
+(frame, timestamp, seq) or None, release() and stats(), like CameraSource.
+`live` is True only for a real camera (entry points mirror live frames).
+
+Replay sources run in one of two paces:
+    fast      - every frame, as fast as the consumer reads
+    realtime  - frames become due at the source fps; a consumer that falls
+                behind skips frames like it would on a live camera
+"""
+
+import glob
+import os
+import time
+
+import cv2
+import numpy as np
+
+from camera_source import CameraSource
+from stage_timing import timings
+
+PACES = ('fast', 'realtime')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+
+class ReplaySource:
+    """Pacing, looping and counters shared by file and synthetic sources
+
+    Subclasses implement _open(), _next_frame() (None at the end),
+    _skip(count) and _rewind().
+    """
+
+    live = False
+
+    def __init__(self, pace='fast', fps=30.0, loop=False):
+        if pace not in PACES:
+            raise ValueError(f"Unknown pace '{pace}', expected one of {PACES}")
+        self.pace = pace
+        self.fps = fps
+        self.loop = loop
+
+        self.seq = 0
+        self.delivered = 0
+        self.dropped = 0
+        self._index = 0       # position of the next frame in the stream
+        self._start = None
+        self._opened = False
+
+    def open(self):
+        self._opened = self._open()
+        self._start = time.perf_counter()
+        return self._opened
+
+    def isOpened(self):
+        return self._opened
+
+    def read(self, timeout=1.0):
+        """Next frame as (frame, timestamp, seq), or None at the end of the stream"""
+        if not self._opened:
+            return None
+
+        timestamp = time.perf_counter()
+        if self.pace == 'realtime':
+            due = int((timestamp - self._start) * self.fps)
+            if due > self._index:
+                # Consumer fell behind: skip what a camera would have dropped
+                skipped = self._skip(due - self._index)
+                self._index += skipped
+                self.seq += skipped
+                self.dropped += skipped
+                timings.count('frames_dropped', skipped, where='source')
+            else:
+                time.sleep(max(0.0, self._start + self._index / self.fps - timestamp))
+            timestamp = self._start + self._index / self.fps
+
+        frame = self._next_frame()
+        if frame is None and self.loop and self._index:
+            self._rewind()
+            self._start = time.perf_counter() - self._index / self.fps
+            frame = self._next_frame()
+        if frame is None:
+            self._opened = False
+            return None
+
+        if self.pace == 'fast':
+            timestamp = time.perf_counter()
+        self._index += 1
+        self.seq += 1
+        self.delivered += 1
+        return frame, timestamp, self.seq
+
+    def release(self):
+        self._opened = False
+
+    def stats(self):
+        """Delivered and skipped frame counts, like CameraSource.stats()"""
+        grabbed = self.delivered + self.dropped
+        return {
+            'grabbed': grabbed,
+            'delivered': self.delivered,
+            'dropped': self.dropped,
+            'drop_rate': self.dropped / grabbed if grabbed else 0.0,
+        }
+
+
+class VideoFileSource(ReplaySource):
+    """Frames of a recorded video file"""
+
+    def __init__(self, path, pace='fast', fps=None, loop=False):
+        """
+        Args:
+            path: any file cv2.VideoCapture can read
+            pace: 'fast' or 'realtime'
+            fps: replay rate for realtime pace (default: the file's own fps)
+            loop: start over at the end instead of ending the stream
+        """
+        super().__init__(pace, fps or 30.0, loop)
+        self.path = path
+        self._fps_override = fps
+        self.cap = None
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            return False
+        file_fps = self.cap.get(cv2.CAP_PROP_FPS)
+        if not self._fps_override and file_fps > 0:
+            self.fps = file_fps
+        return True
+
+    def _next_frame(self):
+        ret, frame = self.cap.read()
+        return frame if ret else None
+
+    def _skip(self, count):
+        # grab() advances without decoding
+        skipped = 0
+        while skipped < count and self.cap.grab():
+            skipped += 1
+        return skipped
+
+    def _rewind(self):
+        self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._index = 0
+
+    def release(self):
+        super().release()
+        if self.cap is not None:
+            self.cap.release()
+
+
+class ImageDirectorySource(ReplaySource):
+    """Images of a directory in file name order, one per frame"""
+
+    def __init__(self, path, pace='fast', fps=30.0, loop=False):
+        super().__init__(pace, fps, loop)
+        self.path = path
+        self.files = []
+
+    def _open(self):
+        self.files = sorted(f for f in glob.glob(os.path.join(self.path, '*'))
+                            if f.lower().endswith(IMAGE_EXTENSIONS))
+        return bool(self.files)
+
+    def _next_frame(self):
+        while self._index < len(self.files):
+            frame = cv2.imread(self.files[self._index])
+            if frame is not None:
+                return frame
+            print(f"⚠️  Skipping unreadable image {self.files[self._index]}")
+            self._index += 1
+        return None
+
+    def _skip(self, count):
+        count = min(count, len(self.files) - self._index)
+        return max(count, 0)
+
+    def _rewind(self):
+        self._index = 0
+
+
+def draw_face(size, rng):
+    """Simple frontal face drawing: skin oval, brows, eyes, nose and mouth"""
+    face = np.zeros((size, size, 3), dtype=np.uint8)
+    skin = tuple(int(c) for c in rng.integers((90, 120, 170), (140, 170, 230)))
+    face[:] = tuple(c // 2 for c in skin)
+    c = size // 2
+    cv2.ellipse(face, (c, c), (int(size * 0.38), int(size * 0.48)), 0, 0, 360, skin, -1)
+    for side in (-1, 1):
+        eye = (c + side * size // 6, int(size * 0.42))
+        cv2.line(face, (eye[0] - size // 12, eye[1] - size // 10), (eye[0] + size // 12, eye[1] - size // 10),
+                 (40, 40, 60), max(1, size // 40))
+        cv2.ellipse(face, eye, (size // 14, size // 28), 0, 0, 360, (240, 240, 240), -1)
+        cv2.circle(face, eye, size // 40 + 1, (30, 30, 30), -1)
+    cv2.line(face, (c, int(size * 0.45)), (c - size // 30, int(size * 0.6)), tuple(s - 40 for s in skin),
+             max(1, size // 50))
+    smile = int(rng.integers(-size // 20, size // 12))
+    cv2.ellipse(face, (c, int(size * 0.7)), (size // 7, abs(smile) + 1), 0,
+                0 if smile >= 0 else 180, 180 if smile >= 0 else 360, (50, 50, 120), max(1, size // 30))
+    return cv2.GaussianBlur(face, (3, 3), 0)
+
+
+class SyntheticFaceSource(ReplaySource):
+    """Face crops composited onto backgrounds at set positions
+
+    Reproducible input for throughput tests without a camera: the same
+    seed gives the same frames. Faces drift by up to `motion` pixels
+    around their positions so trackers and caches see realistic change.
+    `boxes` holds the ground-truth (x, y, w, h) of the last frame read.
+    """
+
+    def __init__(self, faces=1, positions=None, backgrounds=None, frame_size=(640, 480),
+                 num_frames=300, pace='fast', fps=30.0, loop=False, motion=4, seed=0):
+        """
+        Args:
+            faces: number of drawn faces, or a list of BGR face crops
+            positions: (x, y, w, h) per face (default: spread across the frame)
+            backgrounds: list of BGR images, cycled every 100 frames (default: generated)
+            frame_size: (width, height)
+            num_frames: stream length
+            pace, fps, loop: see ReplaySource
+            motion: maximum drift in pixels around each position
+            seed: random seed for drawn faces, backgrounds and motion
+        """
+        super().__init__(pace, fps, loop)
+        self.frame_size = frame_size
+        self.num_frames = num_frames
+        self.motion = motion
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
+        width, height = frame_size
+        count = faces if isinstance(faces, int) else len(faces)
+        self.positions = list(positions) if positions is not None else self._layout(count)
+        if isinstance(faces, int):
+            faces = [draw_face(w, self.rng) for (_, _, w, _) in self.positions]
+        self.faces = [cv2.resize(face, (w, h)) for face, (_, _, w, h) in zip(faces, self.positions)]
+
+        if backgrounds is None:
+            backgrounds = [self._background(width, height) for _ in range(2)]
+        self.backgrounds = [cv2.resize(bg, (width, height)) for bg in backgrounds]
+
+        self.boxes = []
+        self._frame = None
+
+    def _layout(self, count):
+        """Evenly spaced face boxes on one or two rows"""
+        if count == 0:
+            return []
+        width, height = self.frame_size
+        rows = 1 if count <= 3 else 2
+        cols = -(-count // rows)
+        size = int(min(width / cols, height / rows) * 0.6)
+        positions = []
+        for i in range(count):
+            row, col = divmod(i, cols)
+            x = int((col + 0.5) * width / cols - size / 2)
+            y = int((row + 0.5) * height / rows - size / 2)
+            positions.append((x, y, size, size))
+        return positions
+
+    def _background(self, width, height):
+        """Smooth random room-like background: muted blotches with a colour cast"""
+        small = self.rng.integers(40, 200, (height // 40 + 1, width // 40 + 1, 1), dtype=np.int16)
+        tint = self.rng.integers(-20, 21, 3, dtype=np.int16)
+        small = np.clip(small + tint, 0, 255).astype(np.uint8)
+        return cv2.resize(small, (width, height), interpolation=cv2.INTER_CUBIC)
+
+    def _open(self):
+        return True
+
+    def _next_frame(self):
+        if self._index >= self.num_frames:
+            return None
+        width, height = self.frame_size
+        background = self.backgrounds[(self._index // 100) % len(self.backgrounds)]
+        if self._frame is None:
+            self._frame = np.empty_like(background)
+        frame = self._frame
+        frame[:] = background
+
+        # Deterministic per-frame drift, so skipping frames does not change later ones
+        t = self._index / self.fps
+        self.boxes = []
+        for i, (face, (x, y, w, h)) in enumerate(zip(self.faces, self.positions)):
+            dx = int(self.motion * np.sin(t * 1.3 + i))
+            dy = int(self.motion * np.cos(t * 0.9 + 2 * i))
+            x = min(max(0, x + dx), width - w)
+            y = min(max(0, y + dy), height - h)
+            frame[y:y+h, x:x+w] = face
+            self.boxes.append((x, y, w, h))
+        # Consumers keep frames across pipeline stages, so hand out a copy
+        return frame.copy()
+
+    def _skip(self, count):
+        count = min(count, self.num_frames - self._index)
+        return max(count, 0)
+
+    def _rewind(self):
+        self._index = 0
+
+
+def open_source(spec=None, pace='fast', loop=False, fps=None):
+    """Build and open a frame source from a command-line style spec
+
+    spec:
+        None, 'camera' or a device index such as '0'  -> CameraSource
+        'synthetic' or 'synthetic:N'                  -> SyntheticFaceSource with N faces
+        a directory                                   -> ImageDirectorySource
+        anything else                                 -> VideoFileSource
+
+    Returns the opened source, or None if it could not be opened.
+    """
+    spec = '0' if spec in (None, 'camera') else str(spec)
+    if spec.isdigit():
+        source = CameraSource(int(spec))
+    elif spec == 'synthetic' or spec.startswith('synthetic:'):
+        faces = int(spec.split(':', 1)[1]) if ':' in spec else 1
+        source = SyntheticFaceSource(faces, pace=pace, fps=fps or 30.0, loop=loop)
+    elif os.path.isdir(spec):
+        source = ImageDirectorySource(spec, pace=pace, fps=fps or 30.0, loop=loop)
+    else:
+        source = VideoFileSource(spec, pace=pace, fps=fps, loop=loop)
+
+    if not source.open():
+        return None
+    return source
+
+
+def add_source_arguments(parser):
+    """Add the --source / --pace / --loop options shared by the entry points"""
+    parser.add_argument('--source', default='0',
+                        help="Camera index, video file, image directory or synthetic[:N] (default: camera 0)")
+    parser.add_argument('--pace', choices=PACES, default='realtime',
+                        help="Replay pace for file and synthetic sources (default: realtime)")
+    parser.add_argument('--loop', action='store_true', help="Replay file sources forever")
+    return parser
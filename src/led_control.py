@@ -12,6 +12,8 @@ import time
 from enum import Enum
 import threading
 
+from stage_timing import timings
+
 class MoodCategory(Enum):
     """Emotion to Mood mapping"""
     POSITIVE = "positive"      # Happy, Surprise
@@ -64,6 +66,7 @@ class LEDController:
         emotion_lower = emotion.lower().strip()
         return self.emotion_to_mood_map.get(emotion_lower, MoodCategory.NEUTRAL)
     
+    @timings.timed('actuate')
     def send_command_to_arduino(self, command):
         """
         Send command to Arduino via serial connection
@@ -73,13 +76,16 @@ class LEDController:
         """
         if self.ser is None or not self.ser.is_open:
             print(f"[LED] Simulation: {command}")
+            timings.count('serial_commands', result='dropped')
             return
         
         try:
             self.ser.write((command + '\n').encode())
             print(f"[LED] Sent to Arduino: {command}")
+            timings.count('serial_commands', result='sent')
         except Exception as e:
             print(f"[LED] Error sending command: {e}")
+            timings.count('serial_commands', result='dropped')
     
     def all_leds_off(self):
         """Turn off both LEDs"""
@@ -1,6 +1,8 @@
+import argparse
 import cv2
 import numpy as np
 import os
+import time
 import warnings
 
 os.environ['TF_CPP_MIN_LOG_LEVEL'] = '3'
@@ -9,8 +11,17 @@ warnings.filterwarnings('ignore')
 print("Loading detectors...")
 from face_detector_advanced import AdvancedFaceDetector
 from emotion_detector import AdvancedEmotionDetector
+from frame_pipeline import FramePipeline
+from frame_sources import open_source, add_source_arguments
+from stage_timing import timings, draw_overlay
+from app_config import display_settings
+from metrics_server import add_metrics_argument, start_metrics_server
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Face and emotion detection")
+    args = add_metrics_argument(add_source_arguments(parser)).parse_args(argv)
+    start_metrics_server(args.metrics_port)
+    
     print("\n" + "="*60)
     print("FACIAL RECOGNITION WITH EMOTION DETECTION")
     print("="*60)
@@ -19,38 +30,37 @@ def main():
     face_detector = AdvancedFaceDetector()
     
     print("[Loading] Emotion Detector...")
-    emotion_detector = AdvancedEmotionDetector()
+    # Refresh faces adaptively within a 20 ms inference budget per frame
+    emotion_detector = AdvancedEmotionDetector(refresh_budget_ms=20)
     
-    print("[Loading] Camera...")
-    cap = cv2.VideoCapture(0)
+    print("[Loading] Frame source...")
+    # Live camera (grabbed on its own thread, settings from config.ini) or a replay source
+    source = open_source(args.source, pace=args.pace, loop=args.loop)
     
-    if not cap.isOpened():
-        print("❌ Error: Could not open camera")
+    if source is None:
+        print(f"❌ Error: Could not open frame source {args.source!r}")
+        face_detector.close()
         return
     
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-    cap.set(cv2.CAP_PROP_FPS, 30)
-    
     print("\n✅ All systems ready!")
     print("Press 'q' to quit\n")
     print("="*60 + "\n")
     
-    frame_count = 0
+    def capture():
+        # Wait for the next frame; a live camera only hands out the newest one
+        while source.isOpened():
+            grabbed = source.read()
+            if grabbed is not None:
+                frame, timestamp, _ = grabbed
+                # Mirror the live view only; replayed footage stays as recorded
+                return (cv2.flip(frame, 1) if source.live else frame), timestamp
+        return None
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
-        
-        frame_count += 1
-        frame = cv2.flip(frame, 1)
-        
-        # Detect faces
-        faces = face_detector.detect_faces(frame)
-        
-        # Process each face and get emotion
-        for face in faces:
+    def detect(packet):
+        """Detect faces and collect valid crops for one batched prediction"""
+        frame = packet.frame
+        packet.faces = face_detector.detect_faces(packet.context)
+        for face in packet.faces:
             x, y, w, h = face['bbox']
             
             # Validate coordinates
@@ -62,40 +72,65 @@ def main():
             w = min(w, frame.shape[1] - x)
             h = min(h, frame.shape[0] - y)
             
-            # Extract face region
-            face_img = frame[y:y+h, x:x+w]
+            # Grayscale face region, shared with detection
+            face_img = packet.context.crop((x, y, w, h))
             
             if face_img is not None and face_img.size > 0:
-                # Get emotion prediction
-                emotion, confidence = emotion_detector.predict_emotion(face_img)
-                
-                # Draw face box
-                face_detector.draw_faces(frame, [face])
+                packet.crops.append(face_img)
+                packet.track_ids.append(face['track_id'])
+                packet.boxes.append((face, x, y))
+    
+    def infer(packet):
+        """Get emotion predictions for all faces of the frame at once"""
+        packet.predictions = emotion_detector.predict_emotions(packet.crops, packet.track_ids)
+    
+    # FPS and stage-timing overlay switches from config.ini
+    display = display_settings()
+    
+    # Capture, detection and inference run on their own threads; this loop
+    # only draws and displays the newest result
+    pipeline = FramePipeline(capture, detect, infer).start()
+    
+    while not pipeline.finished:
+        packet = pipeline.get_result()
+        if packet is None:
+            continue
+        frame = packet.frame
+        draw_start = time.perf_counter()
+        
+        for (face, x, y), (emotion, confidence) in zip(packet.boxes, packet.predictions):
+            # Draw face box
+            face_detector.draw_faces(frame, [face])
+            
+            # Draw emotion label
+            if emotion:
+                label = f"{emotion.upper()}: {confidence*100:.0f}%"
+                color = (0, 255, 0)
                 
-                # Draw emotion label
-                if emotion:
-                    label = f"{emotion.upper()}: {confidence*100:.0f}%"
+                # Emotion colors
+                if emotion == 'happy':
                     color = (0, 255, 0)
-                    
-                    # Emotion colors
-                    if emotion == 'happy':
-                        color = (0, 255, 0)
-                    elif emotion == 'sad':
-                        color = (255, 0, 0)
-                    elif emotion == 'angry':
-                        color = (0, 0, 255)
-                    elif emotion == 'fear':
-                        color = (255, 0, 255)
-                    elif emotion == 'neutral':
-                        color = (128, 128, 128)
-                    
-                    cv2.putText(frame, label, (x, y-10), 
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+                elif emotion == 'sad':
+                    color = (255, 0, 0)
+                elif emotion == 'angry':
+                    color = (0, 0, 255)
+                elif emotion == 'fear':
+                    color = (255, 0, 255)
+                elif emotion == 'neutral':
+                    color = (128, 128, 128)
+                
+                cv2.putText(frame, label, (x, y-10), 
+                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
         
         # Display stats
-        cv2.putText(frame, f"Faces: {len(faces)} | Frame: {frame_count}", 
+        cv2.putText(frame, f"Faces: {len(packet.faces)} | Frame: {packet.seq} | Latency: {packet.age_ms():.0f} ms", 
                    (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         
+        timings.record('draw', (time.perf_counter() - draw_start) * 1000)
+        timings.frame()
+        draw_overlay(frame, queue_depths=pipeline.queue_depths(),
+                     show_fps=display['show_fps'], show_info_panel=display['show_info_panel'])
+        
         # Show frame
         cv2.imshow('Face & Emotion Detection', frame)
         
@@ -103,8 +138,20 @@ def main():
         if cv2.waitKey(1) & 0xFF == ord('q'):
             break
     
-    cap.release()
+    # Releasing the source ends the capture stage, so the pipeline drains promptly
+    source.release()
+    pipeline.stop()
+    face_detector.close()
+    pipeline.print_summary()
+    timings.print_summary()
+    source_stats = source.stats()
+    print(f"Source: {source_stats['grabbed']} frames, {source_stats['dropped']} never processed")
     cv2.destroyAllWindows()
+    
+    # Per-track refresh stats, for tuning the budget
+    for track_id, stats in emotion_detector.scheduler.stats().items():
+        print(f"Track {track_id}: {stats['refreshes']}/{stats['frames']} frames refreshed "
+              f"({stats['refresh_rate']*100:.0f}%), interval {stats['interval']}, last {stats['emotion']}")
     print("\n✅ System closed")
 
 if __name__ == "__main__":
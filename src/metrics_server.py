@@ -0,0 +1,153 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from stage_timing import timings
+
+METRIC_PREFIX = 'emotion_'
+DEFAULT_METRICS_PORT = 9108
+
+HELP = {
+    'frames_captured': 'Frames handed to the pipeline by the frame source',
+    'frames_dropped': 'Frames discarded before being fully processed, by where they were dropped',
+    'emotions': 'Emotion results per face, by emotion',
+    'inference_run': 'Faces that went through the emotion model',
+    'inference_skipped': 'Faces served from the refresh scheduler or result cache',
+    'serial_commands': 'LED/LCD commands to the Arduino, by result',
+    'rfid_scans': 'RFID card scans, by result',
+    'faces_per_frame': 'Faces detected per frame',
+    'analysis_session_seconds': 'Duration of RFID-triggered emotion analysis sessions',
+}
+
+
+def _labels(pairs):
+    if not pairs:
+        return ''
+    escaped = ((k, str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for k, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for k, v in escaped) + '}'
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _histogram_lines(name, histogram, labels=(), scale=1.0):
+    """Cumulative _bucket/_sum/_count lines for one StageHistogram"""
+    counts = list(histogram.counts)
+    lines = []
+    cumulative = 0
+    for edge, n in zip(histogram.edges, counts):
+        cumulative += n
+        lines.append(f'{name}_bucket{_labels(labels + (("le", f"{edge * scale:.6g}"),))} {cumulative}')
+    cumulative += counts[-1]
+    lines.append(f'{name}_bucket{_labels(labels + (("le", "+Inf"),))} {cumulative}')
+    lines.append(f'{name}_sum{_labels(labels)} {_format_value(histogram.total_ms * scale)}')
+    lines.append(f'{name}_count{_labels(labels)} {cumulative}')
+    return lines
+
+
+def render_metrics(stage_timings=None):
+    """Prometheus text exposition of every counter and histogram
+
+    Runs on the scrape thread and reads snapshots taken under the
+    timings' locks, so the frame loop's concurrent updates are never
+    seen half-applied.
+    """
+    stage_timings = stage_timings or timings
+    lines = []
+    stages, values = stage_timings.snapshot_histograms()
+
+    counters = {}
+    for key, value in stage_timings.snapshot_counters().items():
+        name, labels = key if isinstance(key, tuple) else (key, ())
+        counters.setdefault(name, []).append((labels, value))
+    for name in sorted(counters):
+        metric = f'{METRIC_PREFIX}{name}_total'
+        if name in HELP:
+            lines.append(f'# HELP {metric} {HELP[name]}')
+        lines.append(f'# TYPE {metric} counter')
+        for labels, value in sorted(counters[name]):
+            lines.append(f'{metric}{_labels(labels)} {value}')
+
+    if stages:
+        metric = f'{METRIC_PREFIX}stage_latency_seconds'
+        lines.append(f'# HELP {metric} Latency of each pipeline stage')
+        lines.append(f'# TYPE {metric} histogram')
+        for stage in sorted(stages):
+            lines.extend(_histogram_lines(metric, stages[stage], (('stage', stage),), scale=0.001))
+
+    for name, histogram in sorted(values.items()):
+        metric = f'{METRIC_PREFIX}{name}'
+        if name in HELP:
+            lines.append(f'# HELP {metric} {HELP[name]}')
+        lines.append(f'# TYPE {metric} histogram')
+        lines.extend(_histogram_lines(metric, histogram))
+
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_metrics(self.server.stage_timings).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Keep scrapes out of the console
+        pass
+
+
+class MetricsServer:
+    """Serves /metrics in Prometheus text format from a background thread
+
+    Binds to localhost only; put a reverse proxy or node exporter in front
+    to collect from other machines.
+    """
+
+    def __init__(self, port=DEFAULT_METRICS_PORT, host='127.0.0.1', stage_timings=None):
+        self.port = port
+        self.host = host
+        self.stage_timings = stage_timings or timings
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        self._server = ThreadingHTTPServer((self.host, self.port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.stage_timings = self.stage_timings
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def add_metrics_argument(parser):
+    """Add the opt-in --metrics-port option shared by the entry points"""
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help=f"Serve Prometheus metrics on http://127.0.0.1:PORT/metrics "
+                             f"(e.g. {DEFAULT_METRICS_PORT}; off by default)")
+    return parser
+
+
+def start_metrics_server(port):
+    """Start the endpoint if a port was given; returns the server or None"""
+    if port is None:
+        return None
+    try:
+        server = MetricsServer(port).start()
+    except OSError as e:
+        print(f"⚠️  Metrics endpoint not started on port {port}: {e}")
+        return None
+    print(f"✓ Metrics at http://127.0.0.1:{server.port}/metrics")
+    return server
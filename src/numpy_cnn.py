@@ -0,0 +1,381 @@
+"""
+Pure-NumPy inference engine for the emotion CNN
+Reads the layer graph and weights straight from a Keras .h5 file with h5py
+and runs a batched forward pass without TensorFlow
+
+Supports the layers used by the bundled mini_XCEPTION model and by the
+models built in emotion_detector.py: InputLayer, Conv2D, SeparableConv2D,
+BatchNormalization, Activation, MaxPooling2D, Add, GlobalAveragePooling2D,
+Flatten, Dense and Dropout (channels_last, no dilation).
+
+Outputs match Keras to within 1e-5 absolute on the softmax probabilities
+(float32 accumulation order differs slightly from TensorFlow's kernels);
+benchmarks/bench_numpy_backend.py checks this tolerance.
+"""
+
+import json
+
+import h5py
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+SUPPORTED_LAYERS = {
+    'InputLayer', 'Conv2D', 'SeparableConv2D', 'BatchNormalization', 'Activation',
+    'MaxPooling2D', 'Add', 'GlobalAveragePooling2D', 'Flatten', 'Dense', 'Dropout'
+}
+
+# Layers that only forward their input at inference time
+PASSTHROUGH_LAYERS = {'InputLayer', 'Dropout'}
+
+
+def _as_str(value):
+    return value.decode('utf-8') if isinstance(value, bytes) else value
+
+
+def _inbound_layer_names(inbound_nodes):
+    """Names of the layers feeding the first node (Keras 2 and Keras 3 formats)"""
+    names = []
+
+    def visit(obj):
+        if isinstance(obj, dict):
+            history = obj.get('config', {}).get('keras_history') if obj.get('class_name') == '__keras_tensor__' else None
+            if history:
+                names.append(history[0])
+                return
+            for value in obj.values():
+                visit(value)
+        elif isinstance(obj, list):
+            # Keras 2 node entry: [layer_name, node_index, tensor_index, kwargs]
+            if obj and isinstance(obj[0], str):
+                names.append(obj[0])
+                return
+            for value in obj:
+                visit(value)
+
+    if inbound_nodes:
+        visit(inbound_nodes[0])
+    return names
+
+
+def _same_padding(size, kernel, stride):
+    """TensorFlow 'same' padding: output size and (before, after) padding"""
+    out = -(-size // stride)
+    total = max((out - 1) * stride + kernel - size, 0)
+    return out, (total // 2, total - total // 2)
+
+
+class NumpyEmotionModel:
+    """Batched forward pass of a Keras .h5 CNN using NumPy only"""
+
+    def __init__(self, model_path):
+        """
+        Args:
+            model_path: Keras .h5 file containing both model_config and weights
+        """
+        self.model_path = model_path
+        with h5py.File(model_path, 'r') as f:
+            config = json.loads(_as_str(f.attrs['model_config']))
+            weights_root = f['model_weights'] if 'model_weights' in f else f
+            self.layers, self.input_shape, self.output_name = self._parse_graph(config, weights_root)
+
+        # Consumers per tensor, so intermediate outputs can be dropped early
+        self.consumers = {}
+        for layer in self.layers:
+            for name in layer['inbound']:
+                self.consumers[name] = self.consumers.get(name, 0) + 1
+
+        # Preallocated work buffers keyed by layer, grown to the largest batch seen
+        self.buffers = {}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _parse_graph(self, config, weights_root):
+        """Turn a Keras model config into an ordered list of layer specs"""
+        class_name = config['class_name']
+        model_config = config['config']
+        layer_configs = model_config['layers'] if isinstance(model_config, dict) else model_config
+
+        input_shape = None
+        layers = []
+        previous = '__input__'
+
+        for layer_config in layer_configs:
+            kind = layer_config['class_name']
+            cfg = layer_config['config']
+            name = layer_config.get('name', cfg.get('name'))
+
+            if kind not in SUPPORTED_LAYERS:
+                raise ValueError(f"Layer type {kind} ({name}) is not supported by the NumPy engine")
+
+            batch_shape = cfg.get('batch_input_shape') or cfg.get('batch_shape')
+            if batch_shape and input_shape is None:
+                input_shape = (None,) + tuple(batch_shape[1:])
+
+            if class_name == 'Sequential':
+                inbound = [previous]
+            elif kind == 'InputLayer':
+                inbound = ['__input__']
+            else:
+                inbound = _inbound_layer_names(layer_config.get('inbound_nodes', []))
+
+            layer = {
+                'name': name,
+                'kind': kind,
+                'inbound': inbound,
+                'config': cfg,
+                'weights': self._read_weights(weights_root, name),
+            }
+            self._validate(layer)
+            self._prepare(layer)
+            layers.append(layer)
+            previous = name
+
+        if input_shape is None:
+            raise ValueError("Model config does not declare an input shape")
+
+        if class_name == 'Sequential':
+            output_name = previous
+        else:
+            output_name = model_config['output_layers'][0][0]
+        return layers, input_shape, output_name
+
+    def _read_weights(self, weights_root, layer_name):
+        """Read a layer's weights as {short_name: float32 array}"""
+        if layer_name not in weights_root:
+            return {}
+        group = weights_root[layer_name]
+        weights = {}
+        for weight_name in group.attrs.get('weight_names', []):
+            weight_name = _as_str(weight_name)
+            short_name = weight_name.split('/')[-1].split(':')[0]
+            weights[short_name] = np.asarray(group[weight_name], dtype=np.float32)
+        return weights
+
+    def _validate(self, layer):
+        cfg = layer['config']
+        if cfg.get('data_format', 'channels_last') != 'channels_last':
+            raise ValueError(f"{layer['name']}: only channels_last is supported")
+        if tuple(cfg.get('dilation_rate', (1, 1))) != (1, 1):
+            raise ValueError(f"{layer['name']}: dilated convolutions are not supported")
+        if cfg.get('depth_multiplier', 1) != 1:
+            raise ValueError(f"{layer['name']}: depth_multiplier != 1 is not supported")
+
+    def _prepare(self, layer):
+        """Precompute per-layer constants (reshaped kernels, folded BN)"""
+        kind = layer['kind']
+        w = layer['weights']
+        cfg = layer['config']
+
+        if kind == 'Conv2D':
+            kh, kw, cin, cout = w['kernel'].shape
+            # im2col rows are ordered (kh, kw, cin), matching the kernel layout
+            layer['kernel2d'] = np.ascontiguousarray(w['kernel'].reshape(kh * kw * cin, cout))
+        elif kind == 'SeparableConv2D':
+            layer['depthwise'] = np.ascontiguousarray(w['depthwise_kernel'][:, :, :, 0])
+            pointwise = w['pointwise_kernel']
+            layer['pointwise2d'] = np.ascontiguousarray(pointwise.reshape(pointwise.shape[2], pointwise.shape[3]))
+        elif kind == 'BatchNormalization':
+            channels = w['moving_mean'].shape[0]
+            gamma = w.get('gamma', np.ones(channels, np.float32))
+            beta = w.get('beta', np.zeros(channels, np.float32))
+            scale = gamma / np.sqrt(w['moving_variance'] + cfg.get('epsilon', 1e-3))
+            layer['scale'] = scale.astype(np.float32)
+            layer['shift'] = (beta - w['moving_mean'] * scale).astype(np.float32)
+
+    # ------------------------------------------------------------------
+    # Buffers
+    # ------------------------------------------------------------------
+
+    def _buffer(self, key, shape, fill=None):
+        """Return a preallocated array view of the given shape"""
+        buffer = self.buffers.get(key)
+        if buffer is None or buffer.shape[0] < shape[0] or buffer.shape[1:] != tuple(shape[1:]):
+            if fill is None:
+                buffer = np.empty(shape, dtype=np.float32)
+            else:
+                buffer = np.full(shape, fill, dtype=np.float32)
+            self.buffers[key] = buffer
+        return buffer[:shape[0]]
+
+    def _padded(self, key, x, kernel, strides, padding, fill):
+        """Copy x into a preallocated padded buffer whose border holds fill"""
+        n, h, w, c = x.shape
+        if padding == 'same':
+            oh, (top, bottom) = _same_padding(h, kernel[0], strides[0])
+            ow, (left, right) = _same_padding(w, kernel[1], strides[1])
+        else:
+            oh = (h - kernel[0]) // strides[0] + 1
+            ow = (w - kernel[1]) // strides[1] + 1
+            top = bottom = left = right = 0
+
+        if top == bottom == left == right == 0:
+            return x, oh, ow
+
+        # The border is written once at allocation; only the interior changes
+        padded = self._buffer(key, (n, h + top + bottom, w + left + right, c), fill=fill)
+        padded[:, top:top + h, left:left + w] = x
+        return padded, oh, ow
+
+    # ------------------------------------------------------------------
+    # Layers
+    # ------------------------------------------------------------------
+
+    def _activation(self, x, activation):
+        """Apply an activation in place"""
+        if activation in (None, 'linear'):
+            return x
+        if activation == 'relu':
+            np.maximum(x, 0, out=x)
+        elif activation == 'softmax':
+            x -= x.max(axis=-1, keepdims=True)
+            np.exp(x, out=x)
+            x /= x.sum(axis=-1, keepdims=True)
+        elif activation == 'sigmoid':
+            np.negative(x, out=x)
+            np.exp(x, out=x)
+            x += 1
+            np.reciprocal(x, out=x)
+        elif activation == 'tanh':
+            np.tanh(x, out=x)
+        else:
+            raise ValueError(f"Activation {activation} is not supported by the NumPy engine")
+        return x
+
+    def _conv2d(self, layer, x):
+        cfg = layer['config']
+        kh, kw, cin, cout = layer['weights']['kernel'].shape
+        sh, sw = cfg['strides']
+        n = x.shape[0]
+
+        xp, oh, ow = self._padded(layer['name'] + '/pad', x, (kh, kw), (sh, sw), cfg['padding'], 0.0)
+
+        # im2col: gather every (kh, kw, cin) patch into one row of a reusable buffer
+        cols = self._buffer(layer['name'] + '/cols', (n, oh, ow, kh, kw, cin))
+        if kh == kw == 1:
+            cols[:, :, :, 0, 0, :] = xp[:, :(oh - 1) * sh + 1:sh, :(ow - 1) * sw + 1:sw]
+        else:
+            windows = sliding_window_view(xp, (kh, kw), axis=(1, 2))[:, ::sh, ::sw][:, :oh, :ow]
+            np.copyto(cols, windows.transpose(0, 1, 2, 4, 5, 3))
+
+        out = self._buffer(layer['name'] + '/out', (n, oh, ow, cout))
+        np.matmul(cols.reshape(-1, kh * kw * cin), layer['kernel2d'], out=out.reshape(-1, cout))
+        if 'bias' in layer['weights']:
+            out += layer['weights']['bias']
+        return self._activation(out, cfg.get('activation'))
+
+    def _separable_conv2d(self, layer, x):
+        cfg = layer['config']
+        depthwise = layer['depthwise']
+        kh, kw, c = depthwise.shape
+        sh, sw = cfg['strides']
+        n = x.shape[0]
+
+        xp, oh, ow = self._padded(layer['name'] + '/pad', x, (kh, kw), (sh, sw), cfg['padding'], 0.0)
+
+        # Depthwise step: shift-and-accumulate over the kernel taps
+        acc = self._buffer(layer['name'] + '/depthwise', (n, oh, ow, c))
+        tap = self._buffer(layer['name'] + '/tap', (n, oh, ow, c))
+        acc.fill(0)
+        for i in range(kh):
+            for j in range(kw):
+                window = xp[:, i:i + (oh - 1) * sh + 1:sh, j:j + (ow - 1) * sw + 1:sw]
+                np.multiply(window, depthwise[i, j], out=tap)
+                acc += tap
+
+        # Pointwise step: 1x1 convolution as a single matmul
+        cout = layer['pointwise2d'].shape[1]
+        out = self._buffer(layer['name'] + '/out', (n, oh, ow, cout))
+        np.matmul(acc.reshape(-1, c), layer['pointwise2d'], out=out.reshape(-1, cout))
+        if 'bias' in layer['weights']:
+            out += layer['weights']['bias']
+        return self._activation(out, cfg.get('activation'))
+
+    def _max_pooling2d(self, layer, x):
+        cfg = layer['config']
+        ph, pw = cfg['pool_size']
+        sh, sw = cfg.get('strides') or cfg['pool_size']
+        n, _, _, c = x.shape
+
+        xp, oh, ow = self._padded(layer['name'] + '/pad', x, (ph, pw), (sh, sw), cfg['padding'], -np.inf)
+
+        out = self._buffer(layer['name'] + '/out', (n, oh, ow, c))
+        out[...] = xp[:, :(oh - 1) * sh + 1:sh, :(ow - 1) * sw + 1:sw]
+        for i in range(ph):
+            for j in range(pw):
+                if i or j:
+                    np.maximum(out, xp[:, i:i + (oh - 1) * sh + 1:sh, j:j + (ow - 1) * sw + 1:sw], out=out)
+        return out
+
+    def _batch_normalization(self, layer, x):
+        out = self._buffer(layer['name'] + '/out', x.shape)
+        np.multiply(x, layer['scale'], out=out)
+        out += layer['shift']
+        return out
+
+    def _dense(self, layer, x):
+        kernel = layer['weights']['kernel']
+        out = self._buffer(layer['name'] + '/out', (x.shape[0], kernel.shape[1]))
+        np.matmul(x, kernel, out=out)
+        if 'bias' in layer['weights']:
+            out += layer['weights']['bias']
+        return self._activation(out, layer['config'].get('activation'))
+
+    def _run_layer(self, layer, inputs):
+        kind = layer['kind']
+        x = inputs[0]
+
+        if kind in PASSTHROUGH_LAYERS:
+            return x
+        if kind == 'Conv2D':
+            return self._conv2d(layer, x)
+        if kind == 'SeparableConv2D':
+            return self._separable_conv2d(layer, x)
+        if kind == 'BatchNormalization':
+            return self._batch_normalization(layer, x)
+        if kind == 'MaxPooling2D':
+            return self._max_pooling2d(layer, x)
+        if kind == 'Dense':
+            return self._dense(layer, x)
+        if kind == 'Flatten':
+            return x.reshape(x.shape[0], -1)
+        if kind == 'Activation':
+            out = self._buffer(layer['name'] + '/out', x.shape)
+            out[...] = x
+            return self._activation(out, layer['config']['activation'])
+        if kind == 'Add':
+            out = self._buffer(layer['name'] + '/out', x.shape)
+            np.add(inputs[0], inputs[1], out=out)
+            for other in inputs[2:]:
+                out += other
+            return out
+        if kind == 'GlobalAveragePooling2D':
+            out = self._buffer(layer['name'] + '/out', (x.shape[0], x.shape[3]))
+            np.mean(x, axis=(1, 2), out=out)
+            return out
+        raise ValueError(f"Layer type {kind} is not supported by the NumPy engine")
+
+    # ------------------------------------------------------------------
+    # Inference
+    # ------------------------------------------------------------------
+
+    def predict(self, batch):
+        """Run the network on a float32 (N, H, W, C) batch of preprocessed faces"""
+        batch = np.ascontiguousarray(batch, dtype=np.float32)
+        tensors = {'__input__': batch}
+        remaining = dict(self.consumers)
+
+        for layer in self.layers:
+            inputs = [tensors[name] for name in layer['inbound']]
+            tensors[layer['name']] = self._run_layer(layer, inputs)
+
+            # Drop references to tensors no later layer needs
+            for name in layer['inbound']:
+                remaining[name] -= 1
+                if remaining[name] == 0 and name != self.output_name:
+                    del tensors[name]
+
+        # Outputs live in reusable buffers, so hand back a copy
+        return tensors[self.output_name].copy()
@@ -0,0 +1,151 @@
+import numpy as np
+
+
+class EmotionRefreshScheduler:
+    """Decides each frame which tracked faces get emotion inference
+
+    Faces are ranked by priority and admitted while the estimated
+    inference cost fits in budget_ms. Priority goes to new tracks, to
+    tracks that are low-confidence or whose emotion just changed, and to
+    larger faces. A stable, confident track is refreshed gradually less
+    often, down to once every max_interval frames. Faces that are not
+    refreshed keep their last result.
+    """
+
+    def __init__(self, budget_ms=20.0, min_interval=1, max_interval=15, max_age=30,
+                 reference_area=100 * 100):
+        """
+        Args:
+            budget_ms: inference time allowed per frame
+            min_interval: shortest refresh interval for any track (frames)
+            max_interval: longest refresh interval for a stable track (frames)
+            max_age: frames a track may go unseen before it is forgotten
+            reference_area: face area (pixels) that gets a size weight of 1
+        """
+        self.budget_ms = budget_ms
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_age = max_age
+        self.reference_area = reference_area
+        self.frame = 0
+
+        # Running estimate of inference cost per face, learned from record_cost
+        self.cost_per_face_ms = None
+
+        self.tracks = {}
+
+    def _estimated_cost(self, count):
+        """Estimated milliseconds to infer count faces in one batch"""
+        if self.cost_per_face_ms is None:
+            return 0.0
+        return self.cost_per_face_ms * count
+
+    def _interval(self, track):
+        """Frames a track may go without a refresh"""
+        if track['result'] is None or track['changed']:
+            return self.min_interval
+        # Confidence 0.5 -> min_interval, confidence 1.0 -> max_interval, growing with stable refreshes
+        stability = min(1.0, max(0.0, (track['confidence'] - 0.5) * 2)) * min(1.0, track['stable_refreshes'] / 3)
+        return self.min_interval + int(round((self.max_interval - self.min_interval) * stability))
+
+    def select(self, track_ids, areas):
+        """Return the track ids to refresh this frame; call once per frame
+
+        Args:
+            track_ids: ids of the faces in this frame
+            areas: face areas in pixels, same order
+
+        Returns:
+            set of track ids to run inference on
+        """
+        self.frame += 1
+
+        candidates = []
+        for track_id, area in zip(track_ids, areas):
+            track = self.tracks.get(track_id)
+            if track is None:
+                track = self.tracks[track_id] = {
+                    'first_seen': self.frame, 'last_seen': self.frame, 'last_refresh': None,
+                    'result': None, 'confidence': 0.0, 'changed': False, 'stable_refreshes': 0,
+                    'refreshes': 0, 'frames': 0,
+                }
+            track['last_seen'] = self.frame
+            track['frames'] += 1
+
+            if track['last_refresh'] is None:
+                # New track: always first in line
+                priority = float('inf')
+            else:
+                waited = self.frame - track['last_refresh']
+                if waited < self._interval(track):
+                    continue
+                priority = waited / self._interval(track)
+                priority *= 1.0 + 2.0 * (1.0 - track['confidence']) + (2.0 if track['changed'] else 0.0)
+                priority *= np.sqrt(max(area, 1) / self.reference_area)
+                # Overdue stable tracks must not starve behind busy ones
+                if waited >= self.max_interval:
+                    priority = max(priority, 1e6 + waited)
+            candidates.append((priority, track_id))
+
+        self._evict_stale()
+
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        selected = set()
+        for priority, track_id in candidates:
+            # The best candidate always runs so no frame starves completely
+            if selected and self._estimated_cost(len(selected) + 1) > self.budget_ms:
+                break
+            selected.add(track_id)
+        return selected
+
+    def update(self, track_id, emotion, confidence):
+        """Record a fresh result for a refreshed track"""
+        track = self.tracks.get(track_id)
+        if track is None:
+            return
+        previous = track['result']
+        track['changed'] = previous is not None and previous[0] != emotion
+        track['stable_refreshes'] = 0 if track['changed'] or previous is None else track['stable_refreshes'] + 1
+        track['result'] = (emotion, confidence)
+        track['confidence'] = confidence
+        track['last_refresh'] = self.frame
+        track['refreshes'] += 1
+
+    def last_result(self, track_id):
+        """Most recent (emotion, confidence) of a track, or None"""
+        track = self.tracks.get(track_id)
+        return None if track is None else track['result']
+
+    def record_cost(self, count, elapsed_ms):
+        """Feed back the measured time of one inference batch of count faces"""
+        if count <= 0:
+            return
+        per_face = elapsed_ms / count
+        if self.cost_per_face_ms is None:
+            self.cost_per_face_ms = per_face
+        else:
+            self.cost_per_face_ms = 0.8 * self.cost_per_face_ms + 0.2 * per_face
+
+    def _evict_stale(self):
+        """Forget tracks not seen for max_age frames"""
+        stale = [t for t, track in self.tracks.items() if self.frame - track['last_seen'] > self.max_age]
+        for track_id in stale:
+            del self.tracks[track_id]
+
+    def stats(self):
+        """Per-track refresh statistics for tuning"""
+        return {
+            track_id: {
+                'frames': track['frames'],
+                'refreshes': track['refreshes'],
+                'refresh_rate': track['refreshes'] / track['frames'] if track['frames'] else 0.0,
+                'interval': self._interval(track),
+                'confidence': track['confidence'],
+                'emotion': track['result'][0] if track['result'] else None,
+            }
+            for track_id, track in self.tracks.items()
+        }
+
+    def reset(self):
+        """Forget every track"""
+        self.tracks.clear()
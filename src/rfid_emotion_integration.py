@@ -4,6 +4,7 @@ RFID + Facial Emotion Detection Integration
 Listens to Arduino for RFID scan, then performs emotion analysis
 """
 
+import argparse
 import cv2
 import numpy as np
 import serial
@@ -19,6 +20,11 @@ warnings.filterwarnings('ignore')
 # Import emotion and face detectors
 from face_detector_advanced import AdvancedFaceDetector
 from emotion_detector import AdvancedEmotionDetector
+from frame_pipeline import FramePipeline
+from frame_sources import open_source, add_source_arguments
+from stage_timing import timings, draw_overlay, SESSION_SECONDS_EDGES
+from metrics_server import add_metrics_argument, start_metrics_server
+from app_config import display_settings
 
 class ArduinoRFIDListener:
     """Listens to Arduino RFID scanner"""
@@ -116,21 +122,21 @@ class EmotionAnalyzer:
         self.face_detector = AdvancedFaceDetector()
         
         print("Loading Emotion Detector...")
-        self.emotion_detector = AdvancedEmotionDetector()
+        # Refresh faces adaptively within a 20 ms inference budget per frame
+        self.emotion_detector = AdvancedEmotionDetector(refresh_budget_ms=20)
         
         self.cap = None
         self.analyzing = False
     
-    def start_camera(self):
-        """Start camera"""
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            print("❌ Cannot open camera")
+    def start_camera(self, source='0', pace='realtime', loop=True):
+        """Start camera, or a replay source (video, image directory, synthetic)"""
+        # A live camera is grabbed on its own thread with settings from
+        # config.ini, so an analysis always starts from a current frame
+        self.cap = open_source(source, pace=pace, loop=loop)
+        if self.cap is None:
+            print(f"❌ Cannot open frame source {source!r}")
             return False
         
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
         print("✅ Camera started")
         return True
     
@@ -148,19 +154,23 @@ class EmotionAnalyzer:
         print(f"\n🎥 Emotion Analysis Started ({duration}s)")
         print("="*60)
         
-        while self.analyzing and (time.time() - start_time) < duration:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
-            
-            frame_count += 1
-            frame = cv2.flip(frame, 1)
+        def capture():
+            # Only the newest frame is handed out; stops with the analysis
+            while self.analyzing and self.cap.isOpened():
+                grabbed = self.cap.read(timeout=0.1)
+                if grabbed is not None:
+                    frame, timestamp, _ = grabbed
+                    return (cv2.flip(frame, 1) if self.cap.live else frame), timestamp
+            return None
+        
+        def detect(packet):
+            frame = packet.frame
             
             # Detect faces
-            faces = self.face_detector.detect_faces(frame)
+            packet.faces = self.face_detector.detect_faces(packet.context)
             
-            # Analyze each face
-            for idx, face in enumerate(faces):
+            # Collect valid face crops for a single batched prediction
+            for face in packet.faces:
                 x, y, w, h = face['bbox']
                 
                 # Validate coordinates
@@ -172,23 +182,50 @@ class EmotionAnalyzer:
                 w = min(w, frame.shape[1] - x)
                 h = min(h, frame.shape[0] - y)
                 
-                face_img = frame[y:y+h, x:x+w]
+                # Grayscale face region, shared with detection
+                face_img = packet.context.crop((x, y, w, h))
                 
                 if face_img is not None and face_img.size > 0:
-                    emotion, confidence = self.emotion_detector.predict_emotion(face_img)
+                    packet.crops.append(face_img)
+                    packet.boxes.append((x, y, w, h))
+                    packet.track_ids.append(face['track_id'])
+        
+        def infer(packet):
+            # Analyze all faces at once, smoothing per tracked face
+            packet.predictions = self.emotion_detector.predict_emotions(packet.crops, packet.track_ids)
+        
+        # FPS and stage-timing overlay switches from config.ini
+        display = display_settings()
+        
+        # Capture, detection and inference run on their own threads; this
+        # loop only displays the newest result
+        pipeline = FramePipeline(capture, detect, infer).start()
+        
+        while self.analyzing and (time.time() - start_time) < duration and not pipeline.finished:
+            packet = pipeline.get_result()
+            if packet is None:
+                continue
+            
+            frame_count += 1
+            frame = packet.frame
+            draw_start = time.perf_counter()
+            faces = packet.faces
+            crop_boxes = packet.boxes
+            predictions = packet.predictions
+            
+            for (x, y, w, h), (emotion, confidence) in zip(crop_boxes, predictions):
+                if emotion:
+                    if emotion not in emotions_detected:
+                        emotions_detected[emotion] = 0
+                    emotions_detected[emotion] += 1
+                    
+                    # Draw on frame
+                    color = self.get_emotion_color(emotion)
+                    cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
                     
-                    if emotion:
-                        if emotion not in emotions_detected:
-                            emotions_detected[emotion] = 0
-                        emotions_detected[emotion] += 1
-                        
-                        # Draw on frame
-                        color = self.get_emotion_color(emotion)
-                        cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-                        
-                        label = f"{emotion}: {confidence*100:.0f}%"
-                        cv2.putText(frame, label, (x, y-10),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+                    label = f"{emotion}: {confidence*100:.0f}%"
+                    cv2.putText(frame, label, (x, y-10),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
             
             # Show info
             elapsed = int(time.time() - start_time)
@@ -198,12 +235,20 @@ class EmotionAnalyzer:
             cv2.putText(frame, "Press 'q' to stop", 
                        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 0, 0), 1)
             
+            timings.record('draw', (time.perf_counter() - draw_start) * 1000)
+            timings.frame()
+            draw_overlay(frame, queue_depths=pipeline.queue_depths(),
+                         show_fps=display['show_fps'], show_info_panel=display['show_info_panel'])
+            
             cv2.imshow('RFID + Emotion Detection', frame)
             
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
         
         self.analyzing = False
+        pipeline.stop()
+        timings.observe('analysis_session_seconds', time.time() - start_time, SESSION_SECONDS_EDGES)
+        timings.print_summary()
         
         # Show results
         print("\n" + "="*60)
@@ -244,9 +289,14 @@ class EmotionAnalyzer:
         """Stop camera"""
         if self.cap:
             self.cap.release()
+        self.face_detector.close()
         cv2.destroyAllWindows()
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RFID-triggered emotion analysis")
+    args = add_metrics_argument(add_source_arguments(parser)).parse_args(argv)
+    start_metrics_server(args.metrics_port)
+    
     print("\n" + "="*70)
     print("RFID + FACIAL EMOTION DETECTION SYSTEM")
     print("="*70)
@@ -267,7 +317,7 @@ def main():
     
     # Start camera
     print("\n[3/3] Starting Camera...")
-    if not analyzer.start_camera():
+    if not analyzer.start_camera(args.source, args.pace, loop=True):
         print("Cannot start camera")
         rfid.disconnect()
         return
@@ -289,6 +339,7 @@ def main():
             status = rfid.read_status()
             if status:
                 if "ACCESS_GRANTED" in status:
+                    timings.count('rfid_scans', result='granted')
                     print("\n" + "="*70)
                     print("✅ RFID CARD AUTHORIZED")
                     print("="*70)
@@ -297,6 +348,7 @@ def main():
                     print("\nWaiting for next RFID scan...\n")
                 
                 elif "ACCESS_DENIED" in status:
+                    timings.count('rfid_scans', result='denied')
                     print("\n" + "="*70)
                     print("❌ RFID CARD NOT AUTHORIZED")
                     print("="*70)
@@ -13,6 +13,7 @@ Flow:
    - Neutral → Both LEDs blink alternately
 """
 
+import argparse
 import cv2
 import numpy as np
 import serial
@@ -27,6 +28,12 @@ warnings.filterwarnings('ignore')
 
 # Import custom modules
 from emotion_detector import AdvancedEmotionDetector
+from track_association import FaceTrackAssociator
+from frame_pipeline import FramePipeline
+from frame_sources import open_source, add_source_arguments
+from stage_timing import timings, draw_overlay, SESSION_SECONDS_EDGES
+from metrics_server import add_metrics_argument, start_metrics_server
+from app_config import display_settings
 from led_control import LEDController
 
 class ArduinoRFIDListener:
@@ -110,7 +117,10 @@ class MoodDrivenEmotionAnalyzer:
         )
         
         print("Loading Emotion Detector...")
-        self.emotion_detector = AdvancedEmotionDetector()
+        # Refresh faces adaptively within a 20 ms inference budget per frame
+        self.emotion_detector = AdvancedEmotionDetector(refresh_budget_ms=20)
+        # Persistent face ids, so smoothing and refresh scheduling follow each person
+        self.face_tracks = FaceTrackAssociator()
         
         # Initialize LED controller
         self.led_controller = led_controller or LEDController(serial_connection=None)
@@ -119,16 +129,15 @@ class MoodDrivenEmotionAnalyzer:
         self.cap = None
         self.analyzing = False
     
-    def start_camera(self):
-        """Start camera"""
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
-            print("❌ Cannot open camera")
+    def start_camera(self, source='0', pace='realtime', loop=True):
+        """Start camera, or a replay source (video, image directory, synthetic)"""
+        # A live camera is grabbed on its own thread with settings from
+        # config.ini, so an analysis always starts from a current frame
+        self.cap = open_source(source, pace=pace, loop=loop)
+        if self.cap is None:
+            print(f"❌ Cannot open frame source {source!r}")
             return False
         
-        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-        self.cap.set(cv2.CAP_PROP_FPS, 30)
         print("✅ Camera started")
         return True
     
@@ -156,53 +165,79 @@ class MoodDrivenEmotionAnalyzer:
         print(f"💡 LED CONTROL ACTIVE")
         print(f"{'='*60}")
         
-        while self.analyzing and (time.time() - start_time) < duration:
-            ret, frame = self.cap.read()
-            if not ret:
-                break
+        def capture():
+            # Only the newest frame is handed out; stops with the analysis
+            while self.analyzing and self.cap.isOpened():
+                grabbed = self.cap.read(timeout=0.1)
+                if grabbed is not None:
+                    frame, timestamp, _ = grabbed
+                    return (cv2.flip(frame, 1) if self.cap.live else frame), timestamp
+            return None
+        
+        def detect(packet):
+            # Equalized grayscale, computed once for the frame
+            gray = packet.context.equalized
             
-            frame_count += 1
-            frame = cv2.flip(frame, 1)
+            # Detect faces using OpenCV
+            with timings.stage('detect'):
+                packet.faces = self.face_cascade.detectMultiScale(
+                    gray,
+                    scaleFactor=1.05,
+                    minNeighbors=5,
+                    minSize=(50, 50),
+                    maxSize=(400, 400)
+                )
             
-            # Convert to grayscale for face detection
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            gray = cv2.equalizeHist(gray)
+            # Haar boxes come in no stable order; track them for their ids
+            with timings.stage('track'):
+                tracked = self.face_tracks.update([{'bbox': tuple(int(v) for v in box)} for box in packet.faces],
+                                                  packet.seq)
+            packet.track_ids = [face['track_id'] for face in tracked]
+        
+        def infer(packet):
+            # Analyze all faces in a single batched prediction, per tracked face
+            face_crops = [packet.context.crop(face) for face in packet.faces]
+            packet.predictions = self.emotion_detector.predict_emotions(face_crops, packet.track_ids)
+        
+        # FPS and stage-timing overlay switches from config.ini
+        display = display_settings()
+        
+        # Capture, detection and inference run on their own threads; this
+        # loop only reacts to and displays the newest result
+        self.face_tracks.reset()
+        pipeline = FramePipeline(capture, detect, infer).start()
+        
+        while self.analyzing and (time.time() - start_time) < duration and not pipeline.finished:
+            packet = pipeline.get_result()
+            if packet is None:
+                continue
             
-            # Detect faces using OpenCV
-            faces = self.face_cascade.detectMultiScale(
-                gray,
-                scaleFactor=1.05,
-                minNeighbors=5,
-                minSize=(50, 50),
-                maxSize=(400, 400)
-            )
+            frame_count += 1
+            frame = packet.frame
+            draw_start = time.perf_counter()
+            faces = packet.faces
+            predictions = packet.predictions
             
-            # Analyze each face
-            for idx, (x, y, w, h) in enumerate(faces):
-                face_img = frame[y:y+h, x:x+w]
-                
-                if face_img is not None and face_img.size > 0:
-                    emotion, confidence = self.emotion_detector.predict_emotion(face_img)
+            for (x, y, w, h), (emotion, confidence) in zip(faces, predictions):
+                if emotion:
+                    current_emotion = emotion
+                    current_confidence = confidence
+                    
+                    if emotion not in emotions_detected:
+                        emotions_detected[emotion] = 0
+                    emotions_detected[emotion] += 1
                     
-                    if emotion:
-                        current_emotion = emotion
-                        current_confidence = confidence
-                        
-                        if emotion not in emotions_detected:
-                            emotions_detected[emotion] = 0
-                        emotions_detected[emotion] += 1
-                        
-                        # Get color for emotion
-                        color = self.get_emotion_color(emotion)
-                        
-                        # Draw on frame
-                        cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
-                        label = f"{emotion}: {confidence*100:.0f}%"
-                        cv2.putText(frame, label, (x, y-10),
-                                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
-                        
-                        # Control LEDs based on emotion (UPDATE EVERY FRAME)
-                        self.led_controller.set_mood(emotion, confidence, blink_frequency)
+                    # Get color for emotion
+                    color = self.get_emotion_color(emotion)
+                    
+                    # Draw on frame
+                    cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
+                    label = f"{emotion}: {confidence*100:.0f}%"
+                    cv2.putText(frame, label, (x, y-10),
+                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
+                    
+                    # Control LEDs based on emotion (UPDATE EVERY FRAME)
+                    self.led_controller.set_mood(emotion, confidence, blink_frequency)
             
             # Handle no faces - turn off LEDs
             if len(faces) == 0:
@@ -231,12 +266,20 @@ class MoodDrivenEmotionAnalyzer:
                     cv2.putText(frame, "LEDs → ALTERNATING", 
                                (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 0), 2)
             
+            timings.record('draw', (time.perf_counter() - draw_start) * 1000)
+            timings.frame()
+            draw_overlay(frame, queue_depths=pipeline.queue_depths(),
+                         show_fps=display['show_fps'], show_info_panel=display['show_info_panel'])
+            
             cv2.imshow('Mood-Driven LED Control System', frame)
             
             if cv2.waitKey(1) & 0xFF == ord('q'):
                 break
         
         self.analyzing = False
+        pipeline.stop()
+        timings.observe('analysis_session_seconds', time.time() - start_time, SESSION_SECONDS_EDGES)
+        timings.print_summary()
         
         # Turn off LEDs after analysis
         self.led_controller.all_leds_off()
@@ -294,7 +337,11 @@ class MoodDrivenEmotionAnalyzer:
         cv2.destroyAllWindows()
 
 
-def main():
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="RFID-triggered emotion analysis")
+    args = add_metrics_argument(add_source_arguments(parser)).parse_args(argv)
+    start_metrics_server(args.metrics_port)
+    
     print("\n" + "="*70)
     print("🎭 MOOD-DRIVEN AMBIENT CONTROL SYSTEM WITH LED 🎭")
     print("="*70)
@@ -322,7 +369,7 @@ def main():
     
     # Start camera
     print("\n[4/4] Starting Camera...")
-    if not analyzer.start_camera():
+    if not analyzer.start_camera(args.source, args.pace, loop=True):
         print("Cannot start camera")
         if rfid.ser:
             rfid.disconnect()
@@ -351,6 +398,7 @@ def main():
             
             if status:
                 if "ACCESS_GRANTED" in status:
+                    timings.count('rfid_scans', result='granted')
                     print("\n" + "="*70)
                     print("✅ RFID CARD AUTHORIZED - ACCESS GRANTED")
                     print("="*70)
@@ -361,6 +409,7 @@ def main():
                     print("Waiting for next RFID scan...\n")
                 
                 elif "ACCESS_DENIED" in status:
+                    timings.count('rfid_scans', result='denied')
                     print("\n" + "="*70)
                     print("❌ RFID CARD NOT AUTHORIZED - ACCESS DENIED")
                     print("="*70)
@@ -0,0 +1,266 @@
+import bisect
+import functools
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# Histogram bucket upper edges in milliseconds: 0.01 ms to ~10 s, 8 per decade
+BUCKET_EDGES_MS = tuple(0.01 * 10 ** (i / 8) for i in range(49))
+
+STAGE_ORDER = ('detect', 'track', 'preprocess', 'infer', 'draw', 'actuate')
+
+# Bucket edges for value histograms recorded with observe()
+FACE_COUNT_EDGES = (0, 1, 2, 3, 4, 6, 8, 12, 16)
+SESSION_SECONDS_EDGES = (1, 2, 5, 10, 15, 20, 30, 60, 120, 300)
+
+
+class StageHistogram:
+    """Fixed-size histogram: one counter per bucket plus count/sum/max
+
+    Buckets default to latency edges in milliseconds; observe() passes
+    its own edges for other values.
+
+    Recording is a bisect and a few integer updates under an uncontended
+    lock, so it can sit on the per-frame hot path and be recorded from
+    several threads without losing samples. Percentiles are estimated
+    from the buckets (each bucket spans ~33%, so a percentile is accurate
+    to within that).
+    """
+
+    __slots__ = ('edges', 'counts', 'count', 'total_ms', 'max_ms', 'recent_ms', '_lock')
+
+    def __init__(self, edges=BUCKET_EDGES_MS):
+        self.edges = edges
+        self.counts = [0] * (len(edges) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.recent_ms = 0.0  # EMA for the live overlay
+        self._lock = threading.Lock()
+
+    def record(self, ms):
+        bucket = bisect.bisect_left(self.edges, ms)
+        with self._lock:
+            self.counts[bucket] += 1
+            self.count += 1
+            self.total_ms += ms
+            if ms > self.max_ms:
+                self.max_ms = ms
+            self.recent_ms = ms if self.count == 1 else 0.9 * self.recent_ms + 0.1 * ms
+
+    def snapshot(self):
+        """Consistent copy, for readers on another thread (e.g. a scrape)"""
+        copy = StageHistogram(self.edges)
+        with self._lock:
+            copy.counts = list(self.counts)
+            copy.count = self.count
+            copy.total_ms = self.total_ms
+            copy.max_ms = self.max_ms
+            copy.recent_ms = self.recent_ms
+        return copy
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the q-th percentile (ms)"""
+        if not self.count:
+            return 0.0
+        rank = q / 100.0 * self.count
+        seen = 0
+        for bucket, n in enumerate(self.counts):
+            seen += n
+            if n and seen >= rank:
+                return min(self.edges[bucket], self.max_ms) if bucket < len(self.edges) else self.max_ms
+        return self.max_ms
+
+    @property
+    def mean_ms(self):
+        return self.total_ms / self.count if self.count else 0.0
+
+
+class _StageContext:
+    __slots__ = ('timings', 'name', 'start')
+
+    def __init__(self, timings, name):
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.timings.record(self.name, (time.perf_counter() - self.start) * 1000)
+        return False
+
+
+class StageTimings:
+    """Per-stage latency histograms, event counters and a rolling FPS
+
+    Also holds value histograms (observe) for non-latency distributions
+    such as faces per frame. Counters may carry labels, e.g.
+    count('emotions', emotion='happy'); metrics_server exports it all.
+
+    Usage:
+        with timings.stage('detect'):
+            faces = detector.detect_faces(frame)
+
+        @timings.timed('track')
+        def _apply_tracking(self, faces): ...
+
+        timings.count('inference_skipped', 3)
+        timings.frame()          # once per displayed frame, for FPS
+    """
+
+    def __init__(self, fps_window=30):
+        self.histograms = {}
+        self.values = {}
+        self.counters = {}      # name, or (name, ((label, value), ...)) -> count
+        self._frame_times = deque(maxlen=fps_window)
+        self._lock = threading.Lock()
+
+    def _histogram(self, name):
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            # Only the first record of a stage takes the lock
+            with self._lock:
+                histogram = self.histograms.setdefault(name, StageHistogram())
+        return histogram
+
+    def record(self, name, ms):
+        """Add one latency sample (milliseconds) to a stage"""
+        self._histogram(name).record(ms)
+
+    def stage(self, name):
+        """Context manager timing the enclosed block as one sample of a stage"""
+        return _StageContext(self, name)
+
+    def timed(self, name):
+        """Decorator timing every call of a function as a stage"""
+        def decorator(fn):
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    self.record(name, (time.perf_counter() - start) * 1000)
+            return wrapper
+        return decorator
+
+    def count(self, name, amount=1, **labels):
+        """Increment an event counter, optionally labelled; safe from any thread"""
+        key = (name, tuple(sorted(labels.items()))) if labels else name
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def snapshot_counters(self):
+        """Copy of the counters, taken under the lock"""
+        with self._lock:
+            return dict(self.counters)
+
+    def snapshot_histograms(self):
+        """Consistent copies of the stage and value histograms"""
+        with self._lock:
+            stages, values = dict(self.histograms), dict(self.values)
+        return ({name: h.snapshot() for name, h in stages.items()},
+                {name: h.snapshot() for name, h in values.items()})
+
+    def observe(self, name, value, edges):
+        """Add a sample to a value histogram with the given bucket edges"""
+        histogram = self.values.get(name)
+        if histogram is None:
+            with self._lock:
+                histogram = self.values.setdefault(name, StageHistogram(edges))
+        histogram.record(value)
+
+    def frame(self):
+        """Mark one displayed frame; feeds fps()"""
+        self._frame_times.append(time.perf_counter())
+
+    def fps(self):
+        """Frames per second over the last fps_window frames"""
+        times = self._frame_times
+        if len(times) < 2:
+            return 0.0
+        return (len(times) - 1) / (times[-1] - times[0])
+
+    def stages(self):
+        """Stage names in pipeline order, then any others"""
+        names = list(self.histograms)
+        return sorted(names, key=lambda n: (STAGE_ORDER.index(n) if n in STAGE_ORDER else len(STAGE_ORDER), n))
+
+    def summary(self):
+        """Per-stage statistics and counters as a dict"""
+        return {
+            'stages': {
+                name: {
+                    'count': h.count,
+                    'mean_ms': h.mean_ms,
+                    'p50_ms': h.percentile(50),
+                    'p95_ms': h.percentile(95),
+                    'p99_ms': h.percentile(99),
+                    'max_ms': h.max_ms,
+                }
+                for name, h in ((name, self.histograms[name]) for name in self.stages())
+            },
+            'counters': self.snapshot_counters(),
+        }
+
+    def print_summary(self):
+        """Print the end-of-run stage timing report"""
+        summary = self.summary()
+        print("\n" + "="*60)
+        print("⏱️  STAGE TIMINGS")
+        print("="*60)
+        print(f"{'Stage':>10} | {'Calls':>7} | {'Mean ms':>8} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7} | {'Max ms':>7}")
+        print("-" * 70)
+        for name, s in summary['stages'].items():
+            print(f"{name:>10} | {s['count']:>7} | {s['mean_ms']:>8.2f} | {s['p50_ms']:>7.2f} | "
+                  f"{s['p95_ms']:>7.2f} | {s['p99_ms']:>7.2f} | {s['max_ms']:>7.2f}")
+        for key, value in sorted(summary['counters'].items(), key=lambda item: str(item[0])):
+            if isinstance(key, tuple):
+                name, labels = key
+                key = name + '{' + ','.join(f'{k}={v}' for k, v in labels) + '}'
+            print(f"{key}: {value}")
+
+    def reset(self):
+        with self._lock:
+            self.histograms.clear()
+            self.values.clear()
+            self.counters.clear()
+            self._frame_times.clear()
+
+
+# Shared instance the modules and entry points record into
+timings = StageTimings()
+
+
+def draw_overlay(frame, stage_timings=None, queue_depths=None, show_fps=True, show_info_panel=True):
+    """Draw FPS and the live stage panel in the bottom-left corner
+
+    Args:
+        frame: BGR image, drawn on in place
+        stage_timings: StageTimings to read (default: the shared instance)
+        queue_depths: optional {queue name: length}, e.g. FramePipeline.queue_depths()
+        show_fps, show_info_panel: the [Display Settings] switches
+    """
+    stage_timings = stage_timings or timings
+    lines = []
+    if show_fps:
+        lines.append(f"FPS: {stage_timings.fps():.1f}")
+    if show_info_panel:
+        for name in stage_timings.stages():
+            lines.append(f"{name}: {stage_timings.histograms[name].recent_ms:.1f} ms")
+        if queue_depths:
+            lines.append("queues: " + " ".join(f"{name}={depth}" for name, depth in queue_depths.items()))
+        skipped = stage_timings.counters.get('inference_skipped', 0)
+        inferred = stage_timings.counters.get('inference_run', 0)
+        if skipped or inferred:
+            lines.append(f"inference skipped: {skipped / (skipped + inferred) * 100:.0f}%")
+
+    y = frame.shape[0] - 10 - 18 * (len(lines) - 1)
+    for line in lines:
+        cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 0), 3)
+        cv2.putText(frame, line, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+        y += 18
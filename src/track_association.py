@@ -0,0 +1,246 @@
+"""
+Face track association
+
+Detections are matched to tracks by solving one assignment over a cost
+matrix with SciPy's linear_sum_assignment (Hungarian, optimal). SciPy is
+listed in requirements.txt; without it the associator falls back to
+iterative mutual-best matching, which keeps pairs unique but is greedy,
+not an optimal assignment, and can swap ids of faces close together.
+"""
+
+import numpy as np
+
+try:
+    from scipy.optimize import linear_sum_assignment
+except ImportError:
+    linear_sum_assignment = None
+
+# Set once the mutual-best fallback has been reported
+_fallback_warned = False
+
+
+def _iou_matrix(a, b):
+    """IoU of every (x, y, w, h) box in a against every box in b: (len(a), len(b))"""
+    ax0, ay0 = a[:, 0:1], a[:, 1:2]
+    ax1, ay1 = ax0 + a[:, 2:3], ay0 + a[:, 3:4]
+    bx0, by0 = b[:, 0], b[:, 1]
+    bx1, by1 = bx0 + b[:, 2], by0 + b[:, 3]
+    inter = (np.clip(np.minimum(ax1, bx1) - np.maximum(ax0, bx0), 0, None) *
+             np.clip(np.minimum(ay1, by1) - np.maximum(ay0, by0), 0, None))
+    union = a[:, 2:3] * a[:, 3:4] + b[:, 2] * b[:, 3] - inter
+    return inter / np.maximum(union, 1e-6)
+
+
+def _mutual_best(cost):
+    """Unique (row, col) pairs: repeatedly accept pairs that are each
+    other's cheapest option, then drop their row and column"""
+    cost = cost.copy()
+    rows, cols = [], []
+    while np.isfinite(cost).any():
+        best_col = np.argmin(cost, axis=1)
+        best_row = np.argmin(cost, axis=0)
+        candidates = np.flatnonzero(np.isfinite(cost[np.arange(len(cost)), best_col]))
+        mutual = candidates[best_row[best_col[candidates]] == candidates]
+        if not len(mutual):
+            break
+        rows.extend(mutual)
+        cols.extend(best_col[mutual])
+        cost[mutual, :] = np.inf
+        cost[:, best_col[mutual]] = np.inf
+    return np.asarray(rows, dtype=int), np.asarray(cols, dtype=int)
+
+
+class FaceTrackAssociator:
+    """Assigns detected faces to persistent tracks with motion prediction
+
+    Every track keeps a constant-velocity state (center, size, velocity)
+    updated with an alpha-beta filter, the fixed-gain form of a Kalman
+    filter. Each frame all tracks are predicted forward, one cost matrix
+    of center distance and IoU is built against all detections, and the
+    assignment is solved in one step (Hungarian with SciPy, otherwise
+    mutual-best matching), so no two faces can claim the same track.
+    Unmatched detections start new tracks with a new track_id; tracks
+    unmatched for max_age frames are dropped, so an ID survives a few
+    missed detections.
+    """
+
+    def __init__(self, distance_threshold=60, smoothing_factor=0.8, max_age=10, min_iou=0.1):
+        """
+        Args:
+            distance_threshold: largest center distance (pixels, or half the
+                face size if larger) between a prediction and a detection
+                that may still match
+            smoothing_factor: weight of the prediction against the new
+                detection (0-1, higher = smoother boxes)
+            max_age: frames a track may go unmatched before it is dropped
+            min_iou: pairs beyond the distance threshold still match above
+                this IoU
+        """
+        self.distance_threshold = distance_threshold
+        self.alpha = 1.0 - min(max(smoothing_factor, 0.0), 0.95)
+        # Critically damped velocity gain for this alpha
+        self.beta = self.alpha ** 2 / (2.0 - self.alpha)
+        self.max_age = max_age
+        self.min_iou = min_iou
+        self.next_id = 0
+        self.reset()
+
+    def reset(self, restart_ids=False):
+        """Forget all tracks; IDs keep counting up unless restart_ids"""
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.state = np.zeros((0, 4))        # center x, center y, width, height
+        self.velocity = np.zeros((0, 2))     # pixels per frame
+        self.last_seen = np.zeros(0, dtype=np.int64)
+        if restart_ids:
+            self.next_id = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def _predicted(self, frame):
+        """(N, 4) predicted center/size of every track at frame"""
+        elapsed = (frame - self.last_seen)[:, None]
+        predicted = self.state.copy()
+        predicted[:, :2] += self.velocity * elapsed
+        return predicted, elapsed
+
+    def predicted_boxes(self, frame):
+        """{track_id: (x, y, w, h)} where each live track is expected at frame"""
+        predicted, _ = self._predicted(frame)
+        boxes = np.column_stack([predicted[:, :2] - predicted[:, 2:] / 2, predicted[:, 2:]]) if len(self) else []
+        return {int(track_id): tuple(int(round(v)) for v in box) for track_id, box in zip(self.ids, boxes)}
+
+    def update(self, faces, frame):
+        """Associate this frame's detections with the tracks
+
+        Args:
+            faces: face dicts with 'bbox' (x, y, w, h)
+            frame: frame number, for the motion prediction and ageing
+
+        Returns:
+            the faces with 'track_id' set and 'bbox' filtered, in input order
+        """
+        if not faces:
+            self._expire(frame)
+            return []
+
+        boxes = np.array([face['bbox'] for face in faces], dtype=np.float64)
+        measured = np.column_stack([boxes[:, :2] + boxes[:, 2:] / 2, boxes[:, 2:]])
+
+        predicted, elapsed = self._predicted(frame)
+        rows, cols = self._assign(predicted, boxes, measured)
+
+        # Alpha-beta update of the matched tracks, all at once
+        if len(rows):
+            residual = measured[cols] - predicted[rows]
+            self.state[rows] = predicted[rows] + self.alpha * residual
+            self.velocity[rows] += self.beta * residual[:, :2] / elapsed[rows]
+            self.last_seen[rows] = frame
+
+        # Unmatched detections start new tracks
+        new = np.setdiff1d(np.arange(len(faces)), cols)
+        if len(new):
+            new_ids = np.arange(self.next_id, self.next_id + len(new))
+            self.next_id += len(new)
+            self.ids = np.concatenate([self.ids, new_ids])
+            self.state = np.concatenate([self.state, measured[new]])
+            self.velocity = np.concatenate([self.velocity, np.zeros((len(new), 2))])
+            self.last_seen = np.concatenate([self.last_seen, np.full(len(new), frame)])
+
+        # Track row of every face: matched rows, then the appended ones
+        track_rows = np.empty(len(faces), dtype=int)
+        track_rows[cols] = rows
+        track_rows[new] = np.arange(len(self) - len(new), len(self))
+
+        tracked_faces = []
+        for face, row in zip(faces, track_rows):
+            cx, cy, w, h = self.state[row]
+            face = dict(face, track_id=int(self.ids[row]))
+            face['bbox'] = (int(round(cx - w / 2)), int(round(cy - h / 2)), int(round(w)), int(round(h)))
+            tracked_faces.append(face)
+        self._expire(frame)
+        return tracked_faces
+
+    def _assign(self, predicted, boxes, measured):
+        """Unique (track row, detection) pairs from one cost matrix of
+        center distance and IoU between predictions and detections"""
+        if not len(self) or not len(boxes):
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        predicted_boxes = np.column_stack([predicted[:, :2] - predicted[:, 2:] / 2, predicted[:, 2:]])
+        distance = np.linalg.norm(predicted[:, None, :2] - measured[None, :, :2], axis=2)
+        gate = np.maximum(self.distance_threshold, 0.5 * np.maximum(predicted[:, 2], predicted[:, 3]))[:, None]
+        iou = _iou_matrix(predicted_boxes, boxes)
+        cost = distance / gate + (1.0 - iou)
+        cost[(distance > gate) & (iou < self.min_iou)] = np.inf
+
+        if linear_sum_assignment is not None:
+            rows, cols = linear_sum_assignment(np.where(np.isfinite(cost), cost, 1e9))
+            keep = np.isfinite(cost[rows, cols])
+            return rows[keep], cols[keep]
+        global _fallback_warned
+        if not _fallback_warned:
+            _fallback_warned = True
+            print("⚠️  SciPy not installed - face tracks use greedy mutual-best matching, "
+                  "not an optimal assignment (pip install scipy)")
+        return _mutual_best(cost)
+
+    def refine(self, faces, frame, weight=0.5):
+        """Fuse detections made on an older frame into the tracks
+
+        For a slower, more accurate detector running behind the frame loop.
+        Each track is projected back to frame with its velocity, matched
+        against the detections, and its box is pulled towards the matched
+        detection carried forward again. Unmatched detections are ignored:
+        they are too old to start a track.
+
+        Returns:
+            {track_id: face} for the matched tracks
+        """
+        if not faces or not len(self):
+            return {}
+        boxes = np.array([face['bbox'] for face in faces], dtype=np.float64)
+        measured = np.column_stack([boxes[:, :2] + boxes[:, 2:] / 2, boxes[:, 2:]])
+
+        # Track states at the time the detector saw the frame
+        shift = self.velocity * (self.last_seen - frame)[:, None]
+        back = self.state.copy()
+        back[:, :2] -= shift
+        rows, cols = self._assign(back, boxes, measured)
+        if not len(rows):
+            return {}
+
+        forward = measured[cols]
+        forward[:, :2] += shift[rows]
+        self.state[rows] += weight * (forward - self.state[rows])
+        return {int(self.ids[row]): faces[col] for row, col in zip(rows, cols)}
+
+    def observe(self, faces, frame):
+        """Move known tracks to boxes that already carry their track_id
+        (e.g. from a box tracker between detections), without association
+
+        The box is taken as is; the velocity gets the same beta-gain update
+        as in update(), so a jumpy tracked box does not throw off the
+        prediction used at the next detection.
+        """
+        if not len(self):
+            return
+        rows = {int(track_id): row for row, track_id in enumerate(self.ids)}
+        for face in faces:
+            row = rows.get(face.get('track_id'))
+            if row is None:
+                continue
+            x, y, w, h = face['bbox']
+            center = np.array([x + w / 2, y + h / 2])
+            elapsed = max(1, frame - self.last_seen[row])
+            residual = center - (self.state[row, :2] + self.velocity[row] * elapsed)
+            self.velocity[row] += self.beta * residual / elapsed
+            self.state[row] = (center[0], center[1], w, h)
+            self.last_seen[row] = frame
+
+    def _expire(self, frame):
+        alive = frame - self.last_seen <= self.max_age
+        if not alive.all():
+            self.ids = self.ids[alive]
+            self.state = self.state[alive]
+            self.velocity = self.velocity[alive]
+            self.last_seen = self.last_seen[alive]
@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+"""
+Face detector backend tests on the real model files
+Loads YuNet and the res10 SSD from models/ and runs them on synthetic
+frames, full-frame and through the region search. A backend whose model
+files are not provisioned (python provision_face_detectors.py) is skipped
+
+Run directly or under pytest:
+    python test_face_backends.py
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+
+def model_files(backend):
+    """Model files of a backend, relative to the repository root"""
+    from face_detector_advanced import FACE_MODEL_PATHS
+
+    paths = FACE_MODEL_PATHS[backend]
+    if backend == 'yunet':
+        return [[paths]]
+    return [list(pair) for pair in paths]
+
+
+def load_detector(backend, **kwargs):
+    """Detector for backend from the real model files, or SkipTest when
+    they are not provisioned"""
+    from face_detector_advanced import AdvancedFaceDetector
+
+    if not any(all(os.path.exists(os.path.join(ROOT, path)) for path in files) for files in model_files(backend)):
+        raise unittest.SkipTest(f"{backend} model not provisioned; run provision_face_detectors.py")
+
+    previous = os.getcwd()
+    os.chdir(ROOT)
+    try:
+        detector = AdvancedFaceDetector(backend=backend, refine_backend='none', **kwargs)
+    finally:
+        os.chdir(previous)
+    assert detector.backend == backend, f"{backend} model present but did not load ({detector.backend} instead)"
+    return detector
+
+
+def synthetic_frames(count=10):
+    from frame_sources import SyntheticFaceSource
+
+    source = SyntheticFaceSource(2, num_frames=count, pace='fast', seed=1)
+    source.open()
+    frames = []
+    while (grabbed := source.read()) is not None:
+        frames.append(grabbed[0])
+    source.release()
+    return frames
+
+
+def check_faces(faces, frame, backend):
+    height, width = frame.shape[:2]
+    for face in faces:
+        x, y, w, h = face['bbox']
+        assert w > 0 and h > 0 and x < width and y < height, f"bad box {face['bbox']}"
+        assert 0.0 <= face['confidence'] <= 1.0, f"confidence {face['confidence']}"
+        assert face['method'] == backend, face['method']
+        assert 'track_id' in face
+        if backend == 'yunet':
+            assert set(face['keypoints']) == {'left_eye', 'right_eye', 'nose', 'mouth_left', 'mouth_right'}
+
+
+def run_backend(backend):
+    # Every frame a full-resolution detection, then the tracked ROI path
+    for kwargs in ({'detection_interval': 1, 'full_scan_interval': 0, 'detection_scale': 1.0},
+                   {'detection_interval': 1, 'full_scan_interval': 5}):
+        detector = load_detector(backend, **kwargs)
+        assert detector.detect_faces(np.zeros((480, 640, 3), dtype=np.uint8)) == [], "faces on a black frame"
+        for frame in synthetic_frames():
+            check_faces(detector.detect_faces(frame), frame, backend)
+
+
+def test_yunet_model():
+    """YuNet loads from models/ and returns well-formed faces with landmarks"""
+    run_backend('yunet')
+
+
+def test_ssd_model():
+    """The res10 SSD loads from models/ and returns well-formed faces"""
+    run_backend('ssd')
+
+
+def main():
+    tests = [test_yunet_model, test_ssd_model]
+
+    failed = 0
+    for test in tests:
+        print("\n" + "="*60)
+        print(test.__doc__)
+        print("="*60)
+        try:
+            test()
+            print("✅ PASS")
+        except unittest.SkipTest as e:
+            print(f"⏭️  SKIP: {e}")
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+
+    print(f"\n{len(tests) - failed}/{len(tests)} face backend tests passed or skipped")
+    sys.exit(0 if failed == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
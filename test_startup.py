@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+"""
+Startup test for the emotion detector
+Fails if constructing AdvancedEmotionDetector() trains a model or touches
+the network - models must be provisioned offline with provision_model.py
+
+Run directly or under pytest:
+    python test_startup.py
+"""
+
+import os
+import socket
+import sys
+import tempfile
+import time
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Construction should be a model load, not a training run
+MAX_STARTUP_SECONDS = 30
+
+
+class StartupGuard:
+    """Patches socket and Keras training entry points and records any call"""
+
+    def __init__(self):
+        self.network_calls = []
+        self.training_calls = []
+        self._restore = []
+
+    def _patch(self, owner, name, record, raise_error):
+        original = getattr(owner, name)
+
+        def guarded(*args, **kwargs):
+            record.append(f"{getattr(owner, '__name__', owner)}.{name}")
+            if raise_error:
+                raise OSError(f"{name} called during detector startup")
+            return original(*args, **kwargs)
+
+        setattr(owner, name, guarded)
+        self._restore.append((owner, name, original))
+
+    def __enter__(self):
+        self._patch(socket.socket, 'connect', self.network_calls, True)
+        self._patch(socket, 'create_connection', self.network_calls, True)
+        self._patch(socket, 'getaddrinfo', self.network_calls, True)
+
+        # Only guard Keras if it is already importable; the detector imports it lazily
+        try:
+            from tensorflow import keras
+            self._patch(keras.Model, 'fit', self.training_calls, False)
+            self._patch(keras.Model, 'train_on_batch', self.training_calls, False)
+        except ImportError:
+            pass
+        return self
+
+    def __exit__(self, *exc):
+        for owner, name, original in reversed(self._restore):
+            setattr(owner, name, original)
+        return False
+
+
+def construct_detector(cwd):
+    """Build AdvancedEmotionDetector() in cwd under the guard"""
+    from emotion_detector import AdvancedEmotionDetector
+
+    previous = os.getcwd()
+    os.chdir(cwd)
+    try:
+        with StartupGuard() as guard:
+            start = time.perf_counter()
+            detector = AdvancedEmotionDetector()
+            elapsed = time.perf_counter() - start
+    finally:
+        os.chdir(previous)
+    return detector, guard, elapsed
+
+
+def test_startup_with_provisioned_model():
+    """Default construction loads the shipped model without training or network I/O"""
+    detector, guard, elapsed = construct_detector(ROOT)
+
+    assert not guard.network_calls, f"network I/O during startup: {guard.network_calls}"
+    assert not guard.training_calls, f"training during startup: {guard.training_calls}"
+    assert detector.model_loaded, "shipped model failed to load"
+    assert elapsed < MAX_STARTUP_SECONDS, f"startup took {elapsed:.1f}s"
+
+
+def test_startup_without_model():
+    """A missing model is reported, never downloaded or trained"""
+    with tempfile.TemporaryDirectory() as empty_dir:
+        detector, guard, elapsed = construct_detector(empty_dir)
+
+    assert not guard.network_calls, f"network I/O during startup: {guard.network_calls}"
+    assert not guard.training_calls, f"training during startup: {guard.training_calls}"
+    assert not detector.model_loaded, "detector claimed a model without one on disk"
+    assert elapsed < MAX_STARTUP_SECONDS, f"startup took {elapsed:.1f}s"
+
+
+def main():
+    tests = [test_startup_with_provisioned_model, test_startup_without_model]
+
+    failed = 0
+    for test in tests:
+        print("\n" + "="*60)
+        print(test.__doc__)
+        print("="*60)
+        try:
+            test()
+            print("✅ PASS")
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+
+    print(f"\n{len(tests) - failed}/{len(tests)} startup tests passed")
+    sys.exit(0 if failed == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+"""
+Track association tests
+Synthetic face trajectories through FaceTrackAssociator: track ids must
+persist (also when faces cross), tracks are born and die on schedule, and
+the mutual-best fallback matches like the Hungarian solver
+
+Run directly or under pytest:
+    python test_track_association.py
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Add src to path
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+import track_association
+from track_association import FaceTrackAssociator, _mutual_best
+
+
+def faces_at(centers, size=80):
+    """Face dicts with size x size boxes around the given centers"""
+    return [{'bbox': (int(round(cx - size / 2)), int(round(cy - size / 2)), size, size)} for cx, cy in centers]
+
+
+def crossing_run(frames=60):
+    """Two faces walking through each other; returns the ids per frame,
+    in the order the faces were passed in"""
+    tracks = FaceTrackAssociator()
+    ids = []
+    for frame in range(frames):
+        left = (100 + 8 * frame, 240)
+        right = (580 - 8 * frame, 250)
+        tracked = tracks.update(faces_at([left, right]), frame)
+        ids.append([face['track_id'] for face in tracked])
+    return ids
+
+
+def without_scipy(fn):
+    """Run fn with the mutual-best fallback instead of linear_sum_assignment"""
+    solver = track_association.linear_sum_assignment
+    track_association.linear_sum_assignment = None
+    try:
+        return fn()
+    finally:
+        track_association.linear_sum_assignment = solver
+
+
+def test_ids_persist_through_crossing():
+    """Crossing faces keep their ids, with and without SciPy"""
+    runs = [without_scipy(crossing_run)]
+    if track_association.linear_sum_assignment is not None:
+        runs.append(crossing_run())
+    for ids in runs:
+        assert all(frame_ids == ids[0] for frame_ids in ids), f"id switch: {ids}"
+        assert len(set(ids[0])) == 2, f"faces share an id: {ids[0]}"
+
+
+def test_track_birth_and_death():
+    """New faces get new ids, an id survives short gaps and is dropped after max_age"""
+    tracks = FaceTrackAssociator(max_age=5)
+    first = tracks.update(faces_at([(200, 200)]), 0)[0]['track_id']
+
+    # A second face arrives
+    ids = [face['track_id'] for face in tracks.update(faces_at([(200, 200), (450, 220)]), 1)]
+    assert ids[0] == first and ids[1] != first, ids
+
+    # The first face is missed for a few frames, then found again
+    for frame in range(2, 5):
+        tracks.update(faces_at([(450, 220)]), frame)
+    ids = [face['track_id'] for face in tracks.update(faces_at([(200, 200), (450, 220)]), 5)]
+    assert ids[0] == first, f"id lost after a short gap: {ids}"
+
+    # Gone for longer than max_age: the track is dropped, a return is a new face
+    for frame in range(6, 13):
+        tracks.update(faces_at([(450, 220)]), frame)
+    assert len(tracks) == 1, f"{len(tracks)} tracks left"
+    returned = tracks.update(faces_at([(200, 200), (450, 220)]), 13)[0]['track_id']
+    assert returned != first, "expired track was revived"
+
+
+def test_observe_keeps_prediction_smooth():
+    """Jittery tracked boxes between detections do not derail the prediction"""
+    rng = np.random.default_rng(0)
+    tracks = FaceTrackAssociator()
+    track_id = None
+    velocities = []
+    for frame in range(100):
+        center = (100 + 4 * frame, 240)
+        if frame % 5 == 0:
+            tracked = tracks.update(faces_at([center]), frame)
+            track_id = track_id if track_id is not None else tracked[0]['track_id']
+            assert tracked[0]['track_id'] == track_id, f"id switch at frame {frame}"
+        else:
+            # Tracked boxes jitter by up to 10 pixels a frame
+            jitter = rng.uniform(-10, 10, 2)
+            tracks.observe([dict(faces_at([np.add(center, jitter)])[0], track_id=track_id)], frame)
+        velocities.append(tracks.velocity[0].copy())
+    velocities = np.array(velocities)
+    # Raw position jumps would swing the velocity by up to 20 px/frame
+    assert np.abs(velocities[:, 1]).max() < 2, f"vertical velocity up to {np.abs(velocities[:, 1]).max():.1f}"
+    assert velocities[:, 0].max() < 8, f"horizontal velocity up to {velocities[:, 0].max():.1f}"
+    assert abs(velocities[-1, 0] - 4) < 1.5, f"final velocity {velocities[-1]}"
+
+
+def test_mutual_best_is_unique():
+    """The fallback never assigns a row or column twice and skips infinite costs"""
+    cost = np.array([[0.1, 0.2, np.inf],
+                     [0.15, 0.9, np.inf],
+                     [np.inf, np.inf, np.inf]])
+    rows, cols = _mutual_best(cost)
+    assert sorted(zip(rows.tolist(), cols.tolist())) == [(0, 0), (1, 1)], list(zip(rows, cols))
+
+
+def main():
+    tests = [test_ids_persist_through_crossing, test_track_birth_and_death,
+             test_observe_keeps_prediction_smooth, test_mutual_best_is_unique]
+
+    failed = 0
+    for test in tests:
+        print("\n" + "="*60)
+        print(test.__doc__)
+        print("="*60)
+        try:
+            test()
+            print("✅ PASS")
+        except AssertionError as e:
+            print(f"❌ FAIL: {e}")
+            failed += 1
+
+    print(f"\n{len(tests) - failed}/{len(tests)} track association tests passed")
+    sys.exit(0 if failed == 0 else 1)
+
+
+if __name__ == "__main__":
+    main()